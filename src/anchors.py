@@ -0,0 +1,98 @@
+from array import array
+
+from enums import RackingPattern
+from rowset import LANDSCAPE, as_rowset
+from utils import get_mount_counts
+
+
+def get_anchor_positions(row_data, user_inputs):
+    """Calculate the position of every anchor in the array.
+
+    Positions are engine lengths from the left panel edge of each row and
+    are returned as parallel columns: ``row`` (row index), ``rail`` (0 for
+    the top rail, 1 for the bottom rail), ``rafter`` (rafters counted from
+    the first anchor) and ``x``. ``offsets`` holds the index of each row's
+    first anchor, with the total count appended.
+
+    Each rail starts with an anchor at the bracket inset, which fixes the
+    rafter grid. Anchors then repeat every max. span between anchors,
+    rounded down to whole rafters, and the last anchor takes the last
+    rafter before the far bracket inset. With the staggered pattern the top
+    rail's anchors are shifted by half a span, rounded down to whole
+    rafters. The number of anchors always matches ``get_mount_counts``, and
+    every anchor lies between the bracket insets.
+    """
+    panel_width = user_inputs["panel_width"]
+    panel_height = user_inputs["panel_height"]
+    panel_spacing = user_inputs["panel_spacing"]
+    rafter_spacing = user_inputs["min._anchor_spacing_interval"]
+    bracket_inset = user_inputs["bracket_inset"]
+
+    rafters_per_span = int(user_inputs["max._rail_span_btwn_anchors"] // rafter_spacing)
+    staggered = user_inputs["anchor_pattern"] == RackingPattern.STAGGERED
+
+    rows = array("I")
+    rails = array("B")
+    rafters = array("i")
+    offsets = array("I", [0])
+    layouts = {}  # Rafter indices per rail, shared by rows of the same length
+
+    row_set = as_rowset(row_data)
+    for row_num, (num_panels, orientation) in enumerate(zip(row_set.num_panels, row_set.orientations)):
+        key = (num_panels, orientation)
+        if key not in layouts:
+            if orientation == LANDSCAPE:
+                row_width = num_panels * panel_height + (num_panels - 1) * panel_spacing
+            else:
+                row_width = num_panels * panel_width + (num_panels - 1) * panel_spacing
+            layouts[key] = _rail_rafters(row_width, user_inputs, rafters_per_span, staggered)
+
+        for rail, rail_rafters in enumerate(layouts[key]):
+            rafters.extend(rail_rafters)
+            rails.extend(array("B", [rail]) * len(rail_rafters))
+        rows.extend(array("I", [row_num]) * (len(rafters) - offsets[-1]))
+        offsets.append(len(rafters))
+
+    anchors = {
+        "row": rows,
+        "rail": rails,
+        "rafter": rafters,
+        "x": array("q", [bracket_inset + rafter * rafter_spacing for rafter in rafters]),
+        "offsets": offsets,
+    }
+    return anchors
+
+
+def _rail_rafters(row_width, user_inputs, rafters_per_span, staggered):
+    """Return the rafter index of each anchor on the top and bottom rails of a row."""
+    rafter_spacing = user_inputs["min._anchor_spacing_interval"]
+    last_rafter = max(0, (row_width - 2 * user_inputs["bracket_inset"]) // rafter_spacing)
+    top_count, bottom_count = (int(count) for count in get_mount_counts(row_width, user_inputs))
+
+    # Anchors every span from the bracket inset, then one at the last rafter before the far inset
+    bottom = [span * rafters_per_span for span in range(bottom_count - 1)] + [last_rafter]
+    if staggered:
+        shift = max(1, rafters_per_span // 2)
+        top = [0] + [shift + span * rafters_per_span for span in range(top_count - 2)] + [last_rafter]
+    else:
+        top = list(bottom)
+
+    return _place_anchors(top, last_rafter), _place_anchors(bottom, last_rafter)
+
+
+def _place_anchors(rafters, last_rafter):
+    """Keep a rail's anchors between the bracket insets without changing their number.
+
+    ``get_mount_counts`` counts the far end anchor apart from the anchors
+    every span, so on some row widths two anchors want the same rafter. A
+    doubled anchor moves to the middle of the widest gap between anchors,
+    and only stays doubled on the last rafter when every rafter has one.
+    """
+    placed = sorted({min(rafter, last_rafter) for rafter in rafters})
+    for _ in range(len(rafters) - len(placed)):
+        width, index = max(((placed[i + 1] - placed[i], i) for i in range(len(placed) - 1)), default=(0, 0))
+        if width < 2:
+            placed.append(last_rafter)
+        else:
+            placed.insert(index + 1, placed[index] + width // 2)
+    return array("i", placed)
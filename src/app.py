@@ -1,16 +1,26 @@
-from tkinter import messagebox
+import os
+from time import perf_counter
+from tkinter import filedialog, messagebox
 
 from customtkinter import CTk, CTkButton, CTkFrame, CTkScrollableFrame
 
 from controller import *
-from ui import PanelInputFields, RackingInputFields, RowFields, TabView
+from enums import RailSelection
+from export import export_in_background
+from loads import get_anchor_loads, get_array_psf
+from ui import PanelInputFields, RackingInputFields, RowFields, TabView, TelemetryWindow
 from utils import *
+from units import convert_rail_catalog
 from data_manager import DataManager
+from widgets import WidgetTelemetry, clear_frame
 
 class App(CTk):
     TITLE = "Racking Builder"
     WIDTH = 1000
     HEIGHT = 660
+    WATCH_INTERVAL = 1000  # Milliseconds between checks of the data file
+    EXPORT_POLL_INTERVAL = 100  # Milliseconds between checks of a running export
+    SOLVE_BUDGET = 0.05  # Seconds "Least Waste" rail selection may take before the best rails so far are shown
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -20,12 +30,20 @@ class App(CTk):
         self.row_fields = None
         self.tabview = None
         self.editing_data = False
+        self.reload_data_screen = None
+        self.results = None
         self.data_manager = DataManager()
+        # Widget and memory telemetry, shown with F12, when RACKING_BUILDER_DEBUG is set
+        self.telemetry = WidgetTelemetry(self) if os.environ.get("RACKING_BUILDER_DEBUG") else None
+        self.telemetry_window = None
         # Setup
         self.build_ui()
         self.init_inputs()
         self.set_default_inputs()
         self.init_row_builder()
+        self.after(self.WATCH_INTERVAL, self.watch_data)
+        if self.telemetry:
+            self.bind("<F12>", lambda _: self.show_telemetry())
         # self.after(250, lambda: print(self.sidebar.winfo_width()))
 
     def configure_root(self):
@@ -152,16 +170,77 @@ class App(CTk):
 
         update_preview_frame(self.preview_frame, row_data, user_inputs)
 
-        rail_lengths = self.data_manager.get_rails()
-        rail_data = get_row_data(row_data, rail_lengths, user_inputs)
-        equipment_data = get_equipment_data(row_data, rail_lengths, user_inputs)
-        equipment_data.update({"total_waste": f'{round(sum(rail_data["all_wastes"]), 2)}"'})
+        rail_catalog = convert_rail_catalog(self.data_manager.get_rail_catalog())
+        rail_lengths = [rail["length"] for rail in rail_catalog]
+        if user_inputs["rail_selection"] == RailSelection.LEAST_WASTE:
+            # The search may be cut short, so how much waste it might have missed is shown
+            rail_solutions = get_rail_solutions(
+                row_data, rail_lengths, user_inputs, deadline=perf_counter() + self.SOLVE_BUDGET
+            )
+            rail_selections = [solution.selection for solution in rail_solutions]
+            waste_gaps = [solution.gap for solution in rail_solutions]
+        else:
+            rail_selections = get_rail_selections(row_data, rail_catalog, user_inputs)
+            waste_gaps = None
+        rail_data = get_row_data(row_data, rail_lengths, user_inputs, rail_selections)
+        equipment_data = get_equipment_data(row_data, rail_lengths, user_inputs, rail_selections)
+        purchase_data = get_purchase_data(equipment_data.num_rails, rail_catalog)
         psf_data = get_psf_data(row_data, user_inputs)
+        self.results = (row_data, user_inputs, equipment_data, rail_data, purchase_data, psf_data)
 
-        update_hardware_results(self.tabview.get_equipment_results_frame(), equipment_data)
-        update_rail_results(self.tabview.get_rail_results_frame(), rail_data, psf_data)
+        update_hardware_results(
+            self.tabview.get_equipment_results_frame(),
+            equipment_data,
+            rail_data,
+            purchase_data,
+            self.export_results,
+            sum(waste_gaps or ()),
+        )
+        anchor_loads = get_anchor_loads(row_data, user_inputs)
+        array_psf = get_array_psf(row_data, user_inputs)
+        update_rail_results(
+            self.tabview.get_rail_results_frame(), rail_data, psf_data, anchor_loads, array_psf, waste_gaps
+        )
         self.tabview.set("Hardware")
 
+        self.record_view("Preview", self.preview_frame)
+        self.record_view("Hardware", self.tabview.get_equipment_results_frame())
+        self.record_view("Rails", self.tabview.get_rail_results_frame())
+
+    def export_results(self):
+        """Export the latest results to a file chosen by the user."""
+        if self.results is None:
+            return self.show_warning_dialog(self.TITLE, "Please get results before exporting.")
+        path = filedialog.asksaveasfilename(
+            title=self.TITLE,
+            defaultextension=".xlsx",
+            filetypes=[("Excel Workbook", "*.xlsx"), ("CSV", "*.csv"), ("DXF Drawing", "*.dxf"), ("PNG Image", "*.png")],
+        )
+        if not path:
+            return
+        future = export_in_background(path, *self.results)
+        self.after(self.EXPORT_POLL_INTERVAL, self.check_export, future, path)
+
+    def check_export(self, future, path):
+        """Report the export once it finishes, without blocking the UI."""
+        if not future.done():
+            return self.after(self.EXPORT_POLL_INTERVAL, self.check_export, future, path)
+        error = future.exception()
+        if error:
+            return self.show_warning_dialog(self.TITLE, f"Could not export to {path}: {error}")
+        messagebox.showinfo(self.TITLE, f"Exported to {path}.")
+
+    def record_view(self, view, widget=None):
+        """Sample a view's widgets and memory after an update, when telemetry is on."""
+        if self.telemetry:
+            self.telemetry.record(view, widget)
+
+    def show_telemetry(self):
+        """Open the telemetry window, or bring it to the front."""
+        if self.telemetry_window is None or not self.telemetry_window.winfo_exists():
+            self.telemetry_window = TelemetryWindow(self, self.telemetry)
+        self.telemetry_window.lift()
+
     def show_warning_dialog(self, title, message):
         messagebox.showwarning(title, message)
 
@@ -171,15 +250,49 @@ class App(CTk):
         self.editing_data = True
         self.preview_frame.grid_forget()
         self.data_frame.grid(row=0, column=1, sticky="nsew")
-        edit_data(self.data_frame, self.on_save_changes)
+        self.reload_data_screen = edit_data(self.data_frame, self.on_save_changes)
+        self.record_view("Data", self.data_frame)
 
     def on_save_changes(self):
         """Callback function to be passed to edit_data, called after saving changes."""
-        from data_manager import DataManager
-
         self.editing_data = False
+        self.reload_data_screen = None
+        self.clear_results()
         self.data_frame.grid_forget()
         self.preview_frame.grid(row=0, column=1, sticky="nsew")
+        self.refresh_panel_models()
+        self.record_view("App")
+
+    def clear_results(self):
+        """Drop the shown results and their export, which the changed data no longer matches."""
+        self.results = None
+        clear_frame(self.tabview.get_equipment_results_frame())
+        clear_frame(self.tabview.get_rail_results_frame())
+
+    def watch_data(self):
+        """Apply changes made to the data file by other programs, e.g. a catalog sync."""
+        diff = self.data_manager.reload_if_changed()
+        if diff:
+            self.on_data_changed(diff)
+        self.after(self.WATCH_INTERVAL, self.watch_data)
+
+    def on_data_changed(self, diff):
+        """Update only what depends on the panel models and rails that changed."""
+        self.clear_results()
+        if diff.rails:
+            clear_rail_caches()
+        if diff.panels:
+            current_panel = self.panel_fields.get_input("panel_model")
+            if current_panel in diff.panels_removed or current_panel in diff.panels_changed:
+                self.refresh_panel_models()
+            else:
+                self.panel_fields.load_panel_models()
+        if self.reload_data_screen:
+            self.reload_data_screen(diff)
+
+    def refresh_panel_models(self):
+        """Reload the panel model options and the selected panel's dimensions."""
+        from data_manager import DataManager
 
         current_panel = self.panel_fields.get_input("panel_model")
         current_width = self.panel_fields.get_input("panel_width")
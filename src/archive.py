@@ -0,0 +1,313 @@
+import mmap
+import os
+import struct
+import zlib
+from array import array
+from json import dumps, loads
+
+from enums import RackingPattern, RailSelection
+from results import EquipmentResult, PurchaseResult, RailResult
+from rowset import RowSet, as_rowset
+
+MAGIC = b"RBARCHV1"
+RECORD_MAGIC = b"RBPR"
+VERSION = 1
+
+# magic, version, index offset, number of projects, index CRC-32
+HEADER = struct.Struct("<8sHxxxxxxQQI4x")
+
+# Fixed part of a project record, as (field, struct code); its sections follow, each 8-byte aligned
+RECORD_LAYOUT = (
+    ("magic", "4s"),
+    ("length", "I"),  # Bytes in the whole record
+    ("name_size", "I"),
+    ("inputs_size", "I"),
+    ("num_rows", "I"),
+    ("num_rail_lengths", "I"),
+    ("num_modules", "I"),
+    ("num_mounts", "I"),
+    ("num_mids", "I"),
+    ("num_ends", "I"),
+    ("num_splices", "I"),
+    ("span_btwn_anchors", "q"),
+    ("total_waste", "q"),
+    ("rail_cost", "d"),
+    ("max_psf", "d"),
+)
+RECORD = struct.Struct("<" + "".join(code for _, code in RECORD_LAYOUT))
+RECORD_FIELDS = tuple(field for field, _ in RECORD_LAYOUT)
+_FIELD_STRUCTS = {
+    field: (struct.calcsize("<" + "".join(code for _, code in RECORD_LAYOUT[:i])), struct.Struct("<" + code))
+    for i, (field, code) in enumerate(RECORD_LAYOUT)
+}
+
+_ENUM_INPUTS = {"anchor_pattern": RackingPattern, "rail_selection": RailSelection}
+
+
+class ProjectArchive:
+    """Many projects' inputs, rows and results packed into one memory-mapped file.
+
+    Every project is one record: a fixed header with its hardware totals,
+    then its name, inputs, rows and per-row results as packed arrays. An
+    index of record offsets at the end of the file gives random access,
+    and records are only decoded as far as they are read, so scanning a
+    totals column touches nothing else. Appended projects are written over
+    the old index, which is rewritten after them; if an append is
+    interrupted, opening the archive rebuilds the index from the records.
+
+    Views of records read from an archive keep its memory map alive.
+    """
+
+    def __init__(self, path, writable=False):
+        self.path = path
+        self.writable = writable
+        if writable and not os.path.exists(path):
+            with open(path, "wb") as f:
+                f.write(HEADER.pack(MAGIC, VERSION, HEADER.size, 0, zlib.crc32(b"")))
+        self.file = open(path, "r+b" if writable else "rb")
+        self._map()
+
+    def _map(self):
+        """Map the file and load its index, rebuilding the index if it doesn't match its checksum."""
+        self.mmap = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.buffer = memoryview(self.mmap)
+        magic, version, index_offset, count, index_crc = HEADER.unpack_from(self.buffer)
+        if magic != MAGIC:
+            raise ValueError(f'"{self.path}" is not a project archive.')
+        if version != VERSION:
+            raise ValueError(f'"{self.path}" is a version {version} archive; version {VERSION} is supported.')
+
+        index_end = index_offset + 8 * count
+        if index_end <= len(self.buffer) and zlib.crc32(self.buffer[index_offset:index_end]) == index_crc:
+            self.offsets = self.buffer[index_offset:index_end].cast("Q")
+            self.index_offset = index_offset
+        else:
+            self.offsets, self.index_offset = self._scan_records()
+
+    def _scan_records(self):
+        """Find the complete records by walking them from the start of the file."""
+        offsets = array("Q")
+        offset = HEADER.size
+        while offset + RECORD.size <= len(self.buffer):
+            magic, length = struct.unpack_from("<4sI", self.buffer, offset)
+            if magic != RECORD_MAGIC or length < RECORD.size or offset + length > len(self.buffer):
+                break
+            offsets.append(offset)
+            offset += length
+        return offsets, offset
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __getitem__(self, index):
+        return ArchivedProject(self.buffer, self.offsets[index])
+
+    def __iter__(self):
+        for offset in self.offsets:
+            yield ArchivedProject(self.buffer, offset)
+
+    def column(self, field):
+        """Return one of the fixed ``RECORD_FIELDS`` of every project, read straight from the map."""
+        field_offset, field_struct = _FIELD_STRUCTS[field]
+        values = array("d" if field_struct.format[-1] == "d" else "q")
+        buffer = self.buffer
+        for offset in self.offsets:
+            values.append(field_struct.unpack_from(buffer, offset + field_offset)[0])
+        return values
+
+    def append(self, projects):
+        """Append (name, user_inputs, row_data, equipment, rails, purchase, psf) projects.
+
+        Returns the index of the first appended project.
+        """
+        if not self.writable:
+            raise ValueError("The archive was opened read-only.")
+        first = len(self.offsets)
+        offsets = array("Q", self.offsets)
+        self.file.seek(self.index_offset)
+        position = self.index_offset
+        for project in projects:
+            record = encode_project(*project)
+            self.file.write(record)
+            offsets.append(position)
+            position += len(record)
+
+        # The new index goes after the new records, and the header points at it last
+        index = offsets.tobytes()
+        self.file.write(index)
+        self.file.truncate()
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file.seek(0)
+        self.file.write(HEADER.pack(MAGIC, VERSION, position, len(offsets), zlib.crc32(index)))
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+        # Views of earlier records keep the old map until they are gone
+        self.offsets = self.buffer = None
+        self.mmap = None
+        self._map()
+        return first
+
+    def close(self):
+        self.offsets = self.buffer = self.mmap = None
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _align(size):
+    return -(-size // 8) * 8
+
+
+def _sections(name_size, inputs_size, num_rows, num_rail_lengths):
+    """Return the (offset, size) of each section of a record, after its fixed header."""
+    sizes = (
+        ("name", name_size),
+        ("inputs", inputs_size),
+        ("rail_lengths", 8 * num_rail_lengths),
+        ("num_rails", 8 * num_rail_lengths),
+        ("num_packs", 8 * num_rail_lengths),
+        ("row_lengths", 8 * num_rows),
+        ("all_wastes", 8 * num_rows),
+        ("psf", 8 * num_rows),
+        ("row_rails", 4 * num_rows * num_rail_lengths),
+        ("num_panels", 2 * num_rows),
+        ("orientations", num_rows),
+    )
+    sections = {}
+    offset = RECORD.size
+    for name, size in sizes:
+        sections[name] = (offset, size)
+        offset += _align(size)
+    return sections, offset
+
+
+def encode_project(name, user_inputs, row_data, equipment, rails, purchase, psf):
+    """Pack a project's inputs, rows and results into one archive record."""
+    row_set = as_rowset(row_data)
+    name_bytes = str(name).encode()
+    inputs_bytes = dumps(
+        {key: value.value if key in _ENUM_INPUTS else value for key, value in user_inputs.items()}
+    ).encode()
+    rail_lengths = list(equipment.num_rails)
+    num_rows = len(row_set)
+    sections, length = _sections(len(name_bytes), len(inputs_bytes), num_rows, len(rail_lengths))
+
+    record = bytearray(length)
+    RECORD.pack_into(
+        record,
+        0,
+        RECORD_MAGIC,
+        length,
+        len(name_bytes),
+        len(inputs_bytes),
+        num_rows,
+        len(rail_lengths),
+        equipment.num_modules,
+        equipment.num_mounts,
+        equipment.num_mids,
+        equipment.num_ends,
+        equipment.num_splices,
+        equipment.span_btwn_anchors,
+        rails.total_waste,
+        purchase.rail_cost,
+        max(psf, default=0.0),
+    )
+    for section, data in (
+        ("name", name_bytes),
+        ("inputs", inputs_bytes),
+        ("rail_lengths", array("q", rail_lengths)),
+        ("num_rails", array("q", (equipment.num_rails[length] for length in rail_lengths))),
+        ("num_packs", array("q", (purchase.num_packs.get(length, 0) for length in rail_lengths))),
+        ("row_lengths", array("q", rails.row_lengths)),
+        ("all_wastes", array("q", rails.all_wastes)),
+        ("psf", array("d", psf)),
+        (
+            "row_rails",
+            array("I", (row_rails.get(length, 0) for row_rails in rails.all_rails for length in rail_lengths)),
+        ),
+        ("num_panels", row_set.num_panels),
+        ("orientations", row_set.orientations),
+    ):
+        offset, size = sections[section]
+        record[offset:offset + size] = data if isinstance(data, bytes) else memoryview(data).cast("B")
+    return bytes(record)
+
+
+class ArchivedProject:
+    """A read-only view of one archived project, decoding each part only when it is read."""
+
+    __slots__ = ("buffer", "offset", "header", "sections")
+
+    def __init__(self, buffer, offset):
+        self.buffer = buffer
+        self.offset = offset
+        self.header = dict(zip(RECORD_FIELDS, RECORD.unpack_from(buffer, offset)))
+        self.sections, _ = _sections(
+            self.header["name_size"], self.header["inputs_size"], self.header["num_rows"], self.header["num_rail_lengths"]
+        )
+
+    def _section(self, name, format="B"):
+        offset, size = self.sections[name]
+        return self.buffer[self.offset + offset:self.offset + offset + size].cast(format)
+
+    @property
+    def name(self):
+        return bytes(self._section("name")).decode()
+
+    @property
+    def user_inputs(self):
+        user_inputs = loads(bytes(self._section("inputs")))
+        for key, enum in _ENUM_INPUTS.items():
+            if key in user_inputs:
+                user_inputs[key] = enum.map()[user_inputs[key]]
+        return user_inputs
+
+    @property
+    def row_data(self):
+        """The rows, as a RowSet over the archive's memory."""
+        return RowSet(self._section("num_panels", "H"), self._section("orientations"))
+
+    @property
+    def equipment(self):
+        header = self.header
+        return EquipmentResult(
+            num_modules=header["num_modules"],
+            num_rails=dict(zip(self._section("rail_lengths", "q"), self._section("num_rails", "q"))),
+            num_mounts=header["num_mounts"],
+            num_mids=header["num_mids"],
+            num_ends=header["num_ends"],
+            num_splices=header["num_splices"],
+            span_btwn_anchors=header["span_btwn_anchors"],
+        )
+
+    @property
+    def rails(self):
+        rail_lengths = self._section("rail_lengths", "q").tolist()
+        row_rails = self._section("row_rails", "I")
+        width = len(rail_lengths)
+        return RailResult(
+            row_lengths=tuple(self._section("row_lengths", "q")),
+            all_rails=tuple(
+                dict(zip(rail_lengths, row_rails[start:start + width])) for start in range(0, len(row_rails), width)
+            )
+            if width
+            else ({},) * self.header["num_rows"],
+            all_wastes=tuple(self._section("all_wastes", "q")),
+        )
+
+    @property
+    def purchase(self):
+        return PurchaseResult(
+            num_packs=dict(zip(self._section("rail_lengths", "q"), self._section("num_packs", "q"))),
+            rail_cost=self.header["rail_cost"],
+        )
+
+    @property
+    def psf(self):
+        return self._section("psf", "d").tolist()
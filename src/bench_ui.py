@@ -0,0 +1,256 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+from contextlib import contextmanager
+from time import perf_counter
+
+RUNS = 5  # Times each script is played, each in a new App
+TOLERANCE = 0.25  # Slowdown against the baseline median reported as a regression
+NOISE_FLOOR = 5.0  # Milliseconds a step may slow down by without being a regression
+SCREEN = "1280x1024x24"
+
+# Recorded action scripts. Every step is timed until the event loop is idle.
+SCRIPTS = {
+    "get_results": [
+        {"action": "set_rows", "count": 100, "num_panels": 12},
+        {"action": "click", "text": "Get Results"},
+        {"action": "tab", "name": "Rails"},
+        {"action": "click", "text": "Get Results"},
+        {"action": "set_rows", "count": 10, "num_panels": 12},
+        {"action": "click", "text": "Get Results"},
+    ],
+    "add_rows": [
+        {"action": "tab", "name": "Rows"},
+        {"action": "click", "text": "Add Row", "repeat": 100},
+        {"action": "click", "text": "Delete Row", "repeat": 100},
+        {"action": "click", "text": "Add Row", "repeat": 100},
+    ],
+    "switch_tabs": [
+        {"action": "set_rows", "count": 100, "num_panels": 12},
+        {"action": "click", "text": "Get Results"},
+        {"action": "tab", "name": "Inputs"},
+        {"action": "tab", "name": "Rows"},
+        {"action": "tab", "name": "Hardware"},
+        {"action": "tab", "name": "Rails"},
+    ],
+    "edit_catalog": [
+        {"action": "click", "text": "Edit Data"},
+        {"action": "click", "text": "Add Rail"},
+        {"action": "click", "text": "Add Panel"},
+        {"action": "click", "text": "Discard Changes"},
+        {"action": "click", "text": "Save & Close"},
+        {"action": "click", "text": "Edit Data"},
+        {"action": "click", "text": "Save & Close"},
+    ],
+}
+
+
+@contextmanager
+def virtual_display(screen=SCREEN):
+    """Run under a new Xvfb display, which picks its own free display number."""
+    read_fd, write_fd = os.pipe()
+    xvfb = subprocess.Popen(
+        ["Xvfb", "-displayfd", str(write_fd), "-screen", "0", screen, "-nolisten", "tcp"],
+        pass_fds=(write_fd,),
+        stderr=subprocess.DEVNULL,
+    )
+    os.close(write_fd)
+    try:
+        with os.fdopen(read_fd) as f:
+            display = f.readline().strip()
+        if not display:
+            raise RuntimeError("Xvfb did not start.")
+        previous = os.environ.get("DISPLAY")
+        os.environ["DISPLAY"] = f":{display}"
+        try:
+            yield os.environ["DISPLAY"]
+        finally:
+            if previous is None:
+                del os.environ["DISPLAY"]
+            else:
+                os.environ["DISPLAY"] = previous
+    finally:
+        xvfb.terminate()
+        xvfb.wait()
+
+
+@contextmanager
+def isolated_data():
+    """Point the app's data file at a fresh copy of the default data, and answer its dialogs."""
+    from tkinter import messagebox
+
+    home = tempfile.mkdtemp(prefix="racking-bench-")
+    saved_env = {name: os.environ.get(name) for name in ("HOME", "USERPROFILE")}
+    os.environ["HOME"] = os.environ["USERPROFILE"] = home
+
+    # Dialogs would wait for a click, so they are recorded and answered instead
+    dialogs = []
+
+    def answer(kind):
+        def dialog(title=None, message=None, **options):
+            dialogs.append((kind, message))
+            return True
+
+        return dialog
+
+    saved_dialogs = {name: getattr(messagebox, name) for name in ("showinfo", "showwarning", "askyesno")}
+    for name in saved_dialogs:
+        setattr(messagebox, name, answer(name))
+    try:
+        yield dialogs
+    finally:
+        for name, dialog in saved_dialogs.items():
+            setattr(messagebox, name, dialog)
+        for name, value in saved_env.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        shutil.rmtree(home, ignore_errors=True)
+
+
+def wait_until_idle(app):
+    """Process events until none are ready; timers that are not yet due are left waiting."""
+    import _tkinter
+
+    app.update_idletasks()
+    while app.tk.dooneevent(_tkinter.ALL_EVENTS | _tkinter.DONT_WAIT):
+        pass
+
+
+def find_button(widget, text):
+    """Return the button with the given text under a widget, preferring one on screen."""
+    from customtkinter import CTkButton
+
+    found = []
+    stack = [widget]
+    while stack:
+        widget = stack.pop()
+        if isinstance(widget, CTkButton) and widget.cget("text") == text:
+            found.append(widget)
+        stack.extend(widget.winfo_children())
+    if not found:
+        raise ValueError(f'No "{text}" button is shown.')
+    return next((button for button in found if button.winfo_ismapped()), found[0])
+
+
+def perform(app, step):
+    """Carry out one step of a script."""
+    action = step["action"]
+    if action == "click":
+        for _ in range(step.get("repeat", 1)):
+            find_button(app, step["text"]).invoke()
+    elif action == "tab":
+        app.tabview.set(step["name"])
+    elif action == "set_rows":
+        app.row_fields.set_row_data([(step["num_panels"], step.get("orientation", "Portrait"))] * step["count"])
+    elif action == "set_input":
+        fields = app.panel_fields if step["name"] in app.panel_fields.inputs else app.racking_fields
+        fields.inputs[step["name"]].set(step["value"])
+    else:
+        raise ValueError(f'Unknown action "{action}".')
+
+
+def step_label(step):
+    details = " ".join(f"{key}={value}" for key, value in step.items() if key != "action")
+    return f"{step['action']} {details}".strip()
+
+
+def play(steps):
+    """Start an App, play the steps in it and return the milliseconds each took, startup first."""
+    from app import App
+
+    class BenchmarkApp(App):
+        def iconbitmap(self, *args, **kwargs):
+            pass  # Windows icons can't be shown under X
+
+    timings = []
+    start = perf_counter()
+    app = BenchmarkApp()
+    wait_until_idle(app)
+    timings.append(("start app", (perf_counter() - start) * 1000))
+    try:
+        for step in steps:
+            start = perf_counter()
+            perform(app, step)
+            wait_until_idle(app)
+            timings.append((step_label(step), (perf_counter() - start) * 1000))
+    finally:
+        for after_id in app.tk.splitlist(app.tk.call("after", "info")):
+            app.after_cancel(after_id)
+        app.destroy()
+    return timings
+
+
+def benchmark(script_names, runs=RUNS):
+    """Play each script ``runs`` times and return the median and fastest time of each step."""
+    results = {}
+    with isolated_data() as dialogs:
+        for name in script_names:
+            runs_timings = [play(SCRIPTS[name]) for _ in range(runs)]
+            steps = {}
+            for number, timings in enumerate(zip(*runs_timings), 1):
+                label = f"{number:02d} {timings[0][0]}"
+                times = [elapsed for _, elapsed in timings]
+                steps[label] = {"median_ms": round(statistics.median(times), 2), "min_ms": round(min(times), 2)}
+            results[name] = steps
+        if dialogs:
+            print(f"Dialogs answered during the run: {dialogs}", file=sys.stderr)
+    return {"python": platform.python_version(), "platform": platform.platform(), "runs": runs, "scripts": results}
+
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    """Return the steps slower than the baseline by more than the tolerance and the noise floor."""
+    regressions = []
+    for name, steps in results["scripts"].items():
+        for label, timing in steps.items():
+            base = baseline["scripts"].get(name, {}).get(label)
+            if base is None:
+                continue
+            slowdown = timing["median_ms"] - base["median_ms"]
+            if slowdown > NOISE_FLOOR and timing["median_ms"] > base["median_ms"] * (1 + tolerance):
+                regressions.append((name, label, base["median_ms"], timing["median_ms"]))
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time scripted UI actions in the app under a virtual display.")
+    parser.add_argument("scripts", nargs="*", help=f"scripts to play, of {', '.join(SCRIPTS)} (default: all)")
+    parser.add_argument("--runs", type=int, default=RUNS)
+    parser.add_argument("--save", metavar="PATH", help="save the results as a baseline")
+    parser.add_argument("--compare", metavar="PATH", help="compare the results with a saved baseline")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    parser.add_argument("--display", action="store_true", help="use the current display instead of Xvfb")
+    args = parser.parse_args()
+    unknown = [name for name in args.scripts if name not in SCRIPTS]
+    if unknown:
+        parser.error(f"unknown scripts: {', '.join(unknown)}")
+    args.scripts = args.scripts or list(SCRIPTS)
+
+    if args.display:
+        results = benchmark(args.scripts, args.runs)
+    else:
+        with virtual_display():
+            results = benchmark(args.scripts, args.runs)
+
+    for name, steps in results["scripts"].items():
+        print(name)
+        for label, timing in steps.items():
+            print(f"  {label:<48}{timing['median_ms']:>10.1f} ms  (min {timing['min_ms']:.1f})")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for name, label, before, after in regressions:
+            print(f"Slower: {name} / {label}: {before:.1f} ms -> {after:.1f} ms")
+        if regressions:
+            raise SystemExit(1)
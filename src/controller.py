@@ -1,66 +1,33 @@
 from tkinter import messagebox
 
 from customtkinter import (
-    LEFT,
     CTkButton,
     CTkEntry,
     CTkFrame,
     CTkLabel,
-    CTkScrollableFrame,
 )
 
+from render import LayoutRenderer
+from ui import LayoutPreview, RailResults
+from units import format_length
+from widgets import clear_frame
 
-def update_preview_frame(preview_frame, row_data, user_inputs):
-    """Update the preview based on row data."""
-    max_length = 0
-    panel_width, panel_height = (
-        user_inputs["panel_width"],
-        user_inputs["panel_height"],
-    )
-
-    for _, (num_panels, orientation) in enumerate(row_data):
-        if orientation == "Landscape":
-            xwidth = int(panel_height)
-        else:
-            xwidth = int(panel_width)
-        row_length = round(num_panels * xwidth) + num_panels * 2
-        if row_length > 680:
-            max_length = max(row_length, max_length)
-
-    if max_length > 0:
-        scaling_factor = 680 / max_length
-        panel_width = int(panel_width * scaling_factor)
-        panel_height = int(panel_height * scaling_factor)
-
-    for child in preview_frame.winfo_children():
-        child.destroy()
-
-    for row_num, (num_panels, orientation) in enumerate(row_data):
-        row_frame = CTkFrame(preview_frame, fg_color="transparent")
-        row_frame.grid(row=row_num, column=0, sticky="nsew")
-
-        if orientation == "Landscape":
-            xwidth = panel_height  # Height becomes the width in landscape
-            yheight = panel_width  # Width becomes the height in landscape
-        else:
-            xwidth = panel_width  # Normal width for portrait
-            yheight = panel_height  # Normal height for portrait
 
-        CTkLabel(row_frame, text=str(row_num + 1), width=14).pack(side=LEFT, padx=(0, 8))
-        for _ in range(num_panels):
-            CTkFrame(
-                row_frame,
-                width=xwidth,
-                height=yheight,
-                fg_color="black",
-                corner_radius=0,
-                border_width=1,
-            ).pack(side=LEFT, pady=(0, 2))
+def update_preview_frame(preview_frame, row_data, user_inputs):
+    """Update the preview with a zoomable drawing of the rows."""
+    renderer = LayoutRenderer(row_data, user_inputs)
+    preview = _reusable_view(preview_frame, LayoutPreview)
+    if preview is None:
+        clear_frame(preview_frame)
+        LayoutPreview(preview_frame, renderer).grid(row=0, column=0, sticky="nsew")
+    else:
+        preview.set_renderer(renderer)
 
 
-def update_hardware_results(equipment_results_frame, equipment_data):
-    for child in equipment_results_frame.winfo_children():
-        child.destroy()
+def update_hardware_results(
+    equipment_results_frame, equipment_data, rail_data, purchase_data, export_command=None, waste_gap=0
+):
+    clear_frame(equipment_results_frame)
 
     row = 0
 
@@ -75,18 +42,23 @@ def update_hardware_results(equipment_results_frame, equipment_data):
     )
     row += 2
 
-    for key, text in {
-        "num_modules": "Modules",
-        "num_splices": "Splices",
-        "num_ends": "Ends",
-        "num_mids": "Mids",
-        "num_mounts": "Anchors",
-        "total_waste": "Total Waste",
-        "span_btwn_anchors": "Max Span Btwn Anchors",
-    }.items():
+    hardware_rows = [
+        ("Modules", equipment_data.num_modules),
+        ("Splices", equipment_data.num_splices),
+        ("Ends", equipment_data.num_ends),
+        ("Mids", equipment_data.num_mids),
+        ("Anchors", equipment_data.num_mounts),
+        ("Total Waste", format_length(rail_data.total_waste)),
+        ("Rail Cost", f"${purchase_data.rail_cost:,.2f}"),
+        ("Max Span Btwn Anchors", format_length(equipment_data.span_btwn_anchors)),
+    ]
+    if waste_gap:
+        # Waste that a rail search cut short by its time limit might still have saved
+        hardware_rows.append(("Unproven Waste", format_length(waste_gap)))
+    for text, value in hardware_rows:
         label = CTkLabel(equipment_results_frame, text=text)
         label.grid(row=row, column=0, padx=8, sticky="w")
-        value_label = CTkLabel(equipment_results_frame, text=f"{equipment_data[key]}")
+        value_label = CTkLabel(equipment_results_frame, text=f"{value}")
         value_label.grid(row=row, column=1, padx=8, sticky="e")
         row += 1
 
@@ -101,103 +73,61 @@ def update_hardware_results(equipment_results_frame, equipment_data):
     )
     row += 2
 
-    for rail_length, count in equipment_data["num_rails"].items():
-        label = CTkLabel(equipment_results_frame, text=f'{rail_length:g}"')
+    for rail_length, count in equipment_data.num_rails.items():
+        label = CTkLabel(equipment_results_frame, text=format_length(rail_length))
         label.grid(row=row, column=0, padx=8, sticky="w")
-        value_label = CTkLabel(equipment_results_frame, text=str(count))
+        # Show the packs to order when rails are not sold individually
+        num_packs = purchase_data.num_packs[rail_length]
+        value_label = CTkLabel(
+            equipment_results_frame,
+            text=str(count) if num_packs == count else f"{count} ({num_packs} pk)",
+        )
         value_label.grid(row=row, column=1, padx=8, sticky="e")
         row += 1
 
+    if export_command:
+        CTkButton(equipment_results_frame, text="Export...", command=export_command).grid(
+            row=row, column=0, columnspan=2, padx=8, pady=(14, 0)
+        )
 
-def update_rail_results(rail_results_frame, rail_data, psf_data):
-    for child in rail_results_frame.winfo_children():
-        child.destroy()
-
-    row_lengths_frame = CTkScrollableFrame(rail_results_frame, height=548, fg_color="transparent")
-    row_lengths_frame.grid(row=0, column=0, columnspan=2, sticky="nsew")
-    row_lengths_frame.grid_columnconfigure(0, weight=1)
-
-    row_lengths = rail_data["row_lengths"]
-    all_rails = rail_data["all_rails"]
-    all_wastes = rail_data["all_wastes"]
-    for i, length in enumerate(row_lengths):
-        frame = CTkFrame(row_lengths_frame, fg_color="transparent", height=0, corner_radius=0)
-        frame.grid_columnconfigure(2, weight=1)
-        frame.grid(row=i, column=0, sticky="ew")
-        # Row number
-        label = CTkLabel(frame, width=14, text=i+1)
-        label.grid(row=0, column=0, rowspan=4, padx=(0, 8), sticky="w")
-        # Row 0
-        CTkLabel(
-            frame,             
-            text=f"Rail Length:",
-            anchor="w",
-            font=("TkDefaultFont", 11),
-            height=20,
-        ).grid(row=0, column=1, sticky="w")
-        CTkLabel(
-            frame,
-            text=f'{length}"', 
-            anchor="e",
-            font=("TkDefaultFont", 11),
-            height=20,    
-        ).grid(row=0, column=2, padx=4, sticky="e")
-        # Row 1
-        CTkLabel(
-            frame,
-            text="Rails:",
-            anchor="w",
-            font=("TkDefaultFont", 11),
-            height=20,
-        ).grid(row=1, column=1, sticky="w")
-        CTkLabel(
-            frame,
-            text=" | ".join(
-                [
-                    f'{length:g}": {count}'
-                    for length, count in sorted(all_rails[i].items(), reverse=True)
-                    if count != 0
-                ]
+
+def update_rail_results(rail_results_frame, rail_data, psf_data, anchor_loads, array_psf, waste_gaps=None):
+    rail_results = _reusable_view(rail_results_frame, RailResults)
+    if rail_results is None:
+        clear_frame(rail_results_frame)
+        rail_results = RailResults(rail_results_frame)
+        rail_results.grid(row=0, column=0, columnspan=2, sticky="nsew")
+
+    row_values = [
+        (
+            format_length(length),
+            " | ".join(
+                f"{format_length(rail_length)}: {count}"
+                for rail_length, count in sorted(rails.items(), reverse=True)
+                if count != 0
             ),
-            anchor="e",
-            font=("TkDefaultFont", 11),
-            height=20,
-        ).grid(row=1, column=2, padx=4, sticky="e")
-        # Row 2
-        CTkLabel(
-            frame,
-            text="Cutoffs:",
-            anchor="w",
-            font=("TkDefaultFont", 11),
-            height=20,
-        ).grid(row=2, column=1, sticky="w")
-        CTkLabel(
-            frame,
-            text=f'2 x {all_wastes[i]/2}"',
-            anchor="e",
-            font=("TkDefaultFont", 11),
-            height=20,
-        ).grid(row=2, column=2, padx=4, sticky="e")
-        # Row 3
-        CTkLabel(
-            frame,
-            text="Deadload:",
-            anchor="w",
-            font=("TkDefaultFont", 11),
-            height=20,
-        ).grid(row=3, column=1, sticky="w")
-        CTkLabel(
-            frame,
-            text=f"{psf_data[i]} psf",
-            anchor="e",
-            font=("TkDefaultFont", 11),
-            height=20,
-        ).grid(row=3, column=2, padx=4, sticky="e")
-        # Separator
-        if i < len(row_lengths) - 1:
-            CTkFrame(frame, height=2, fg_color="gray50").grid(
-                row=4, columnspan=3, padx=4, pady=4, sticky="ew"
-            )
+            f"2 x {format_length(waste // 2)}" + (f" (gap {format_length(gap // 2)})" if gap else ""),
+            f"{psf} psf",
+            f"{max_load:.1f} lbs",
+        )
+        for length, rails, waste, gap, psf, max_load in zip(
+            rail_data.row_lengths,
+            rail_data.all_rails,
+            rail_data.all_wastes,
+            waste_gaps or [0] * len(rail_data.all_wastes),
+            psf_data,
+            anchor_loads["row_max"],
+        )
+    ]
+    rail_results.show(f"{array_psf} psf", row_values)
+
+
+def _reusable_view(frame, view_class):
+    """Return the frame's view if it is its only widget and of the given class, else None."""
+    children = frame.winfo_children()
+    if len(children) == 1 and isinstance(children[0], view_class):
+        return children[0]
+    return None
 
 
 def edit_data(preview_frame, save_changes_callback):
@@ -206,9 +136,8 @@ def edit_data(preview_frame, save_changes_callback):
     # Get the DataManager instance
     data_manager = DataManager()
 
-    # Clear the frame
-    for child in preview_frame.winfo_children():
-        child.grid_forget()
+    # Clear the frame, including the widgets of any earlier edit
+    clear_frame(preview_frame)
 
     # Enable/Disable save and discard buttons
     def enable_discard():
@@ -236,20 +165,38 @@ def edit_data(preview_frame, save_changes_callback):
                     f'Width, height, or weight for Panel "{panel["name"]}" is not valid.',
                 )
 
-        # Convert rail lengths to floats
-        for i in range(len(data_manager.data["rails"])):
+        # Convert rail lengths and prices to floats and pack sizes to ints
+        for rail in data_manager.data["rails"]:
             try:
-                data_manager.data["rails"][i] = float(data_manager.data["rails"][i])
+                rail["length"] = float(rail["length"])
             except ValueError:
                 return messagebox.showwarning(
                     preview_frame.winfo_toplevel().title(),
-                    f'Rail length "{data_manager.data["rails"][i]}" is not valid.',
+                    f'Rail length "{rail["length"]}" is not valid.',
+                )
+            try:
+                rail["price"] = float(rail["price"])
+                rail["pack_size"] = int(rail["pack_size"])
+                if rail["price"] < 0 or rail["pack_size"] < 1:
+                    raise ValueError
+            except ValueError:
+                return messagebox.showwarning(
+                    preview_frame.winfo_toplevel().title(),
+                    f'Price or pack size for Rail "{rail["length"]:g}" is not valid.',
                 )
 
-        # Save the data and update the UI
+        rail_lengths = [rail["length"] for rail in data_manager.data["rails"]]
+        for length in rail_lengths:
+            if rail_lengths.count(length) > 1:
+                return messagebox.showwarning(
+                    preview_frame.winfo_toplevel().title(),
+                    f'Rail length "{length:g}" is listed more than once.',
+                )
+
+        # Save the data and close the editor
         data_manager.save_data()
-        disable_discard()
-        render_data()
+        button_frame.destroy()
+        clear_frame(preview_frame)
         save_changes_callback()
 
     def discard_changes():
@@ -299,22 +246,56 @@ def edit_data(preview_frame, save_changes_callback):
             enable_discard()
             render_data()
 
-    def modify_rail(index, value):
-        """Modify a specific rail length."""
-        data_manager.update_rail(index, value)
+    def modify_rail(index, key, value):
+        """Modify a specific rail's attribute."""
+        data_manager.update_rail(index, key, value)
         enable_discard()
 
+    def reload_data(diff):
+        """Show a catalog reloaded from disk, unless there are unsaved changes."""
+        if discard_button.cget("state") == "normal":
+            return
+        data_manager.data = data_manager.snapshot().to_data()
+        if diff.panels_added or diff.panels_removed or diff.rails_added or diff.rails_removed:
+            return render_data()
+
+        # Entries were made for the rendered data, which may list the reloaded data in another order
+        panels = data_manager.data["panel_models"]
+        rails = data_manager.data["rails"]
+        if list(panel_entries) != [panel["name"] for panel in panels] or list(rail_entries) != [
+            rail["length"] for rail in rails
+        ]:
+            return render_data()
+
+        # Only values changed, so update just those entries
+        for panel in panels:
+            if panel["name"] in diff.panels_changed:
+                for key, entry in panel_entries[panel["name"]].items():
+                    set_entry(entry, panel.get(key, ""))
+        for rail in rails:
+            if float(rail["length"]) in diff.rails_changed:
+                for key, entry in rail_entries[rail["length"]].items():
+                    value = rail.get(key, "")
+                    set_entry(entry, f"{value:g}" if isinstance(value, float) else value)
+
+    def set_entry(entry, value):
+        entry.delete(0, "end")
+        entry.insert(0, value)
+
+    # Each panel's entries by name, and each rail's by length, in the order rendered
+    panel_entries = {}
+    rail_entries = {}
+
     # Render the data into the frames
     def render_data():
         # Freeze UI updates
         preview_frame.update_idletasks()
 
         # Clear previous content in the frames
-        for child in panel_frame.winfo_children():
-            child.grid_forget()
-        # Clear previous content in the frames
-        for child in rail_frame.winfo_children():
-            child.grid_forget()
+        clear_frame(panel_frame)
+        clear_frame(rail_frame)
+        panel_entries.clear()
+        rail_entries.clear()
 
         # Add column headers and "Add Panel" button in the panel_frame
         CTkLabel(
@@ -379,11 +360,20 @@ def edit_data(preview_frame, save_changes_callback):
                 width=0,
                 command=lambda idx=i: delete_panel(idx),
             ).grid(row=i + 1, column=4, padx=(4, 8), pady=4)
+            panel_entries[panel["name"]] = {
+                "name": name_entry, "width": width_entry, "height": height_entry, "weight": weight_entry
+            }
 
-        # Add column header and "Add Rail" button in the rail_frame
+        # Add column headers and "Add Rail" button in the rail_frame
         CTkLabel(
             rail_frame, text="Length (in.)", font=("TkDefaultFont", 13, "bold")
         ).grid(row=0, column=0, padx=8, pady=4, sticky="w")
+        CTkLabel(
+            rail_frame, text="Price ($)", font=("TkDefaultFont", 13, "bold")
+        ).grid(row=0, column=1, padx=8, pady=4, sticky="w")
+        CTkLabel(
+            rail_frame, text="Pack Size", font=("TkDefaultFont", 13, "bold")
+        ).grid(row=0, column=2, padx=8, pady=4, sticky="w")
 
         CTkButton(rail_frame, text="Add Rail", command=add_rail).grid(
             row=len(data_manager.data["rails"]) + 1, column=0, padx=4, pady=(4, 8)
@@ -391,19 +381,23 @@ def edit_data(preview_frame, save_changes_callback):
 
         # Populate rail data with editable fields
         for i, rail in enumerate(data_manager.data["rails"]):
-            rail_entry = CTkEntry(rail_frame)
-            rail_entry.insert(0, f"{rail:g}" if isinstance(rail, float) else rail)
-            rail_entry.grid(row=i + 1, column=0, padx=(8, 4), pady=4)
-            rail_entry.bind(
-                "<KeyRelease>",
-                lambda _, idx=i, entry=rail_entry: modify_rail(idx, entry.get()),
-            )
+            rail_entries[rail["length"]] = entries = {}
+            for column, key in enumerate(("length", "price", "pack_size")):
+                value = rail.get(key, "")
+                rail_entry = CTkEntry(rail_frame) if column == 0 else CTkEntry(rail_frame, width=100)
+                rail_entry.insert(0, f"{value:g}" if isinstance(value, float) else value)
+                rail_entry.grid(row=i + 1, column=column, padx=(8, 4) if column == 0 else 4, pady=4)
+                rail_entry.bind(
+                    "<KeyRelease>",
+                    lambda _, idx=i, key=key, entry=rail_entry: modify_rail(idx, key, entry.get()),
+                )
+                entries[key] = rail_entry
             CTkButton(
                 rail_frame,
                 text="Delete",
                 width=0,
                 command=lambda idx=i: delete_rail(idx),
-            ).grid(row=i + 1, column=1, padx=(4, 8), pady=4)
+            ).grid(row=i + 1, column=3, padx=(4, 8), pady=4)
 
         # Apply UI updates
         preview_frame.update_idletasks()
@@ -445,3 +439,5 @@ def edit_data(preview_frame, save_changes_callback):
 
     # Initially render the data
     render_data()
+
+    return reload_data
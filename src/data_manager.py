@@ -1,23 +1,116 @@
 import os
 import sys
+from contextlib import contextmanager
+from dataclasses import dataclass
 from json import dump, load
+from threading import RLock
+from types import MappingProxyType
+from typing import Mapping, Tuple
+
+
+@dataclass(frozen=True, slots=True)
+class CatalogSnapshot:
+    """An immutable version of the saved panel models and rails.
+
+    Snapshots are never modified, so any thread can hold on to one and
+    read it while the catalog is edited and saved.
+    """
+
+    version: int
+    panel_models: Tuple[Mapping, ...]
+    rails: Tuple[Mapping, ...]
+
+    @classmethod
+    def from_data(cls, data, version):
+        return cls(
+            version=version,
+            panel_models=tuple(MappingProxyType(dict(panel)) for panel in data.get("panel_models", [])),
+            rails=tuple(MappingProxyType(dict(rail)) for rail in data.get("rails", [])),
+        )
+
+    def __reduce__(self):
+        # Mapping proxies can't be pickled, so snapshots travel to worker processes as plain data
+        return self.from_data, (self.to_data(), self.version)
+
+    def to_data(self):
+        """Return an editable copy of the catalog."""
+        return {
+            "panel_models": [dict(panel) for panel in self.panel_models],
+            "rails": [dict(rail) for rail in self.rails],
+        }
+
+
+@dataclass(frozen=True, slots=True)
+class CatalogDiff:
+    """Panel models, by name, and rails, by length, that differ between two snapshots."""
+
+    panels_added: Tuple[str, ...] = ()
+    panels_removed: Tuple[str, ...] = ()
+    panels_changed: Tuple[str, ...] = ()
+    rails_added: Tuple[float, ...] = ()
+    rails_removed: Tuple[float, ...] = ()
+    rails_changed: Tuple[float, ...] = ()
+
+    @classmethod
+    def between(cls, old, new):
+        old_panels = {panel["name"]: panel for panel in old.panel_models}
+        new_panels = {panel["name"]: panel for panel in new.panel_models}
+        old_rails = {float(rail["length"]): rail for rail in old.rails}
+        new_rails = {float(rail["length"]): rail for rail in new.rails}
+        return cls(
+            panels_added=tuple(name for name in new_panels if name not in old_panels),
+            panels_removed=tuple(name for name in old_panels if name not in new_panels),
+            panels_changed=tuple(
+                name for name in new_panels if name in old_panels and new_panels[name] != old_panels[name]
+            ),
+            rails_added=tuple(length for length in new_rails if length not in old_rails),
+            rails_removed=tuple(length for length in old_rails if length not in new_rails),
+            rails_changed=tuple(
+                length for length in new_rails if length in old_rails and new_rails[length] != old_rails[length]
+            ),
+        )
+
+    @property
+    def panels(self):
+        return bool(self.panels_added or self.panels_removed or self.panels_changed)
+
+    @property
+    def rails(self):
+        return bool(self.rails_added or self.rails_removed or self.rails_changed)
+
+    def __bool__(self):
+        return self.panels or self.rails
 
 
 class DataManager:
+    """Keeps the saved catalog as a snapshot and an editable draft of it in ``data``.
+
+    Readers get the latest saved snapshot; the add/delete/update methods only
+    change the draft until ``save_data`` publishes it as a new snapshot.
+    """
+
     _instance = None
+    _lock = RLock()
     _file_name = "data.json"  # Only the file name here, not the full path
 
     def __new__(cls, *args, **kwargs):
         if cls._instance is None:
-            cls._instance = super().__new__(cls)
-            cls._instance._initialized = False
+            with cls._lock:
+                if cls._instance is None:
+                    instance = super().__new__(cls)
+                    instance._initialized = False
+                    cls._instance = instance
         return cls._instance
 
     def __init__(self):
         if not self._initialized:
-            self.file_path = self.get_file_path(self._file_name)
-            self.data = self.load_data()
-            self._initialized = True
+            with self._lock:
+                if not self._initialized:
+                    self.file_path = self.get_file_path(self._file_name)
+                    self._snapshot = None
+                    self._file_stat = None
+                    self.data = self.load_data()
+                    self._initialized = True
 
     def get_file_path(self, file_name):
         """Determine the correct file path for data.json in the AppData folder."""
@@ -25,14 +118,60 @@ class DataManager:
         return os.path.join(appdata_dir, file_name)
 
     def load_data(self):
-        """Load data from JSON, creating the file with default data if it doesn't exist."""
-        if not os.path.exists(self.file_path):
-            # Create default data if the file doesn't exist
-            self.copy_default_data()
-        
-        # Load the data from the file
+        """Load data from JSON, creating the file with default data if it doesn't exist.
+
+        The loaded data is published as the current snapshot and an editable
+        copy of it is returned.
+        """
+        with self._lock, self.file_lock():
+            if not os.path.exists(self.file_path):
+                # Create default data if the file doesn't exist
+                self.copy_default_data()
+
+            self._publish(self._read())
+        return self._snapshot.to_data()
+
+    def reload_if_changed(self):
+        """Reload the data file if another program changed it.
+
+        Only the file's modification time and size are checked, so this is
+        cheap enough to poll. Returns the ``CatalogDiff`` against the
+        previous snapshot, or None if the file is unchanged. The draft is
+        left untouched.
+        """
+        try:
+            stat = os.stat(self.file_path)
+        except FileNotFoundError:
+            return None
+        if (stat.st_mtime_ns, stat.st_size) == self._file_stat:
+            return None
+
+        with self._lock, self.file_lock():
+            old_snapshot = self._snapshot
+            try:
+                data = self._read()
+            except ValueError:
+                return None  # Still being written; the next poll will retry
+            self._publish(data)
+        return CatalogDiff.between(old_snapshot, self._snapshot)
+
+    def _read(self):
+        """Read the data file while it is locked."""
         with open(self.file_path) as f:
-            return load(f)
+            stat = os.fstat(f.fileno())
+            data = load(f)
+        self._file_stat = (stat.st_mtime_ns, stat.st_size)
+
+        # Older data files store rails as bare lengths without pricing
+        data["rails"] = [self.normalize_rail(rail) for rail in data.get("rails", [])]
+        return data
+
+    @staticmethod
+    def normalize_rail(rail):
+        """Return a rail catalog entry, upgrading a bare rail length if needed."""
+        if isinstance(rail, dict):
+            return rail
+        return {"length": rail, "price": 0.0, "pack_size": 1}
 
     def copy_default_data(self):
         """Copy the default data.json from MEIPASS to the AppData folder."""
@@ -42,29 +181,90 @@ class DataManager:
         else:
             # Running in a normal script execution
             source_path = os.path.join(os.path.dirname(__file__), self._file_name)
-        
+
         # Ensure the AppData directory exists
         os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
-        
+
         # Copy the file to the AppData directory
         with open(source_path, 'rb') as src_file:
             with open(self.file_path, 'wb') as dest_file:
                 dest_file.write(src_file.read())
 
     def save_data(self):
-        """Save sorted data to JSON."""
-        self.data["panel_models"].sort(key=lambda x: x["name"])
-        self.data["rails"].sort(key=lambda x: int(x))
-        with open(self.file_path, "w") as f:
-            dump(self.data, f, indent=4)
+        """Save the sorted draft to JSON and publish it as the current snapshot."""
+        with self._lock, self.file_lock():
+            self._write(self.data)
+
+    def update_data(self, change):
+        """Apply ``change`` to a copy of the latest saved data and save it.
+
+        The file stays locked from reading to writing, so updates from other
+        processes are never lost. The draft is left untouched.
+        """
+        with self._lock, self.file_lock():
+            data = self._read()
+            change(data)
+            self._write(data)
+        return self._snapshot
+
+    def _write(self, data):
+        """Sort and write the data while the file is locked, then publish it."""
+        data["panel_models"].sort(key=lambda x: x["name"])
+        data["rails"].sort(key=lambda x: float(x["length"]))
+
+        # Write to a temporary file first so other processes never read a partial file
+        temp_path = f"{self.file_path}.{os.getpid()}.tmp"
+        with open(temp_path, "w") as f:
+            dump(data, f, indent=4)
+        os.replace(temp_path, self.file_path)
+        stat = os.stat(self.file_path)
+        self._file_stat = (stat.st_mtime_ns, stat.st_size)
+        self._publish(data)
+
+    def _publish(self, data):
+        """Replace the current snapshot with a frozen copy of the data."""
+        version = self._snapshot.version + 1 if self._snapshot else 1
+        self._snapshot = CatalogSnapshot.from_data(data, version)
+
+    @contextmanager
+    def file_lock(self):
+        """Hold an advisory lock on the data file across processes."""
+        os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
+        with open(f"{self.file_path}.lock", "a+b") as lock_file:
+            if os.name == "nt":
+                import msvcrt
+
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                try:
+                    yield
+                finally:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def snapshot(self):
+        """Return the current catalog snapshot."""
+        return self._snapshot
 
     def get_panel_models(self):
-        """Return list of panel models."""
-        return self.data.get("panel_models", [])
+        """Return the saved panel models."""
+        return self._snapshot.panel_models
 
     def get_rails(self):
-        """Return list of rail lengths."""
-        return self.data.get("rails", [])
+        """Return the saved rail lengths."""
+        return [rail["length"] for rail in self._snapshot.rails]
+
+    def get_rail_catalog(self):
+        """Return the saved rails with their lengths, unit prices, and pack sizes."""
+        return self._snapshot.rails
 
     def add_panel_model(self):
         self.data["panel_models"].append({"name": "", "width": "", "height": ""})
@@ -76,11 +276,10 @@ class DataManager:
         self.data["panel_models"][index][key] = value
 
     def add_rail(self):
-        self.data["rails"].append("")
+        self.data["rails"].append({"length": "", "price": "", "pack_size": ""})
 
     def delete_rail(self, index):
         self.data["rails"].pop(index)
 
-    def update_rail(self, index, length):
-        self.data["rails"][index] = length
-
+    def update_rail(self, index, key, value):
+        self.data["rails"][index][key] = value
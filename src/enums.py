@@ -13,3 +13,14 @@ class MappedStringEnum(Enum):
 class RackingPattern(MappedStringEnum):
     CONTINUOUS = "Continuous"
     STAGGERED = "Staggered"
+
+
+class RailSelection(MappedStringEnum):
+    WASTE = "Min. Waste"
+    COST = "Min. Cost"
+    LEAST_WASTE = "Least Waste"
+
+
+class AllocationObjective(MappedStringEnum):
+    WASTE = "Min. Waste"
+    PURCHASES = "Min. Purchases"
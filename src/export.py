@@ -0,0 +1,283 @@
+import csv
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import TextIOWrapper
+from xml.sax.saxutils import escape
+from zipfile import ZIP_DEFLATED, ZipFile
+
+from anchors import get_anchor_positions
+from layout import stack_rows
+from rowset import ORIENTATIONS, as_rowset
+from units import format_length, to_inches
+
+# Exports run one at a time, off the UI thread
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="export")
+
+
+def export_results(path, row_data, user_inputs, equipment_data, rail_data, purchase_data, psf_data):
+    """Write the results of an array to a CSV, XLSX, DXF or PNG file, by the file's extension.
+
+    CSV and XLSX files hold the hardware totals and the rails, cutoffs and
+    deadload of every row; DXF files hold the panel layout, rails and
+    anchors in inches, and PNG files a drawing of them.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".dxf":
+        return write_dxf(path, layout_entities(row_data, user_inputs))
+    if extension == ".png":
+        from render import LayoutRenderer
+
+        return LayoutRenderer(row_data, user_inputs).save_png(path)
+
+    sheets = result_sheets(row_data, equipment_data, rail_data, purchase_data, psf_data)
+    export_sheets(path, sheets)
+
+
+def export_in_background(path, *results):
+    """Run ``export_results`` on the export thread and return its future."""
+    return _executor.submit(export_results, path, *results)
+
+
+def export_sheets(path, sheets):
+    """Write (title, header, rows) sheets to a CSV or XLSX file, by the file's extension.
+
+    Rows are written as they are produced, so ``sheets`` and their rows can
+    be generators over any number of arrays.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        write_csv(path, sheets)
+    elif extension == ".xlsx":
+        write_xlsx(path, sheets)
+    else:
+        raise ValueError(f'Cannot export to a "{extension}" file.')
+
+
+def result_sheets(row_data, equipment_data, rail_data, purchase_data, psf_data):
+    """Return the hardware and row sheets of an array's results."""
+    hardware_rows = [
+        ("Modules", equipment_data.num_modules),
+        ("Splices", equipment_data.num_splices),
+        ("Ends", equipment_data.num_ends),
+        ("Mids", equipment_data.num_mids),
+        ("Anchors", equipment_data.num_mounts),
+        ("Total Waste (in.)", to_inches(rail_data.total_waste)),
+        ("Rail Cost ($)", purchase_data.rail_cost),
+        ("Max Span Btwn Anchors (in.)", to_inches(equipment_data.span_btwn_anchors)),
+    ]
+    hardware_rows += [
+        (f"Rail {format_length(rail_length)}", count, purchase_data.num_packs[rail_length])
+        for rail_length, count in equipment_data.num_rails.items()
+    ]
+
+    row_set = as_rowset(row_data)
+    rows = (
+        (
+            i + 1,
+            num_panels,
+            ORIENTATIONS[orientation],
+            to_inches(length),
+            " | ".join(
+                f"{format_length(rail_length)}: {count}"
+                for rail_length, count in sorted(rails.items(), reverse=True)
+                if count != 0
+            ),
+            to_inches(waste // 2),
+            psf,
+        )
+        for i, (num_panels, orientation, length, rails, waste, psf) in enumerate(
+            zip(
+                row_set.num_panels,
+                row_set.orientations,
+                rail_data.row_lengths,
+                rail_data.all_rails,
+                rail_data.all_wastes,
+                psf_data,
+            )
+        )
+    )
+
+    return [
+        ("Hardware", ("Item", "Count", "Packs"), hardware_rows),
+        (
+            "Rows",
+            ("Row", "Panels", "Orientation", "Rail Length (in.)", "Rails", "Cutoff x 2 (in.)", "Deadload (psf)"),
+            rows,
+        ),
+    ]
+
+
+def write_csv(path, sheets):
+    """Write the sheets one after another, each under its title."""
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        for i, (title, header, rows) in enumerate(sheets):
+            if i > 0:
+                writer.writerow(())
+            writer.writerow((title,))
+            writer.writerow(header)
+            for row in rows:
+                writer.writerow(row)
+
+
+def write_xlsx(path, sheets):
+    """Write each sheet as a worksheet of a minimal XLSX workbook."""
+    titles = []
+    with ZipFile(path, "w", ZIP_DEFLATED) as workbook:
+        for title, header, rows in sheets:
+            titles.append(_sheet_title(title, titles))
+            with workbook.open(f"xl/worksheets/sheet{len(titles)}.xml", "w") as raw:
+                f = TextIOWrapper(raw, encoding="utf-8")
+                f.write(
+                    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                    "<sheetData>"
+                )
+                f.write(_xlsx_row(1, header))
+                for row_num, row in enumerate(rows, 2):
+                    f.write(_xlsx_row(row_num, row))
+                f.write("</sheetData></worksheet>")
+                f.flush()
+                f.detach()
+
+        # The package parts name every worksheet, so they are written last
+        sheet_ids = range(1, len(titles) + 1)
+        workbook.writestr(
+            "[Content_Types].xml",
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            + "".join(
+                f'<Override PartName="/xl/worksheets/sheet{i}.xml" '
+                'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+                for i in sheet_ids
+            )
+            + "</Types>",
+        )
+        workbook.writestr(
+            "_rels/.rels",
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+            'Target="xl/workbook.xml"/>'
+            "</Relationships>",
+        )
+        workbook.writestr(
+            "xl/workbook.xml",
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"><sheets>'
+            + "".join(
+                f'<sheet name="{escape(title, {chr(34): "&quot;"})}" sheetId="{i}" r:id="rId{i}"/>'
+                for i, title in zip(sheet_ids, titles)
+            )
+            + "</sheets></workbook>",
+        )
+        workbook.writestr(
+            "xl/_rels/workbook.xml.rels",
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            + "".join(
+                f'<Relationship Id="rId{i}" '
+                'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+                f'Target="worksheets/sheet{i}.xml"/>'
+                for i in sheet_ids
+            )
+            + "</Relationships>",
+        )
+
+
+def _xlsx_row(row_num, values):
+    cells = []
+    for column, value in enumerate(values):
+        ref = f"{_column_name(column)}{row_num}"
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            cells.append(f'<c r="{ref}"><v>{value}</v></c>')
+        else:
+            cells.append(f'<c r="{ref}" t="inlineStr"><is><t>{escape(str(value))}</t></is></c>')
+    return f'<row r="{row_num}">{"".join(cells)}</row>'
+
+
+def _column_name(column):
+    """Return the spreadsheet letters of a 0-based column, e.g. 27 -> 'AB'."""
+    name = ""
+    column += 1
+    while column:
+        column, remainder = divmod(column - 1, 26)
+        name = chr(65 + remainder) + name
+    return name
+
+
+def _sheet_title(title, used_titles):
+    """Return a unique worksheet name within Excel's 31 character limit."""
+    title = "".join(" " if char in "[]:*?/\\" else char for char in str(title))[:31] or "Sheet"
+    candidate, suffix = title, 2
+    while candidate in used_titles:
+        candidate = f"{title[:31 - len(str(suffix)) - 1]} {suffix}"
+        suffix += 1
+    return candidate
+
+
+def layout_entities(row_data, user_inputs, placements=None):
+    """Yield the panels, rails and anchors of the array as (entity, layer, points) DXF entities.
+
+    Rows are drawn at their ``placements`` from ``layout``, or stacked
+    under one another. Panels are closed polylines, rails open polylines and
+    anchors points, all in inches with y pointing up.
+    """
+    panel_spacing = user_inputs["panel_spacing"]
+    rail_protrusion = user_inputs["rail_protrusion"]
+    anchors = get_anchor_positions(row_data, user_inputs)
+    if placements is None:
+        placements = stack_rows(row_data, user_inputs)
+
+    for row_num, (x, y, num_panels, orientation) in enumerate(placements):
+        y = -y
+        if orientation == "Landscape":
+            panel_length, row_height = user_inputs["panel_height"], user_inputs["panel_width"]
+            rail_inset = user_inputs["l_rail_inset"]
+        else:
+            panel_length, row_height = user_inputs["panel_width"], user_inputs["panel_height"]
+            rail_inset = user_inputs["p_rail_inset"]
+        row_width = num_panels * panel_length + (num_panels - 1) * panel_spacing
+
+        for i in range(num_panels):
+            left = x + i * (panel_length + panel_spacing)
+            yield "POLYLINE", "PANELS", _inches(
+                ((left, y), (left + panel_length, y), (left + panel_length, y - row_height), (left, y - row_height))
+            )
+
+        rail_ys = (y - rail_inset, y - row_height + rail_inset)
+        for rail_y in rail_ys:
+            yield "POLYLINE", "RAILS", _inches(
+                ((x - rail_protrusion, rail_y), (x + row_width + rail_protrusion, rail_y))
+            )
+
+        for index in range(anchors["offsets"][row_num], anchors["offsets"][row_num + 1]):
+            yield "POINT", "ANCHORS", _inches(((x + anchors["x"][index], rail_ys[anchors["rail"][index]]),))
+
+
+def _inches(points):
+    return tuple((to_inches(x), to_inches(y)) for x, y in points)
+
+
+def write_dxf(path, entities):
+    """Write (entity, layer, points) polylines and points to an R12 DXF file."""
+    with open(path, "w") as f:
+        f.write("0\nSECTION\n2\nHEADER\n9\n$INSUNITS\n70\n1\n0\nENDSEC\n0\nSECTION\n2\nENTITIES\n")
+        for entity, layer, points in entities:
+            if entity == "POLYLINE":
+                # Panels are closed; rails are open lines
+                closed = 1 if len(points) > 2 else 0
+                f.write(f"0\nPOLYLINE\n8\n{layer}\n66\n1\n70\n{closed}\n10\n0.0\n20\n0.0\n30\n0.0\n")
+                for x, y in points:
+                    f.write(f"0\nVERTEX\n8\n{layer}\n10\n{x:.3f}\n20\n{y:.3f}\n30\n0.0\n")
+                f.write(f"0\nSEQEND\n8\n{layer}\n")
+            else:
+                (x, y), = points
+                f.write(f"0\nPOINT\n8\n{layer}\n10\n{x:.3f}\n20\n{y:.3f}\n30\n0.0\n")
+        f.write("0\nENDSEC\n0\nEOF\n")
@@ -0,0 +1,275 @@
+import argparse
+from math import inf
+from dataclasses import dataclass
+from importlib import import_module
+from random import Random
+from time import perf_counter
+from typing import Any, Tuple
+
+from enums import RackingPattern
+from rowset import ORIENTATIONS, as_rowset
+from units import LENGTH_SCALE, to_inches
+from utils import get_equipment_data, get_rail_length, optimal_rail_selection
+
+RAIL_STEP = LENGTH_SCALE // 8  # Catalog rail lengths come in eighths of an inch
+MIN_RAIL_LENGTH = 36 * LENGTH_SCALE
+MAX_RAIL_LENGTH = 240 * LENGTH_SCALE
+MAX_RAILS = 5  # Most rail lengths in a generated catalog
+MAX_ROWS = 6  # Most rows in a generated array
+
+
+@dataclass(frozen=True, slots=True)
+class Mismatch:
+    """A case on which a candidate engine disagrees with the reference, shrunk as far as it goes.
+
+    ``actual`` is the candidate's result, or the exception it raised.
+    """
+
+    case: Tuple
+    expected: Any
+    actual: Any
+    original_case: Tuple
+    num_cases: int  # Cases run up to and including the first mismatch
+
+
+def fuzz(reference, candidate, generate, shrink=None, num_cases=1000, seed=None, compare=None, valid=None):
+    """Run a candidate engine against the reference engine on random cases.
+
+    ``generate(rng)`` returns the arguments of a case as a tuple, and
+    ``shrink(case)`` yields simpler variants of a case to try. Results are
+    compared with ``compare(case, expected, actual)``, or for equality.
+    Cases the reference itself rejects, with ``ValueError`` or with a result
+    ``valid(case, expected)`` says is no answer, are skipped.
+
+    Returns the first ``Mismatch``, shrunk to a minimal case, or None if
+    every case agreed.
+    """
+    rng = Random(seed)
+    compare = compare or (lambda case, expected, actual: expected == actual)
+
+    def check(case):
+        """Return (expected, actual) if the engines disagree on the case, else None."""
+        try:
+            expected = reference(*case)
+        except ValueError:
+            return None
+        if valid is not None and not valid(case, expected):
+            return None
+        try:
+            actual = candidate(*case)
+        except Exception as e:
+            return expected, e
+        return None if compare(case, expected, actual) else (expected, actual)
+
+    for num_run in range(1, num_cases + 1):
+        case = generate(rng)
+        failure = check(case)
+        if failure is None:
+            continue
+
+        # Keep taking the first simpler case that still fails until none does
+        original_case = case
+        shrunk = True
+        while shrink is not None and shrunk:
+            shrunk = False
+            for smaller in shrink(case):
+                smaller_failure = check(smaller)
+                if smaller_failure is not None:
+                    case, failure, shrunk = smaller, smaller_failure, True
+                    break
+        return Mismatch(case, *failure, original_case, num_run)
+
+    return None
+
+
+def same_rails(case, expected, actual):
+    """Compare rail selections by the rails, splices and waste they order."""
+    return _rail_order(expected) == _rail_order(actual)
+
+
+def no_more_waste(case, expected, actual):
+    """Accept any rail selection that covers the run with no more waste than the reference."""
+    required_rail_length, available_rails = case
+    rail_counts, num_splices, total_waste, rail_combo = actual
+    return (
+        sum(rail_combo) >= required_rail_length
+        and all(length in available_rails for length in rail_combo)
+        and total_waste == 2 * (sum(rail_combo) - required_rail_length)
+        and rail_counts == {length: rail_combo.count(length) * 2 for length in available_rails}
+        and num_splices == 2 * max(len(rail_combo) - 1, 0)
+        and total_waste <= expected[2]
+    )
+
+
+def covers_run(case, selection):
+    """Tell whether a rail selection covers its run, which the reference can't with too few rail lengths."""
+    required_rail_length, _ = case
+    _, _, total_waste, rail_combo = selection
+    return total_waste != inf and sum(rail_combo) >= required_rail_length
+
+
+def _rail_order(selection):
+    rail_counts, num_splices, total_waste, rail_combo = selection
+    return rail_counts, num_splices, total_waste, sorted(rail_combo)
+
+
+def rail_case(rng):
+    """Return a random (required_rail_length, available_rails) case for a rail solver."""
+    # Whole inch catalogs make ties between combinations likely
+    step = rng.choice((RAIL_STEP, LENGTH_SCALE))
+    rails = sorted(
+        {rng.randrange(MIN_RAIL_LENGTH, MAX_RAIL_LENGTH, step) for _ in range(rng.randint(1, MAX_RAILS))}
+    )
+
+    # Runs landing on or near a rail total are where off-by-one errors show
+    if rng.random() < 0.5:
+        required_rail_length = sum(rng.choice(rails) for _ in range(rng.randint(1, 8))) + rng.randint(-2, 2)
+    else:
+        required_rail_length = rng.randint(1, 1500 * LENGTH_SCALE)
+    return max(required_rail_length, 1), rails
+
+
+def shrink_rail_case(case):
+    """Yield simpler rail cases: fewer rails, shorter runs and rounder rail lengths."""
+    required_rail_length, rails = case
+    for i in range(len(rails)):
+        if len(rails) > 1:
+            yield required_rail_length, rails[:i] + rails[i + 1:]
+    for shorter in (
+        required_rail_length - max(rails),
+        required_rail_length // 2,
+        required_rail_length // LENGTH_SCALE * LENGTH_SCALE,
+        required_rail_length - 1,
+    ):
+        if 0 < shorter < required_rail_length:
+            yield shorter, rails
+    for i, length in enumerate(rails):
+        for simpler in (length // (12 * LENGTH_SCALE) * 12 * LENGTH_SCALE, length // LENGTH_SCALE * LENGTH_SCALE):
+            if MIN_RAIL_LENGTH <= simpler < length and simpler not in rails:
+                yield required_rail_length, sorted(rails[:i] + [simpler] + rails[i + 1:])
+
+
+def equipment_case(rng):
+    """Return a random (row_data, rail_lengths, user_inputs) case for an equipment calculator."""
+    _, rail_lengths = rail_case(rng)
+    rafter_spacing = int(rng.choice((12, 16, 19.2, 24)) * LENGTH_SCALE)
+    user_inputs = {
+        "panel_width": rng.randrange(30 * LENGTH_SCALE, 50 * LENGTH_SCALE),
+        "panel_height": rng.randrange(55 * LENGTH_SCALE, 85 * LENGTH_SCALE),
+        "panel_spacing": rng.randrange(0, LENGTH_SCALE + 1, RAIL_STEP),
+        "rail_protrusion": rng.randrange(0, 6 * LENGTH_SCALE + 1, RAIL_STEP),
+        "max._rail_span_btwn_anchors": rafter_spacing * rng.randint(1, 4) + rng.randrange(0, rafter_spacing),
+        "min._anchor_spacing_interval": rafter_spacing,
+        "bracket_inset": rng.randrange(0, 12 * LENGTH_SCALE + 1, RAIL_STEP),
+        "anchor_pattern": rng.choice(list(RackingPattern)),
+    }
+    row_data = [(rng.randint(1, 30), rng.choice(ORIENTATIONS)) for _ in range(rng.randint(1, MAX_ROWS))]
+    return row_data, rail_lengths, user_inputs
+
+
+def shrink_equipment_case(case):
+    """Yield simpler equipment cases: fewer and shorter rows, fewer rails and rounder inputs."""
+    row_data, rail_lengths, user_inputs = case
+    for i in range(len(row_data)):
+        if len(row_data) > 1:
+            yield row_data[:i] + row_data[i + 1:], rail_lengths, user_inputs
+    for i, (num_panels, orientation) in enumerate(row_data):
+        for fewer in (1, num_panels // 2, num_panels - 1):
+            if 0 < fewer < num_panels:
+                yield row_data[:i] + [(fewer, orientation)] + row_data[i + 1:], rail_lengths, user_inputs
+        if orientation != ORIENTATIONS[0]:
+            yield row_data[:i] + [(num_panels, ORIENTATIONS[0])] + row_data[i + 1:], rail_lengths, user_inputs
+    for i in range(len(rail_lengths)):
+        if len(rail_lengths) > 1:
+            yield row_data, rail_lengths[:i] + rail_lengths[i + 1:], user_inputs
+
+    simpler_inputs = {
+        "panel_spacing": 0,
+        "rail_protrusion": 0,
+        "bracket_inset": 0,
+        "anchor_pattern": RackingPattern.CONTINUOUS,
+        "max._rail_span_btwn_anchors": user_inputs["min._anchor_spacing_interval"],
+    }
+    for name, value in user_inputs.items():
+        if isinstance(value, int):
+            simpler_inputs.setdefault(name, value // LENGTH_SCALE * LENGTH_SCALE or value)
+    for name, value in simpler_inputs.items():
+        if value != user_inputs[name]:
+            yield row_data, rail_lengths, {**user_inputs, name: value}
+
+
+def with_reference_rails(equipment_calculator):
+    """Wrap an equipment calculator to take its rails from the reference rail solver.
+
+    Both engines then get the same rail selections, so only their hardware
+    counts are compared.
+    """
+
+    def calculate(row_data, rail_lengths, user_inputs):
+        row_set = as_rowset(row_data)
+        rail_selections = [
+            optimal_rail_selection(get_rail_length(num_panels, orientation, user_inputs), rail_lengths)
+            for num_panels, orientation in zip(row_set.num_panels, row_set.orientations)
+        ]
+        return equipment_calculator(row_data, rail_lengths, user_inputs, rail_selections)
+
+    return calculate
+
+
+def fuzz_rails(candidate, num_cases=10000, seed=None, compare=same_rails):
+    """Check a rail solver against ``optimal_rail_selection``."""
+    return fuzz(
+        optimal_rail_selection, candidate, rail_case, shrink_rail_case, num_cases, seed, compare, covers_run
+    )
+
+
+def fuzz_equipment(candidate, num_cases=10000, seed=None):
+    """Check an equipment calculator against ``get_equipment_data``."""
+    return fuzz(
+        with_reference_rails(get_equipment_data),
+        with_reference_rails(candidate),
+        equipment_case,
+        shrink_equipment_case,
+        num_cases,
+        seed,
+    )
+
+
+def _describe(value):
+    """Format a case or result with lengths in inches where they are recognizable."""
+    if isinstance(value, Exception):
+        return f"{type(value).__name__}: {value}"
+    if isinstance(value, int) and not isinstance(value, bool) and abs(value) >= LENGTH_SCALE:
+        return f"{value} ({to_inches(value)} in.)"
+    return repr(value)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check an alternative engine against the reference engine.")
+    parser.add_argument("engine", choices=("rails", "equipment"))
+    parser.add_argument("candidate", help="the function to check, as module:function")
+    parser.add_argument("--cases", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument(
+        "--less-waste", action="store_true", help="accept rail selections with no more waste than the reference"
+    )
+    args = parser.parse_args()
+
+    module_name, function_name = args.candidate.split(":")
+    candidate = getattr(import_module(module_name), function_name)
+    start = perf_counter()
+    if args.engine == "rails":
+        mismatch = fuzz_rails(candidate, args.cases, args.seed, no_more_waste if args.less_waste else same_rails)
+    else:
+        mismatch = fuzz_equipment(candidate, args.cases, args.seed)
+    elapsed = perf_counter() - start
+
+    if mismatch is None:
+        print(f"{args.cases} cases agreed ({args.cases / elapsed:.0f} per second).")
+    else:
+        print(f"Mismatch after {mismatch.num_cases} cases, shrunk to:")
+        for value in mismatch.case:
+            print(f"  {_describe(value)}")
+        print(f"Expected: {_describe(mismatch.expected)}")
+        print(f"Actual:   {_describe(mismatch.actual)}")
+        raise SystemExit(1)
@@ -0,0 +1,178 @@
+from collections import Counter
+from functools import lru_cache
+from itertools import combinations_with_replacement
+
+from enums import AllocationObjective
+from results import RailCandidate
+from rowset import as_rowset
+from utils import get_main_rails, get_rail_length, optimal_rail_selection
+
+_NUM_CANDIDATES = 8  # Rail combinations considered for each row
+_MAX_REMAINDER_RAILS = 4  # Most rails finishing a row after its main rails
+
+
+@lru_cache(maxsize=8192)
+def get_rail_candidates(required_rail_length, available_rails):
+    """Return the rail combinations worth considering for a row as ``RailCandidate``s, least waste first.
+
+    The first candidate is always the ``optimal_rail_selection`` result. The
+    rest fill the row with each rail length in turn and finish it with the
+    least wasteful remainders of up to ``_MAX_REMAINDER_RAILS`` rails, so
+    rows can fall back on lengths that are in stock.
+    """
+    best_combo = tuple(sorted(optimal_rail_selection(required_rail_length, available_rails)[3]))
+    combos = {best_combo}
+
+    for main_rail_length in (None, *available_rails):
+        main_rails, remaining_length = get_main_rails(
+            required_rail_length, available_rails, main_rail_length
+        )
+        for i in range(1, min(len(available_rails), _MAX_REMAINDER_RAILS) + 1):
+            for combo in combinations_with_replacement(available_rails, i):
+                if sum(combo) >= remaining_length:
+                    combos.add(tuple(sorted(main_rails + list(combo))))
+
+    alternatives = sorted(combos - {best_combo}, key=lambda combo: (sum(combo), len(combo)))
+    return tuple(
+        RailCandidate(combo, (sum(combo) - required_rail_length) * 2)
+        for combo in [best_combo] + alternatives[: _NUM_CANDIDATES - 1]
+    )
+
+
+def allocate_rail_inventory(jobs, on_hand, rail_lengths, objective=AllocationObjective.WASTE):
+    """Allocate rails from shared stock across a batch of jobs.
+
+    ``jobs`` is a list of ``(job_id, row_data, user_inputs)`` tuples in
+    priority order and ``on_hand`` maps rail lengths (engine units) to the
+    quantity in stock. Every row starts with its ``optimal_rail_selection`` combination.
+    With the ``PURCHASES`` objective, rows then switch to other candidate
+    combinations while that reduces the rails to buy, taking the switch with
+    the least extra waste per rail saved. With ``WASTE`` the least wasteful
+    combinations are kept and any shortfall is bought.
+
+    Stock is handed out to jobs in order. Returns the per-job assignments,
+    the shortfall to purchase, and the stock left over.
+    """
+    available_rails = tuple(sorted(rail_lengths))
+    stock = {length: on_hand.get(length, 0) for length in available_rails}
+
+    # Rows needing the same rail length are interchangeable, so solve each length once
+    job_lengths = [
+        (
+            job_id,
+            [
+                get_rail_length(num_panels, orientation, user_inputs)
+                for num_panels, orientation in zip(rows.num_panels, rows.orientations)
+            ],
+        )
+        for job_id, row_data, user_inputs in jobs
+        for rows in [as_rowset(row_data)]
+    ]
+    groups = Counter(length for _, lengths in job_lengths for length in lengths)
+    candidates = {length: get_rail_candidates(length, available_rails) for length in groups}
+
+    # Number of rows of each length using each candidate, starting from the least waste
+    usage = {length: Counter({0: count}) for length, count in groups.items()}
+    demand = Counter()
+    for length, count in groups.items():
+        for rail_length in candidates[length][0].rail_combo:
+            demand[rail_length] += 2 * count
+
+    if objective == AllocationObjective.PURCHASES:
+        _reduce_purchases(candidates, usage, demand, stock)
+
+    # Hand the chosen combinations out to rows, then stock out to jobs in priority order
+    assignments = {}
+    shortfall = Counter()
+    remaining_stock = dict(stock)
+    total_waste = 0
+    for job_id, lengths in job_lengths:
+        rows = []
+        needed = Counter()
+        for length in lengths:
+            index = min(usage[length])
+            usage[length][index] -= 1
+            if usage[length][index] == 0:
+                del usage[length][index]
+
+            candidate = candidates[length][index]
+            rail_combo = list(candidate.rail_combo)
+            rail_counts = {rail_length: rail_combo.count(rail_length) * 2 for rail_length in available_rails}
+            num_splices = 0 if len(rail_combo) < 2 else (len(rail_combo) - 1) * 2
+            waste = candidate.total_waste
+            rows.append((rail_counts, num_splices, waste, rail_combo))
+            needed.update(rail_counts)
+            total_waste += waste
+
+        from_stock = {}
+        to_purchase = {}
+        for rail_length in available_rails:
+            from_stock[rail_length] = min(needed[rail_length], remaining_stock[rail_length])
+            to_purchase[rail_length] = needed[rail_length] - from_stock[rail_length]
+            remaining_stock[rail_length] -= from_stock[rail_length]
+            shortfall[rail_length] += to_purchase[rail_length]
+
+        assignments[job_id] = {
+            "rows": rows,
+            "from_stock": from_stock,
+            "to_purchase": to_purchase,
+        }
+
+    allocation = {
+        "assignments": assignments,
+        "shortfall": {length: shortfall[length] for length in available_rails},
+        "remaining_stock": remaining_stock,
+        "total_waste": total_waste,
+    }
+    return allocation
+
+
+def _reduce_purchases(candidates, usage, demand, stock):
+    """Switch rows between candidate combinations while that lowers the rails to buy."""
+
+    def rail_change(source, target):
+        change = Counter()
+        for rail_length in target.rail_combo:
+            change[rail_length] += 2
+        for rail_length in source.rail_combo:
+            change[rail_length] -= 2
+        return change
+
+    def rails_saved(change):
+        saved = 0
+        for rail_length, count in change.items():
+            before = demand[rail_length] - stock[rail_length]
+            saved += max(0, before) - max(0, before + count)
+        return saved
+
+    while True:
+        best_move = None
+        best_score = None
+        for length, counts in usage.items():
+            options = candidates[length]
+            for source in counts:
+                for target in range(len(options)):
+                    if target == source:
+                        continue
+                    saved = rails_saved(rail_change(options[source], options[target]))
+                    if saved <= 0:
+                        continue
+
+                    # Extra waste per rail saved, lowest first
+                    score = (options[target].total_waste - options[source].total_waste) / saved
+                    if best_score is None or score < best_score:
+                        best_move = (length, source, target)
+                        best_score = score
+
+        if best_move is None:
+            return
+
+        # Repeat the move for as many rows as it keeps saving rails
+        length, source, target = best_move
+        change = rail_change(candidates[length][source], candidates[length][target])
+        while usage[length][source] > 0 and rails_saved(change) > 0:
+            usage[length][source] -= 1
+            usage[length][target] += 1
+            demand.update(change)
+        if usage[length][source] == 0:
+            del usage[length][source]
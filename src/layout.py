@@ -0,0 +1,191 @@
+from rowset import ORIENTATIONS
+from units import LENGTH_SCALE
+from utils import get_equipment_data
+
+
+def generate_layout(
+    roof_width,
+    roof_height,
+    user_inputs,
+    rail_lengths,
+    setbacks=0,
+    obstructions=(),
+    clearance=0,
+    row_spacing=None,
+    step=LENGTH_SCALE,
+):
+    """Lay out rows of panels on a rectangular roof plane.
+
+    Coordinates are engine lengths from the top left corner of the plane.
+    ``setbacks`` is one distance for every edge or a ``(top, right, bottom,
+    left)`` tuple, and ``obstructions`` are ``(x, y, width, height)``
+    rectangles kept ``clearance`` away from panels and rails. Rows are
+    ``row_spacing`` apart (the panel spacing by default), and space left
+    empty between them is skipped ``step`` at a time (an inch by default).
+
+    Every row position is tried in portrait, in landscape, or left empty,
+    keeping the layout with the most modules, then the fewest rails, then the
+    fewest anchors, as counted by ``get_equipment_data``. A row is split into
+    separate runs wherever an obstruction crosses it.
+    """
+    if isinstance(setbacks, int):
+        setbacks = (setbacks,) * 4
+    top, right, bottom, left = setbacks
+    if row_spacing is None:
+        row_spacing = user_inputs["panel_spacing"]
+
+    floor = roof_height - bottom  # Lowest edge a row may reach
+    if floor < top or roof_width - right - left <= 0:
+        raise ValueError("The setbacks leave no room for panels on the roof plane.")
+
+    # Each row starts exactly one row and row spacing below the row above it, and empty
+    # space is skipped a step at a time, so the rows that fit are found at every y reached
+    rows = {}  # Rows that fit at each reachable y, by orientation
+    scores = {}  # Row scores by orientation and panels per run, shared by rows at every y
+    pending = [top]
+    while pending:
+        y = pending.pop()
+        if y in rows or y > floor:
+            continue
+        rows[y] = {}
+        pending.append(_next_step(y, top, step))
+        for orientation in ORIENTATIONS:
+            row = _place_row(
+                y,
+                orientation,
+                roof_width,
+                roof_height,
+                setbacks,
+                obstructions,
+                clearance,
+                user_inputs,
+                rail_lengths,
+                scores,
+            )
+            if row is not None:
+                rows[y][orientation] = row
+                pending.append(y + row["height"] + row_spacing)
+
+    # Best (score, row, next y) from each y to the bottom of the plane, filled bottom up.
+    # Scores are (modules, -rails, -anchors) so that larger is better.
+    best = {}
+    for y in sorted(rows, reverse=True):
+        next_y = _next_step(y, top, step)
+        options = [(best[next_y][0] if next_y in best else (0, 0, 0), None, next_y)]  # Leave this y empty
+
+        for orientation, row in rows[y].items():
+            next_y = y + row["height"] + row_spacing
+            below = best[next_y][0] if next_y in best else (0, 0, 0)
+            score = tuple(a + b for a, b in zip(row["score"], below))
+            options.append((score, (orientation, row), next_y))
+
+        best[y] = max(options, key=lambda option: option[0])
+
+    # Walk the chosen rows from the top
+    row_data = []
+    placements = []
+    y = top
+    while y in best:
+        _, choice, next_y = best[y]
+        if choice is not None:
+            orientation, row = choice
+            for x, num_panels in row["segments"]:
+                row_data.append((num_panels, orientation))
+                placements.append((x, row["y"], num_panels, orientation))
+        y = next_y
+
+    num_modules, rails, anchors = best[top][0]
+    layout = {
+        "row_data": row_data,
+        "placements": placements,
+        "num_modules": num_modules,
+        "num_rails": -rails,
+        "num_mounts": -anchors,
+    }
+    return layout
+
+
+def stack_rows(row_data, user_inputs, row_spacing=None):
+    """Place the rows under one another, in order, like the preview shows them.
+
+    Returns ``(x, y, num_panels, orientation)`` placements in the form of
+    ``generate_layout``'s, with every row's rails starting at x = 0.
+    """
+    from rowset import as_rowset
+
+    if row_spacing is None:
+        row_spacing = user_inputs["panel_spacing"]
+
+    placements = []
+    y = 0
+    for num_panels, orientation in as_rowset(row_data):
+        placements.append((user_inputs["rail_protrusion"], y, num_panels, orientation))
+        y += (user_inputs["panel_height"] if orientation == "Portrait" else user_inputs["panel_width"]) + row_spacing
+    return placements
+
+
+def _next_step(y, top, step):
+    """Return the first multiple of ``step`` below the top setback that is past ``y``."""
+    return top + ((y - top) // step + 1) * step
+
+
+def _place_row(
+    y, orientation, roof_width, roof_height, setbacks, obstructions, clearance, user_inputs, rail_lengths, scores
+):
+    """Fill a row at height ``y`` with as many panels as fit around the obstructions.
+
+    Scores are looked up in, and added to, ``scores``.
+    """
+    top, right, bottom, left = setbacks
+    panel_spacing = user_inputs["panel_spacing"]
+    rail_protrusion = user_inputs["rail_protrusion"]
+
+    if orientation == "Landscape":
+        panel_length, row_height = user_inputs["panel_height"], user_inputs["panel_width"]
+    else:
+        panel_length, row_height = user_inputs["panel_width"], user_inputs["panel_height"]
+    if y + row_height > roof_height - bottom:
+        return None
+
+    # Free stretches of the row between obstructions crossing its height
+    blocked = sorted(
+        (x - clearance, x + width + clearance)
+        for x, obstruction_y, width, height in obstructions
+        if obstruction_y - clearance < y + row_height and obstruction_y + height + clearance > y
+    )
+    free = []
+    start = left
+    for blocked_start, blocked_end in blocked:
+        if blocked_start > start:
+            free.append((start, min(blocked_start, roof_width - right)))
+        start = max(start, blocked_end)
+    if start < roof_width - right:
+        free.append((start, roof_width - right))
+
+    # Rails protrude past the panels at both ends of each run
+    segments = []
+    for free_start, free_end in free:
+        run_length = free_end - free_start - 2 * rail_protrusion
+        num_panels = int((run_length + panel_spacing) // (panel_length + panel_spacing))
+        if num_panels > 0:
+            segments.append((free_start + rail_protrusion, num_panels))
+    if not segments:
+        return None
+
+    key = (orientation, tuple(num_panels for _, num_panels in segments))
+    if key not in scores:
+        equipment = get_equipment_data(
+            [(num_panels, orientation) for _, num_panels in segments], rail_lengths, user_inputs
+        )
+        scores[key] = (
+            equipment.num_modules,
+            -sum(equipment.num_rails.values()),
+            -equipment.num_mounts,
+        )
+    row = {
+        "y": y,
+        "height": row_height,
+        "segments": segments,
+        "score": scores[key],
+    }
+    return row
@@ -0,0 +1,193 @@
+from array import array
+
+from anchors import get_anchor_positions
+from rowset import LANDSCAPE, as_rowset
+from units import LENGTH_SCALE
+from utils import TRUSS_BUFFER
+
+
+def get_anchor_loads(row_data, user_inputs):
+    """Calculate the deadload carried by every anchor in the array.
+
+    Each row's panel weight is split evenly between its two rails and
+    spread along them over the panels, not the gaps between them. An anchor
+    carries the weight between the midpoints to its neighbours on the same
+    rail, and the end anchors carry the rest of the rail. Its psf is that
+    load over the area of the same stretch of the row, as deep as the
+    footprint ``get_psf_data`` uses (between the rails, padded when
+    ``truss_structure`` is set). The end anchors' stretches reach the rail
+    ends or the padded footprint, whichever is further out.
+
+    Returns the columns of ``get_anchor_positions`` plus ``load`` (lbs) and
+    ``psf`` per anchor, and ``row_max`` and ``row_mean`` loads per row.
+    Identical rows are only worked out once.
+    """
+    row_set = as_rowset(row_data)
+    anchors = get_anchor_positions(row_set, user_inputs)
+    unique_rows, _, inverse = row_set.group()
+    unique_anchors = get_anchor_positions(unique_rows, user_inputs)
+
+    unique_loads = []
+    for row_num, (num_panels, orientation) in enumerate(zip(unique_rows.num_panels, unique_rows.orientations)):
+        start, end = unique_anchors["offsets"][row_num], unique_anchors["offsets"][row_num + 1]
+        unique_loads.append(
+            _row_loads(
+                num_panels,
+                orientation,
+                unique_anchors["rail"][start:end],
+                unique_anchors["x"][start:end],
+                user_inputs,
+            )
+        )
+
+    loads = array("d")
+    psfs = array("d")
+    row_max = array("d")
+    row_mean = array("d")
+    for index in inverse:
+        row_loads, row_psfs = unique_loads[index]
+        loads.extend(row_loads)
+        psfs.extend(row_psfs)
+        row_max.append(max(row_loads))
+        row_mean.append(sum(row_loads) / len(row_loads))
+
+    anchors.update({"load": loads, "psf": psfs, "row_max": row_max, "row_mean": row_mean})
+    return anchors
+
+
+def _row_loads(num_panels, orientation, rails, xs, user_inputs):
+    """Return the load and psf of each of a row's anchors, in the order given."""
+    panel_spacing = user_inputs["panel_spacing"]
+    bracket_inset = user_inputs["bracket_inset"]
+    if orientation == LANDSCAPE:
+        panel_length, panel_depth = user_inputs["panel_height"], user_inputs["panel_width"]
+        rail_inset = user_inputs["l_rail_inset"]
+    else:
+        panel_length, panel_depth = user_inputs["panel_width"], user_inputs["panel_height"]
+        rail_inset = user_inputs["p_rail_inset"]
+    row_width = num_panels * panel_length + (num_panels - 1) * panel_spacing
+    pitch = panel_length + panel_spacing
+
+    pad = TRUSS_BUFFER // 2 if user_inputs["truss_structure"] else 0
+    footprint_start, footprint_end = bracket_inset - pad, row_width - bracket_inset + pad
+    rail_depth = (panel_depth - 2 * rail_inset) / 2 + pad  # Each rail's half of the footprint
+
+    # The end anchors take the rail and footprint out to the far end of either
+    span_start, span_end = min(0, footprint_start), max(row_width, footprint_end)
+
+    # Weight per unit of panel length on each rail
+    weight_per_length = user_inputs["panel_weight"] / (2 * panel_length)
+
+    def panel_length_before(x):
+        """Length of panel, rather than gap, between the row's left edge and x."""
+        x = min(max(x, 0), row_width)
+        num_whole, remainder = divmod(x, pitch)
+        return num_whole * panel_length + min(remainder, panel_length)
+
+    loads = array("d", [0.0]) * len(xs)
+    psfs = array("d", [0.0]) * len(xs)
+    for rail in (0, 1):
+        indices = sorted((i for i in range(len(xs)) if rails[i] == rail), key=lambda i: xs[i])
+        for position, i in enumerate(indices):
+            first, last = position == 0, position == len(indices) - 1
+            start = span_start if first else min(max((xs[indices[position - 1]] + xs[i]) / 2, span_start), span_end)
+            end = span_end if last else min(max((xs[i] + xs[indices[position + 1]]) / 2, span_start), span_end)
+
+            # Load and area are taken over the same stretch of the row
+            load = weight_per_length * (panel_length_before(end) - panel_length_before(start))
+            area = (end - start) * rail_depth
+
+            loads[i] = load
+            psfs[i] = round(load / area * 144 * LENGTH_SCALE**2, 2) if area > 0 else 0.0
+
+    return loads, psfs
+
+
+def get_array_psf(row_data, user_inputs, placements=None):
+    """Calculate the deadload of the whole array over the union of its row footprints.
+
+    Rows are placed at their ``placements`` from ``layout``, or stacked
+    under one another. Each footprint is the one ``get_psf_data`` uses for
+    its row, padded when ``truss_structure`` is set, but padded areas shared
+    by neighbouring rows are counted once, so the result is the psf of the
+    array as a whole rather than of isolated rows.
+    """
+    from layout import stack_rows
+
+    if placements is None:
+        placements = stack_rows(row_data, user_inputs)
+    panel_spacing = user_inputs["panel_spacing"]
+    bracket_inset = user_inputs["bracket_inset"]
+    pad = TRUSS_BUFFER // 2 if user_inputs["truss_structure"] else 0
+
+    footprints = []
+    num_panels_total = 0
+    for x, y, num_panels, orientation in placements:
+        if orientation == "Landscape":
+            panel_length, panel_depth = user_inputs["panel_height"], user_inputs["panel_width"]
+            rail_inset = user_inputs["l_rail_inset"]
+        else:
+            panel_length, panel_depth = user_inputs["panel_width"], user_inputs["panel_height"]
+            rail_inset = user_inputs["p_rail_inset"]
+        row_width = num_panels * panel_length + (num_panels - 1) * panel_spacing
+        footprints.append(
+            (
+                x + bracket_inset - pad,
+                y + rail_inset - pad,
+                x + row_width - bracket_inset + pad,
+                y + panel_depth - rail_inset + pad,
+            )
+        )
+        num_panels_total += num_panels
+
+    area = union_area(footprints)
+    if area <= 0:
+        return 0.0
+    return round(num_panels_total * user_inputs["panel_weight"] / area * 144 * LENGTH_SCALE**2, 2)
+
+
+def union_area(rectangles):
+    """Return the area covered by (x0, y0, x1, y1) rectangles, counting overlaps once.
+
+    A line sweeps across x while a segment tree over the distinct y
+    coordinates tracks the covered height, in O(n log n).
+    """
+    rectangles = [(x0, y0, x1, y1) for x0, y0, x1, y1 in rectangles if x0 < x1 and y0 < y1]
+    if not rectangles:
+        return 0
+    ys = sorted({y for _, y0, _, y1 in rectangles for y in (y0, y1)})
+    y_index = {y: i for i, y in enumerate(ys)}
+    events = sorted(
+        event
+        for x0, y0, x1, y1 in rectangles
+        for event in ((x0, 1, y_index[y0], y_index[y1]), (x1, -1, y_index[y0], y_index[y1]))
+    )
+
+    # Node n covers the y intervals [lo, hi); count is how many rectangles span it whole
+    size = len(ys) - 1
+    count = [0] * (4 * size)
+    covered = [0] * (4 * size)
+
+    def update(node, lo, hi, start, end, delta):
+        if end <= lo or hi <= start:
+            return
+        if start <= lo and hi <= end:
+            count[node] += delta
+        else:
+            mid = (lo + hi) // 2
+            update(2 * node, lo, mid, start, end, delta)
+            update(2 * node + 1, mid, hi, start, end, delta)
+        if count[node]:
+            covered[node] = ys[hi] - ys[lo]
+        elif hi - lo == 1:
+            covered[node] = 0
+        else:
+            covered[node] = covered[2 * node] + covered[2 * node + 1]
+
+    area = 0
+    previous_x = events[0][0]
+    for x, delta, start, end in events:
+        area += covered[1] * (x - previous_x)
+        previous_x = x
+        update(1, 0, size, start, end, delta)
+    return area
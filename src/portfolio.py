@@ -0,0 +1,140 @@
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from enums import RailSelection
+from rowset import as_rowset
+from utils import anytime_rail_selection, cost_optimal_rail_selection, get_rail_length, optimal_rail_selection
+
+
+def optimize_rail_portfolio(
+    projects, candidate_lengths, k, objective=RailSelection.WASTE, prices=None, max_workers=None
+):
+    """Find the set of ``k`` stock rail lengths that best fits a corpus of past projects.
+
+    ``projects`` is a list of ``(row_data, user_inputs)`` tuples. With the
+    ``WASTE`` objective every row is solved with ``optimal_rail_selection``,
+    exactly as the app does. With ``COST`` rows are solved for the lowest
+    price using ``prices``, which maps each candidate length to its unit price.
+
+    The sets are searched by branch and bound: a branch is dropped when even
+    every remaining candidate added to it could not beat the best set so far.
+    Each top-level branch runs in its own process. Returns the best rail
+    lengths with their total waste or cost, and how many sets were evaluated
+    and pruned.
+    """
+    candidates = tuple(sorted(set(candidate_lengths)))
+    if not 0 < k <= len(candidates):
+        raise ValueError(f"The number of rail lengths must be between 1 and {len(candidates)}.")
+    if objective == RailSelection.COST and (
+        prices is None or any(length not in prices for length in candidates)
+    ):
+        raise ValueError("A price is needed for every candidate rail length.")
+
+    # Identical rows across projects only need solving once
+    rows = tuple(
+        Counter(
+            get_rail_length(num_panels, orientation, user_inputs)
+            for row_data, user_inputs in projects
+            for rows in [as_rowset(row_data)]
+            for num_panels, orientation in zip(rows.num_panels, rows.orientations)
+        ).items()
+    )
+    prices = tuple(sorted(prices.items())) if prices else ()
+
+    # A quick greedy set gives every branch a bound to prune against from the start
+    incumbent = ()
+    for _ in range(k):
+        incumbent = min(
+            (tuple(sorted(incumbent + (length,))) for length in candidates if length not in incumbent),
+            key=lambda rail_set: _score_rail_set(rows, rail_set, objective, prices),
+        )
+    best_score = _score_rail_set(rows, incumbent, objective, prices)
+
+    tasks = [
+        (rows, candidates, k, objective, prices, first, best_score)
+        for first in range(len(candidates) - k + 1)
+    ]
+    with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+        results = list(executor.map(_search_branch, tasks))
+
+    best_set = incumbent
+    num_evaluated = k * len(candidates)
+    num_pruned = 0
+    for score, rail_set, evaluated, pruned in results:
+        num_evaluated += evaluated
+        num_pruned += pruned
+        if rail_set is not None and (score, rail_set) < (best_score, best_set):
+            best_score, best_set = score, rail_set
+
+    portfolio = {
+        "rail_lengths": best_set,
+        "total": round(best_score, 2),
+        "num_evaluated": num_evaluated,
+        "num_pruned": num_pruned,
+    }
+    return portfolio
+
+
+def _search_branch(task):
+    """Search every rail set whose shortest candidate is ``candidates[first]``."""
+    rows, candidates, k, objective, prices, first, best_score = task
+    best_set = None
+    num_evaluated = 0
+    num_pruned = 0
+
+    def visit(chosen, start):
+        nonlocal best_score, best_set, num_evaluated, num_pruned
+
+        if len(chosen) == k:
+            num_evaluated += 1
+            score = _score_rail_set(rows, chosen, objective, prices, best_score)
+            if score < best_score:
+                best_score, best_set = score, chosen
+            return
+
+        # Adding every remaining candidate is the best any completion of this branch can do
+        if _lower_bound(rows, chosen + candidates[start:], objective, prices) >= best_score:
+            num_pruned += 1
+            return
+
+        for i in range(start, len(candidates) - (k - len(chosen)) + 1):
+            visit(chosen + (candidates[i],), i + 1)
+
+    visit((candidates[first],), first + 1)
+    return best_score, best_set, num_evaluated, num_pruned
+
+
+def _score_rail_set(rows, rail_set, objective, prices, cutoff=float("inf")):
+    """Total waste or cost of a rail set over the rows, stopping early past ``cutoff``."""
+    total = 0.0
+    for required_length, count in rows:
+        total += count * _score_row(required_length, rail_set, objective, prices)
+        if total >= cutoff:
+            break
+    return total
+
+
+def _lower_bound(rows, rail_set, objective, prices):
+    """A total over the rows that no subset of the rail set can beat."""
+    if objective == RailSelection.COST:
+        # Rails covering a row are at least as long as it, and cost at least its length at the cheapest price per inch
+        unit_prices = dict(prices)
+        cheapest = min(unit_prices[length] / length for length in rail_set)
+        return sum(count * 2 * cheapest * required_length for required_length, count in rows)
+
+    # Without a deadline the residue search proves the least waste of each row
+    return sum(
+        count * anytime_rail_selection(required_length, rail_set).lower_bound for required_length, count in rows
+    )
+
+
+def _score_row(required_length, rail_set, objective, prices):
+    """Waste or cost of one row."""
+    if objective == RailSelection.COST:
+        unit_prices = dict(prices)
+        catalog = [{"length": length, "price": unit_prices[length]} for length in rail_set]
+        rail_combo = cost_optimal_rail_selection(required_length, catalog)[3]
+        return 2 * sum(unit_prices[length] for length in rail_combo)
+
+    return optimal_rail_selection(required_length, list(rail_set))[2]
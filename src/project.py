@@ -0,0 +1,134 @@
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Mapping
+
+from results import EquipmentResult, PlaneResult, ProjectResult, RailResult
+from rowset import RowSet, as_rowset
+from utils import get_equipment_data, get_psf_data, get_purchase_data, get_rail_selections, get_row_data
+
+PARALLEL_ROWS = 500  # Fewest rows to solve that are worth sending to worker processes
+
+
+@dataclass(frozen=True, slots=True)
+class RoofPlane:
+    """One roof plane of a project, with its own inputs (as from ``process_fields``) and rows."""
+
+    name: str
+    user_inputs: Mapping
+    row_data: RowSet
+
+    @classmethod
+    def create(cls, name, user_inputs, row_data):
+        return cls(name, dict(user_inputs), as_rowset(row_data))
+
+    def key(self):
+        """Return what the plane's results depend on; renaming a plane doesn't change it."""
+        return (
+            tuple(sorted(self.user_inputs.items())),
+            self.row_data.num_panels.tobytes(),
+            self.row_data.orientations.tobytes(),
+        )
+
+
+class Project:
+    """Roof planes calculated together into one bill of materials.
+
+    Results are kept per plane, so recalculating after a change only
+    solves the planes whose inputs or rows changed. Large changes are
+    solved on a pool of worker processes that lives until ``close``, so
+    its workers and their solver caches carry over between calculations.
+    """
+
+    def __init__(self, planes=(), max_workers=None):
+        self.planes = list(planes)
+        self.max_workers = max_workers or os.cpu_count()
+        self._executor = None
+        self._catalog = None
+        self._results = {}  # Plane results by plane key
+
+    def calculate(self, rail_catalog):
+        """Calculate every plane and merge them into a ``ProjectResult``.
+
+        Each plane's rails are selected on their own; rails are rounded up
+        to whole packs for the project as a whole. Several planes with at
+        least ``PARALLEL_ROWS`` rows between them are solved in parallel.
+        """
+        if not self.planes:
+            raise ValueError("A project needs at least one roof plane.")
+        if rail_catalog != self._catalog:
+            self._catalog = [dict(rail) for rail in rail_catalog]
+            self._results.clear()
+
+        keys = [plane.key() for plane in self.planes]
+        pending = {key: plane for key, plane in zip(keys, self.planes) if key not in self._results}
+        if len(pending) > 1 and sum(len(plane.row_data) for plane in pending.values()) >= PARALLEL_ROWS:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            solved = self._executor.map(_calculate_plane, pending.values(), [self._catalog] * len(pending))
+            self._results.update(zip(pending, solved))
+        else:
+            for key, plane in pending.items():
+                self._results[key] = _calculate_plane(plane, self._catalog)
+
+        # Drop the results of planes that are gone
+        for key in set(self._results) - set(keys):
+            del self._results[key]
+
+        planes = tuple(
+            PlaneResult(plane.name, *self._results[key]) for plane, key in zip(self.planes, keys)
+        )
+        return merge_planes(planes, self._catalog)
+
+    def close(self):
+        """Shut down the worker processes, if any were started."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def merge_planes(planes, rail_catalog):
+    """Combine plane results into one project result."""
+    num_rails = Counter({rail["length"]: 0 for rail in rail_catalog})
+    for plane in planes:
+        num_rails.update(plane.equipment.num_rails)
+
+    equipment = EquipmentResult(
+        num_modules=sum(plane.equipment.num_modules for plane in planes),
+        num_rails=dict(num_rails),
+        num_mounts=sum(plane.equipment.num_mounts for plane in planes),
+        num_mids=sum(plane.equipment.num_mids for plane in planes),
+        num_ends=sum(plane.equipment.num_ends for plane in planes),
+        num_splices=sum(plane.equipment.num_splices for plane in planes),
+        span_btwn_anchors=max(plane.equipment.span_btwn_anchors for plane in planes),
+    )
+    rails = RailResult(
+        row_lengths=tuple(length for plane in planes for length in plane.rails.row_lengths),
+        all_rails=tuple(rails for plane in planes for rails in plane.rails.all_rails),
+        all_wastes=tuple(waste for plane in planes for waste in plane.rails.all_wastes),
+    )
+    return ProjectResult(
+        planes=planes,
+        equipment=equipment,
+        rails=rails,
+        purchase=get_purchase_data(equipment.num_rails, rail_catalog),
+        psf=tuple(psf for plane in planes for psf in plane.psf),
+    )
+
+
+def _calculate_plane(plane, rail_catalog):
+    """Return the equipment, rails and deadloads of one plane."""
+    rail_lengths = [rail["length"] for rail in rail_catalog]
+    rail_selections = get_rail_selections(plane.row_data, rail_catalog, plane.user_inputs)
+    return (
+        get_equipment_data(plane.row_data, rail_lengths, plane.user_inputs, rail_selections),
+        get_row_data(plane.row_data, rail_lengths, plane.user_inputs, rail_selections),
+        tuple(get_psf_data(plane.row_data, plane.user_inputs)),
+    )
@@ -0,0 +1,237 @@
+import struct
+import zlib
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from hashlib import blake2b
+from math import ceil, floor
+from threading import Lock
+
+from anchors import get_anchor_positions
+from layout import stack_rows
+from units import LENGTH_SCALE
+
+TILE_SIZE = 256  # Pixels along each side of a tile
+MAX_TILES = 1024  # Tiles kept in the cache, across layouts
+ROW_DETAIL = 3  # Narrowest panel, in pixels, drawn on its own rather than as part of its row
+ANCHOR_DETAIL = 12  # Narrowest panel, in pixels, at which anchors are drawn
+
+BACKGROUND = bytes((255, 255, 255))
+PANEL = bytes((40, 60, 90))
+PANEL_EDGE = bytes((10, 15, 25))
+RAIL = bytes((170, 170, 170))
+ANCHOR = bytes((220, 40, 40))
+
+_tile_cache = OrderedDict()
+_tile_lock = Lock()
+
+
+class Image:
+    """An RGB image held as rows of bytes."""
+
+    __slots__ = ("width", "height", "pixels")
+
+    def __init__(self, width, height, color=BACKGROUND):
+        self.width = width
+        self.height = height
+        self.pixels = bytearray(color * (width * height))
+
+    def fill(self, x0, y0, x1, y1, color):
+        """Fill the rectangle [x0, x1) x [y0, y1), clipped to the image."""
+        x0, y0 = max(x0, 0), max(y0, 0)
+        x1, y1 = min(x1, self.width), min(y1, self.height)
+        if x0 >= x1 or y0 >= y1:
+            return
+        line = color * (x1 - x0)
+        stride = self.width * 3
+        for offset in range(y0 * stride + x0 * 3, y1 * stride, stride):
+            self.pixels[offset:offset + len(line)] = line
+
+    def paste(self, image, x, y):
+        """Copy another image onto this one with its top left corner at (x, y)."""
+        x0, x1 = max(x, 0), min(x + image.width, self.width)
+        if x0 >= x1:
+            return
+        stride, source_stride = self.width * 3, image.width * 3
+        for row in range(max(y, 0), min(y + image.height, self.height)):
+            source = (row - y) * source_stride + (x0 - x) * 3
+            self.pixels[row * stride + x0 * 3:row * stride + x1 * 3] = image.pixels[source:source + (x1 - x0) * 3]
+
+    def to_png(self):
+        """Encode the image as PNG."""
+        stride = self.width * 3
+        raw = b"".join(
+            b"\x00" + self.pixels[offset:offset + stride] for offset in range(0, stride * self.height, stride)
+        )
+        return b"".join(
+            (
+                b"\x89PNG\r\n\x1a\n",
+                _png_chunk(b"IHDR", struct.pack(">IIBBBBB", self.width, self.height, 8, 2, 0, 0, 0)),
+                _png_chunk(b"IDAT", zlib.compress(raw, 6)),
+                _png_chunk(b"IEND", b""),
+            )
+        )
+
+
+def _png_chunk(kind, data):
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+class LayoutRenderer:
+    """Draws an array's panels, rails and anchors to images at any zoom.
+
+    At zoom 0 one pixel is one inch, and every zoom level doubles that.
+    Rows are drawn at their ``placements`` from ``layout``, or stacked under
+    one another. When panels get narrower than ``ROW_DETAIL`` pixels each
+    row is drawn as a single rectangle, and anchors are left out below
+    ``ANCHOR_DETAIL`` pixels.
+    """
+
+    def __init__(self, row_data, user_inputs, placements=None):
+        if placements is None:
+            placements = stack_rows(row_data, user_inputs)
+        anchors = get_anchor_positions(row_data, user_inputs)
+        panel_spacing = user_inputs["panel_spacing"]
+        rail_protrusion = user_inputs["rail_protrusion"]
+
+        # (top, bottom, left, panel length, pitch, num_panels, rail ys, anchor xs per rail), by top
+        self.rows = []
+        for row_num, (x, y, num_panels, orientation) in enumerate(placements):
+            if orientation == "Landscape":
+                panel_length, row_height = user_inputs["panel_height"], user_inputs["panel_width"]
+                rail_inset = user_inputs["l_rail_inset"]
+            else:
+                panel_length, row_height = user_inputs["panel_width"], user_inputs["panel_height"]
+                rail_inset = user_inputs["p_rail_inset"]
+            anchor_xs = ([], [])
+            for index in range(anchors["offsets"][row_num], anchors["offsets"][row_num + 1]):
+                anchor_xs[anchors["rail"][index]].append(x + anchors["x"][index])
+            self.rows.append(
+                (
+                    y,
+                    y + row_height,
+                    x,
+                    panel_length,
+                    panel_length + panel_spacing,
+                    num_panels,
+                    (y + rail_inset, y + row_height - rail_inset),
+                    anchor_xs,
+                )
+            )
+        self.rows.sort(key=lambda row: row[0])
+        self.tops = [row[0] for row in self.rows]
+        self.max_height = max((row[1] - row[0] for row in self.rows), default=0)
+        self.rail_protrusion = rail_protrusion
+        self.width = max(
+            (row[2] + row[5] * row[4] - panel_spacing + rail_protrusion for row in self.rows), default=0
+        )
+        self.height = max((row[1] for row in self.rows), default=0)
+
+        digest = blake2b(repr((self.rows, rail_protrusion)).encode(), digest_size=16)
+        self.key = digest.hexdigest()
+
+    def scale(self, zoom):
+        """Pixels per engine length at a zoom level."""
+        return 2.0**zoom / LENGTH_SCALE
+
+    def size(self, zoom):
+        """Size of the whole layout in pixels at a zoom level."""
+        scale = self.scale(zoom)
+        return ceil(self.width * scale), ceil(self.height * scale)
+
+    def fit_zoom(self, width, height):
+        """Return the largest whole zoom level at which the layout fits in width x height pixels."""
+        zoom = 0
+        while zoom > -12 and any(size > limit for size, limit in zip(self.size(zoom), (width, height))):
+            zoom -= 1
+        while zoom < 6 and all(size <= limit for size, limit in zip(self.size(zoom + 1), (width, height))):
+            zoom += 1
+        return zoom
+
+    def render(self, zoom, left, top, width, height):
+        """Draw the width x height pixels whose top left corner is pixel (left, top)."""
+        image = Image(width, height)
+        scale = self.scale(zoom)
+
+        def to_pixel(length, origin):
+            return floor(length * scale) - origin
+
+        # Only rows overlapping the image's band of the layout are drawn
+        band_top, band_bottom = top / scale, (top + height) / scale
+        first = bisect_left(self.tops, band_top - self.max_height)
+        last = bisect_right(self.tops, band_bottom)
+        for row_top, row_bottom, x, panel_length, pitch, num_panels, rail_ys, anchor_xs in self.rows[first:last]:
+            y0, y1 = to_pixel(row_top, top), max(to_pixel(row_bottom, top), to_pixel(row_top, top) + 1)
+            if y1 <= 0 or y0 >= height:
+                continue
+            panel_pixels = panel_length * scale
+
+            if panel_pixels < ROW_DETAIL:
+                row_width = (num_panels - 1) * pitch + panel_length
+                image.fill(to_pixel(x, left), y0, max(to_pixel(x + row_width, left), to_pixel(x, left) + 1), y1, PANEL)
+                continue
+
+            # Panels, limited to those in the image's columns
+            first_panel = max(0, floor((left / scale - x) / pitch))
+            last_panel = min(num_panels, ceil(((left + width) / scale - x) / pitch) + 1)
+            edges = panel_pixels >= 6
+            for i in range(first_panel, last_panel):
+                x0 = to_pixel(x + i * pitch, left)
+                x1 = max(to_pixel(x + i * pitch + panel_length, left), x0 + 1)
+                if edges:
+                    image.fill(x0, y0, x1, y1, PANEL_EDGE)
+                    image.fill(x0 + 1, y0 + 1, x1 - 1, y1 - 1, PANEL)
+                else:
+                    image.fill(x0, y0, x1, y1, PANEL)
+
+            # Rails run past both ends of the row
+            rail_width = (num_panels - 1) * pitch + panel_length + self.rail_protrusion
+            thickness = max(1, round(1.5 * LENGTH_SCALE * scale))
+            for rail_y in rail_ys:
+                py = to_pixel(rail_y, top) - thickness // 2
+                image.fill(
+                    to_pixel(x - self.rail_protrusion, left), py, to_pixel(x + rail_width, left), py + thickness, RAIL
+                )
+
+            if panel_pixels >= ANCHOR_DETAIL:
+                size = max(3, round(3 * LENGTH_SCALE * scale))
+                for rail_y, xs in zip(rail_ys, anchor_xs):
+                    py = to_pixel(rail_y, top) - size // 2
+                    for anchor_x in xs:
+                        px = to_pixel(anchor_x, left) - size // 2
+                        image.fill(px, py, px + size, py + size, ANCHOR)
+
+        return image
+
+    def tile(self, zoom, column, row):
+        """Return the tile at (column, row) of a zoom level, drawing it only if not cached."""
+        key = (self.key, zoom, column, row)
+        with _tile_lock:
+            if key in _tile_cache:
+                _tile_cache.move_to_end(key)
+                return _tile_cache[key]
+
+        tile = self.render(zoom, column * TILE_SIZE, row * TILE_SIZE, TILE_SIZE, TILE_SIZE)
+        with _tile_lock:
+            _tile_cache[key] = tile
+            while len(_tile_cache) > MAX_TILES:
+                _tile_cache.popitem(last=False)
+        return tile
+
+    def tiles(self, zoom, left, top, width, height):
+        """Yield (x, y, tile) for the cached tiles covering a view, relative to its top left corner."""
+        for row in range(top // TILE_SIZE, (top + height - 1) // TILE_SIZE + 1):
+            for column in range(left // TILE_SIZE, (left + width - 1) // TILE_SIZE + 1):
+                yield column * TILE_SIZE - left, row * TILE_SIZE - top, self.tile(zoom, column, row)
+
+    def render_view(self, zoom, left, top, width, height):
+        """Draw a view of the layout from cached tiles."""
+        image = Image(width, height)
+        for x, y, tile in self.tiles(zoom, left, top, width, height):
+            image.paste(tile, x, y)
+        return image
+
+    def save_png(self, path, zoom=1):
+        """Save the whole layout as a PNG image."""
+        width, height = self.size(zoom)
+        with open(path, "wb") as f:
+            f.write(self.render(zoom, 0, 0, max(width, 1), max(height, 1)).to_png())
@@ -0,0 +1,176 @@
+from dataclasses import dataclass, fields
+from json import dumps
+from typing import Dict, Tuple
+
+
+class Result:
+    """Serialization shared by the engine's result types."""
+
+    __slots__ = ()
+
+    def to_dict(self):
+        """Return the fields as a dict of plain values."""
+        return {field.name: _plain(getattr(self, field.name)) for field in fields(self)}
+
+    def to_json(self):
+        """Return the fields as a JSON object."""
+        return dumps(self.to_dict())
+
+    def to_csv_row(self):
+        """Return the fields flattened into one CSV row, e.g. ``num_rails_70000``."""
+        row = {}
+        for name, value in self.to_dict().items():
+            if isinstance(value, dict):
+                row.update({f"{name}_{key}": item for key, item in value.items()})
+            elif isinstance(value, tuple):
+                row[name] = " ".join(
+                    "|".join(f"{key}:{count}" for key, count in item.items()) if isinstance(item, dict) else str(item)
+                    for item in value
+                )
+            else:
+                row[name] = value
+        return row
+
+
+def _plain(value):
+    """Return a field value with any nested results as dicts."""
+    if isinstance(value, Result):
+        return value.to_dict()
+    if isinstance(value, tuple) and value and isinstance(value[0], Result):
+        return tuple(item.to_dict() for item in value)
+    return value
+
+
+@dataclass(frozen=True, slots=True)
+class EquipmentResult(Result):
+    """Hardware quantities for an array; lengths are engine units."""
+
+    num_modules: int
+    num_rails: Dict[int, int]
+    num_mounts: int
+    num_mids: int
+    num_ends: int
+    num_splices: int
+    span_btwn_anchors: int
+
+
+@dataclass(frozen=True, slots=True)
+class RailResult(Result):
+    """Rail length, rails and waste of every row; lengths are engine units."""
+
+    row_lengths: Tuple[int, ...]
+    all_rails: Tuple[Dict[int, int], ...]
+    all_wastes: Tuple[int, ...]
+
+    @property
+    def total_waste(self):
+        return sum(self.all_wastes)
+
+
+@dataclass(frozen=True, slots=True)
+class PurchaseResult(Result):
+    """Packs to order per rail length and their price."""
+
+    num_packs: Dict[int, int]
+    rail_cost: float
+
+
+@dataclass(frozen=True, slots=True)
+class ScenarioResult(Result):
+    """One evaluated scenario of a sweep; lengths are engine units."""
+
+    panel_model: str
+    orientation: str
+    panel_spacing: int
+    rail_span: int
+    num_rows: int
+    num_modules: int
+    num_mounts: int
+    num_splices: int
+    rail_cost: float
+    total_waste: int
+    max_psf: float
+
+
+@dataclass(frozen=True, slots=True)
+class PlaneResult(Result):
+    """Results of one roof plane of a project."""
+
+    name: str
+    equipment: EquipmentResult
+    rails: RailResult
+    psf: Tuple[float, ...]
+
+
+@dataclass(frozen=True, slots=True)
+class ProjectResult(Result):
+    """Results of every roof plane of a project, and of all of them together."""
+
+    planes: Tuple[PlaneResult, ...]
+    equipment: EquipmentResult
+    rails: RailResult
+    purchase: PurchaseResult
+    psf: Tuple[float, ...]
+
+
+@dataclass(frozen=True, slots=True)
+class RailSolution(Result):
+    """A run's rail selection with the lower bound proven on its waste; lengths are engine units.
+
+    Wastes are over both rails, like the waste of a rail selection.
+    """
+
+    rail_counts: Dict[int, int]
+    num_splices: int
+    total_waste: int
+    rail_combo: Tuple[int, ...]
+    lower_bound: int
+
+    @property
+    def gap(self):
+        """Waste that a better selection might still save."""
+        return self.total_waste - self.lower_bound
+
+    @property
+    def optimal(self):
+        return self.gap == 0
+
+    @property
+    def selection(self):
+        """Return the solution as a ``(rail_counts, num_splices, total_waste, rail_combo)`` selection."""
+        return self.rail_counts, self.num_splices, self.total_waste, list(self.rail_combo)
+
+
+@dataclass(frozen=True, slots=True)
+class RailCandidate(Result):
+    """A rail combination covering a run, with its waste over both rails; lengths are engine units."""
+
+    rail_combo: Tuple[int, ...]
+    total_waste: int
+
+
+@dataclass(frozen=True, slots=True)
+class RowChange(Result):
+    """A row added, removed or changed from one revision to the next.
+
+    Rows are ``(num_panels, orientation)`` pairs, and ``before`` or ``after``
+    is None for a row that was added or removed. ``row_num`` counts from
+    zero in the new revision, or in the old one for a removed row.
+    """
+
+    row_num: int
+    before: Tuple[int, str] | None
+    after: Tuple[int, str] | None
+
+
+@dataclass(frozen=True, slots=True)
+class BomDelta(Result):
+    """Change in hardware quantities from one revision to the next; lengths are engine units."""
+
+    num_modules: int
+    num_rails: Dict[int, int]
+    num_mounts: int
+    num_mids: int
+    num_ends: int
+    num_splices: int
+    changes: Tuple[RowChange, ...]
@@ -0,0 +1,154 @@
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+from typing import Mapping, Tuple
+
+from enums import RailSelection
+from results import BomDelta, RowChange
+from rowset import RowSet, as_rowset
+from utils import get_equipment_data, get_rail_selections
+
+CHUNK_SIZE = 64  # Most rows in a chunk that revisions share
+
+
+@dataclass(frozen=True, slots=True)
+class Revision:
+    """One version of an array's inputs (as from ``process_fields``) and rows.
+
+    Rows are kept in RowSet chunks. Editing a revision returns a new one
+    that shares every chunk the edit didn't touch, so a long history holds
+    little more than its changes, and two related revisions are compared
+    by looking only at the chunks that differ.
+    """
+
+    user_inputs: Mapping
+    chunks: Tuple[RowSet, ...]
+
+    @classmethod
+    def create(cls, user_inputs, row_data):
+        return cls(dict(user_inputs), _chunk(as_rowset(row_data)))
+
+    @property
+    def row_data(self):
+        return RowSet.concat(self.chunks)
+
+    def __len__(self):
+        return sum(len(chunk) for chunk in self.chunks)
+
+    def splice(self, start, stop, rows=()):
+        """Return a revision with rows ``start`` up to ``stop`` replaced by ``rows``.
+
+        Rows are ``(num_panels, orientation)`` pairs; no rows deletes, and
+        ``start == stop`` inserts.
+        """
+        if not 0 <= start <= stop <= len(self):
+            raise ValueError(f"Rows {start} to {stop} are not in a revision of {len(self)} rows.")
+
+        # Find the chunks holding the rows, or the chunk to insert into
+        first = last = None
+        offset = first_offset = 0
+        for i, chunk in enumerate(self.chunks):
+            end = offset + len(chunk)
+            if first is None and (start < end or i == len(self.chunks) - 1):
+                first, first_offset = i, offset
+            if first is not None and stop <= end:
+                last = i
+                break
+            offset = end
+        if first is None:
+            return Revision(self.user_inputs, _chunk(as_rowset(rows)))
+
+        # Only those chunks are rebuilt
+        edited = RowSet.concat(self.chunks[first:last + 1])
+        edited = RowSet.concat(
+            (edited[:start - first_offset], as_rowset(rows), edited[stop - first_offset:])
+        )
+        return Revision(self.user_inputs, self.chunks[:first] + _chunk(edited) + self.chunks[last + 1:])
+
+    def with_inputs(self, user_inputs):
+        """Return a revision with new inputs and the same rows."""
+        return Revision(dict(user_inputs), self.chunks)
+
+
+def _chunk(row_set):
+    return tuple(row_set[i:i + CHUNK_SIZE] for i in range(0, len(row_set), CHUNK_SIZE))
+
+
+def diff_rows(old, new):
+    """Return the rows added, removed and changed from one revision to another, as ``RowChange``s."""
+    # Chunks the revisions share at either end hold the same rows
+    old_chunks, new_chunks = old.chunks, new.chunks
+    num_shared = min(len(old_chunks), len(new_chunks))
+    head = 0
+    while head < num_shared and old_chunks[head] is new_chunks[head]:
+        head += 1
+    tail = 0
+    while tail < num_shared - head and old_chunks[-1 - tail] is new_chunks[-1 - tail]:
+        tail += 1
+
+    row_num = sum(len(chunk) for chunk in new_chunks[:head])
+    old_rows = list(RowSet.concat(old_chunks[head:len(old_chunks) - tail]))
+    new_rows = list(RowSet.concat(new_chunks[head:len(new_chunks) - tail]))
+
+    # So are rows at either end of the rebuilt chunks; left in, runs of equal
+    # rows could be matched out of line and reported as moved
+    num_shared = min(len(old_rows), len(new_rows))
+    first = 0
+    while first < num_shared and old_rows[first] == new_rows[first]:
+        first += 1
+    last = 0
+    while last < num_shared - first and old_rows[-1 - last] == new_rows[-1 - last]:
+        last += 1
+    row_num += first
+    old_rows = old_rows[first:len(old_rows) - last]
+    new_rows = new_rows[first:len(new_rows) - last]
+
+    changes = []
+    opcodes = SequenceMatcher(None, old_rows, new_rows, autojunk=False).get_opcodes()
+    for tag, old_start, old_stop, new_start, new_stop in opcodes:
+        if tag == "equal":
+            continue
+        num_changed = min(old_stop - old_start, new_stop - new_start)
+        for i in range(num_changed):
+            changes.append(RowChange(row_num + new_start + i, old_rows[old_start + i], new_rows[new_start + i]))
+        for i in range(old_start + num_changed, old_stop):
+            changes.append(RowChange(row_num + i, old_rows[i], None))
+        for i in range(new_start + num_changed, new_stop):
+            changes.append(RowChange(row_num + i, None, new_rows[i]))
+    return tuple(changes)
+
+
+def bom_delta(old, new, rail_catalog):
+    """Return the change in hardware from one revision to another as a ``BomDelta``.
+
+    When only rows changed, just the changed rows are solved, since every
+    row's hardware is its own. New inputs can change every row, and rails
+    selected for purchase cost depend on the whole array's packs, so then
+    both revisions are solved whole.
+    """
+    rail_lengths = [rail["length"] for rail in rail_catalog]
+    changes = diff_rows(old, new)
+
+    if old.user_inputs != new.user_inputs or new.user_inputs.get("rail_selection") == RailSelection.COST:
+        before = _solve(old.row_data, rail_catalog, old.user_inputs)
+        after = _solve(new.row_data, rail_catalog, new.user_inputs)
+    else:
+        before = _solve([change.before for change in changes if change.before], rail_catalog, old.user_inputs)
+        after = _solve([change.after for change in changes if change.after], rail_catalog, new.user_inputs)
+
+    return BomDelta(
+        num_modules=after.num_modules - before.num_modules,
+        num_rails={
+            length: after.num_rails.get(length, 0) - before.num_rails.get(length, 0) for length in rail_lengths
+        },
+        num_mounts=after.num_mounts - before.num_mounts,
+        num_mids=after.num_mids - before.num_mids,
+        num_ends=after.num_ends - before.num_ends,
+        num_splices=after.num_splices - before.num_splices,
+        changes=changes,
+    )
+
+
+def _solve(row_data, rail_catalog, user_inputs):
+    rail_lengths = [rail["length"] for rail in rail_catalog]
+    rail_selections = get_rail_selections(row_data, rail_catalog, user_inputs)
+    return get_equipment_data(row_data, rail_lengths, user_inputs, rail_selections)
@@ -0,0 +1,94 @@
+from array import array
+
+# Orientation codes stored in a RowSet, and their display names
+PORTRAIT = 0
+LANDSCAPE = 1
+ORIENTATIONS = ("Portrait", "Landscape")
+
+
+class RowSet:
+    """Rows of an array stored as contiguous columns of panel counts and orientation codes.
+
+    Slicing returns a view over the same buffers without copying. Iterating
+    or indexing yields ``(num_panels, orientation_name)`` pairs, like the
+    lists of tuples the UI builds, while the engine reads the columns.
+    """
+
+    __slots__ = ("num_panels", "orientations")
+
+    def __init__(self, num_panels=(), orientations=()):
+        if not isinstance(num_panels, memoryview):
+            num_panels = memoryview(array("H", num_panels))
+        if not isinstance(orientations, memoryview):
+            orientations = memoryview(array("B", orientations))
+        if len(num_panels) != len(orientations):
+            raise ValueError("Every row needs both a panel count and an orientation.")
+        self.num_panels = num_panels
+        self.orientations = orientations
+
+    @classmethod
+    def from_rows(cls, row_data):
+        """Build a RowSet from (num_panels, orientation_name) pairs."""
+        num_panels = array("H")
+        orientations = array("B")
+        for count, orientation in row_data:
+            num_panels.append(count)
+            orientations.append(ORIENTATIONS.index(orientation))
+        return cls(num_panels, orientations)
+
+    @classmethod
+    def concat(cls, row_sets):
+        """Join several RowSets into one, e.g. the rows of many projects."""
+        num_panels = array("H")
+        orientations = array("B")
+        for row_set in row_sets:
+            num_panels.frombytes(row_set.num_panels.tobytes())
+            orientations.frombytes(row_set.orientations.tobytes())
+        return cls(num_panels, orientations)
+
+    def __reduce__(self):
+        # Memoryviews can't be pickled, so rows travel to worker processes as lists
+        return RowSet, (self.num_panels.tolist(), self.orientations.tolist())
+
+    def __len__(self):
+        return len(self.num_panels)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return RowSet(self.num_panels[index], self.orientations[index])
+        return self.num_panels[index], ORIENTATIONS[self.orientations[index]]
+
+    def __iter__(self):
+        return zip(self.num_panels, (ORIENTATIONS[code] for code in self.orientations))
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, RowSet)
+            and self.num_panels == other.num_panels
+            and self.orientations == other.orientations
+        )
+
+    def group(self):
+        """Group identical rows.
+
+        Returns the distinct rows in order of first appearance, how many
+        times each occurs, and the index of each row's group.
+        """
+        # Each row packs into one integer key: the panel count and the orientation bit
+        groups = {}
+        inverse = array("I")
+        for count, orientation in zip(self.num_panels, self.orientations):
+            inverse.append(groups.setdefault(count * 2 + orientation, len(groups)))
+
+        unique = RowSet([key >> 1 for key in groups], [key & 1 for key in groups])
+        counts = array("I", [0]) * len(groups)
+        for index in inverse:
+            counts[index] += 1
+        return unique, counts, inverse
+
+
+def as_rowset(row_data):
+    """Return the rows as a RowSet, converting a list of (num_panels, orientation_name) pairs."""
+    if isinstance(row_data, RowSet):
+        return row_data
+    return RowSet.from_rows(row_data)
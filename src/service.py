@@ -0,0 +1,254 @@
+import argparse
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import repeat
+from json import JSONDecodeError, dumps, loads
+from threading import Lock
+
+from enums import RackingPattern, RailSelection
+from rowset import ORIENTATIONS, RowSet
+from units import LENGTH_SCALE, convert_rail_catalog, to_length
+from utils import get_equipment_data, get_psf_data, get_purchase_data, get_rail_selections, get_row_data
+
+# Inputs are sent in inches, with the same names, ranges and defaults as the Inputs tab
+LENGTH_INPUTS = {
+    "panel_width": (25, 60),
+    "panel_height": (40, 100),
+    "max._rail_span_btwn_anchors": (24, 48),
+    "min._anchor_spacing_interval": (8, 48),
+    "panel_spacing": (0.39, 0.7),
+    "bracket_inset": (4, 12),
+    "rail_protrusion": (2, 6),
+    "p_rail_inset": (0, 18),
+    "l_rail_inset": (0, 12),
+}
+PANEL_WEIGHT_RANGE = (20, 100)
+DEFAULT_INPUTS = {
+    "anchor_pattern": str(RackingPattern.CONTINUOUS),
+    "max._rail_span_btwn_anchors": 48,
+    "min._anchor_spacing_interval": 16,
+    "panel_spacing": 0.625,
+    "bracket_inset": 10,
+    "rail_protrusion": 4,
+    "p_rail_inset": 16,
+    "l_rail_inset": 10,
+    "truss_structure": False,
+    "rail_selection": str(RailSelection.WASTE),
+}
+MAX_BATCH = 1000
+
+
+def parse_job(job):
+    """Return the engine inputs and rows of a JSON job, or raise ValueError."""
+    if not isinstance(job, dict) or not isinstance(job.get("inputs", {}), dict):
+        raise ValueError('A job must be {"inputs": {...}, "rows": [...]}.')
+    inputs = dict(DEFAULT_INPUTS, **job.get("inputs", {}))
+
+    user_inputs = {}
+    for key, valid_range in (*LENGTH_INPUTS.items(), ("panel_weight", PANEL_WEIGHT_RANGE)):
+        if key not in inputs:
+            raise ValueError(f"The value for '{key}' is missing.")
+        try:
+            value = float(inputs[key])
+        except (TypeError, ValueError):
+            raise ValueError(f"The value for '{key}' must be a number.")
+        if value < valid_range[0] or value > valid_range[1]:
+            raise ValueError(
+                f"The value for '{key}' is outside the valid range of [{valid_range[0]}, {valid_range[1]}]."
+            )
+        user_inputs[key] = value if key == "panel_weight" else to_length(value)
+    if user_inputs["max._rail_span_btwn_anchors"] < user_inputs["min._anchor_spacing_interval"]:
+        raise ValueError(
+            "The value for 'max._rail_span_btwn_anchors' must be at least 'min._anchor_spacing_interval'."
+        )
+
+    for key, enum in (("anchor_pattern", RackingPattern), ("rail_selection", RailSelection)):
+        if not isinstance(inputs[key], str) or inputs[key] not in enum.map():
+            raise ValueError(f"The value for '{key}' must be one of {list(enum.map())}.")
+        user_inputs[key] = enum.map()[inputs[key]]
+    user_inputs["truss_structure"] = bool(inputs["truss_structure"])
+
+    rows = job.get("rows")
+    if not rows or not isinstance(rows, list):
+        raise ValueError("At least one row is needed.")
+    num_panels = []
+    orientations = []
+    for id, row in enumerate(rows):
+        try:
+            n, orientation = row
+            if isinstance(n, bool) or not isinstance(n, int):
+                raise ValueError
+            orientations.append(ORIENTATIONS.index(orientation))
+        except (TypeError, ValueError):
+            raise ValueError(f'Row {id + 1} must be [num_panels, "Portrait" or "Landscape"].')
+        if n < 1 or n > 100:
+            raise ValueError(f"The value in row {id + 1} is outside the valid range of [1, 100]")
+        num_panels.append(n)
+
+    return user_inputs, RowSet(num_panels, orientations)
+
+
+def calculate(job, rail_catalog):
+    """Calculate the hardware, rails and deadloads of one job.
+
+    Returns the results as plain numbers, with lengths in engine units
+    (``length_scale`` per inch), or ``{"error": message}`` for a bad job.
+    """
+    try:
+        user_inputs, row_data = parse_job(job)
+    except ValueError as e:
+        return {"error": str(e)}
+
+    rail_lengths = [rail["length"] for rail in rail_catalog]
+    rail_selections = get_rail_selections(row_data, rail_catalog, user_inputs)
+    equipment_data = get_equipment_data(row_data, rail_lengths, user_inputs, rail_selections)
+    rail_data = get_row_data(row_data, rail_lengths, user_inputs, rail_selections)
+    purchase_data = get_purchase_data(equipment_data.num_rails, rail_catalog)
+
+    return {
+        "length_scale": LENGTH_SCALE,
+        "equipment": equipment_data.to_dict(),
+        "rails": rail_data.to_dict(),
+        "purchase": purchase_data.to_dict(),
+        "psf": get_psf_data(row_data, user_inputs),
+    }
+
+
+class CalculationServer(ThreadingHTTPServer):
+    """HTTP server solving jobs on a shared pool of worker processes.
+
+    Requests are handled on threads and solved on the pool, whose workers
+    live for the whole server so the solver's own caches carry over between
+    requests. Responses are also cached by job, for every client.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, rail_catalog, max_workers=None, cache_size=4096):
+        super().__init__(address, CalculationHandler)
+        self.rail_catalog = rail_catalog
+        self.max_workers = max_workers or os.cpu_count()
+        self.executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+        self.cache_lock = Lock()
+
+    def solve(self, jobs):
+        """Return the results of the jobs, solving only the ones not cached."""
+        keys = [dumps(job, sort_keys=True) for job in jobs]
+        results = {}
+        with self.cache_lock:
+            for key in keys:
+                if key in self.cache:
+                    self.cache.move_to_end(key)
+                    results[key] = self.cache[key]
+
+        # Identical jobs in a batch are solved once
+        pending = list(dict.fromkeys(key for key in keys if key not in results))
+        if pending:
+            chunksize = max(1, len(pending) // (4 * self.max_workers))
+            solved = self.executor.map(
+                _calculate_key, pending, repeat(self.rail_catalog), chunksize=chunksize
+            )
+            with self.cache_lock:
+                for key, result in zip(pending, solved):
+                    results[key] = result
+                    self.cache[key] = result
+                while len(self.cache) > self.cache_size:
+                    self.cache.popitem(last=False)
+
+        return [results[key] for key in keys]
+
+    def server_close(self):
+        super().server_close()
+        self.executor.shutdown()
+
+
+class CalculationHandler(BaseHTTPRequestHandler):
+    """Serve ``POST /calculate`` for one job and ``POST /batch`` for a list of jobs."""
+
+    protocol_version = "HTTP/1.1"  # Keep connections alive between requests
+
+    def do_POST(self):
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            length = -1
+        if length < 0:
+            # The body can't be found in the stream, so the connection can't carry another request
+            self.close_connection = True
+            return self.send_json(400, {"error": "The request needs a valid Content-Length."})
+        try:
+            body = loads(self.rfile.read(length) or b"null")
+        except (ValueError, JSONDecodeError):
+            return self.send_json(400, {"error": "The request body must be JSON."})
+
+        if self.path == "/calculate":
+            try:
+                result = self.server.solve([body])[0]
+            except Exception as e:
+                return self.send_json(500, {"error": f"The job could not be solved: {e}"})
+            return self.send_json(400 if "error" in result else 200, result)
+
+        if self.path == "/batch":
+            jobs = body.get("jobs") if isinstance(body, dict) else None
+            if not isinstance(jobs, list):
+                return self.send_json(400, {"error": 'A batch must be {"jobs": [...]}.'})
+            if len(jobs) > MAX_BATCH:
+                return self.send_json(400, {"error": f"A batch holds at most {MAX_BATCH} jobs."})
+            try:
+                results = self.server.solve(jobs)
+            except Exception as e:
+                return self.send_json(500, {"error": f"The batch could not be solved: {e}"})
+            return self.send_json(200, {"results": results})
+
+        self.send_json(404, {"error": f'No such endpoint "{self.path}".'})
+
+    def do_GET(self):
+        if self.path == "/health":
+            return self.send_json(200, {"status": "ok"})
+        self.send_json(404, {"error": f'No such endpoint "{self.path}".'})
+
+    def send_json(self, status, payload):
+        body = dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _calculate_key(key, rail_catalog):
+    """Calculate the job serialized as ``key``, turning any failure into that job's error."""
+    try:
+        return calculate(loads(key), rail_catalog)
+    except Exception as e:
+        return {"error": f"The job could not be calculated: {type(e).__name__}: {e}"}
+
+
+def serve(host="127.0.0.1", port=8765, max_workers=None):
+    """Serve calculations with the saved rail catalog until interrupted."""
+    from data_manager import DataManager
+
+    rail_catalog = convert_rail_catalog(DataManager().get_rail_catalog())
+    with CalculationServer((host, port), rail_catalog, max_workers) as server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve Racking Builder calculations over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+    serve(args.host, args.port, args.workers)
@@ -0,0 +1,162 @@
+from bisect import bisect_left, bisect_right
+from collections import Counter
+
+from anchors import get_anchor_positions
+from rowset import as_rowset
+from units import LENGTH_SCALE
+from utils import get_rail_length
+
+
+def get_splice_plans(row_data, rail_selections, user_inputs, max_splice_distance=12 * LENGTH_SCALE):
+    """Plan the order and position of the rail pieces on every rail of the array.
+
+    ``rail_selections`` holds one ``optimal_rail_selection``-style result per
+    row. Returns a ``{"top": plan, "bottom": plan}`` dict per row, where each
+    plan comes from ``plan_rail_splices`` against that rail's anchors.
+    """
+    rows = as_rowset(row_data)
+    anchors = get_anchor_positions(rows, user_inputs)
+    rail_protrusion = user_inputs["rail_protrusion"]
+
+    splice_plans = []
+    for row_num, (num_panels, orientation) in enumerate(zip(rows.num_panels, rows.orientations)):
+        required_rail_length = get_rail_length(num_panels, orientation, user_inputs)
+        rail_combo = rail_selections[row_num][3]
+
+        start, end = anchors["offsets"][row_num], anchors["offsets"][row_num + 1]
+        rail_anchors = ([], [])
+        for i in range(start, end):
+            rail_anchors[anchors["rail"][i]].append(anchors["x"][i])
+
+        splice_plans.append(
+            {
+                rail: plan_rail_splices(
+                    rail_combo, required_rail_length, rail_anchors[index], rail_protrusion, max_splice_distance
+                )
+                for index, rail in enumerate(("top", "bottom"))
+            }
+        )
+    return splice_plans
+
+
+def plan_rail_splices(rail_combo, required_rail_length, anchor_positions, rail_protrusion, max_splice_distance):
+    """Order and place a rail's pieces so every splice lands near an anchor.
+
+    Positions are engine lengths from the left panel edge, so the rail must
+    cover ``-rail_protrusion`` to ``required_rail_length - rail_protrusion``;
+    the extra length of the pieces can be cut from either end. Orders of the
+    pieces are searched depth first, narrowing the range of start positions
+    that keep every splice so far within ``max_splice_distance`` of an
+    anchor and skipping states already known to fail.
+
+    When no order meets the distance, the plan with the smallest worst
+    splice distance (to within 1/16") is returned and ``ok`` is False. The
+    start is placed as close as allowed to a single cut at the far end.
+    """
+    anchors = sorted(anchor_positions)
+    excess = sum(rail_combo) - required_rail_length
+    start_range = ((-rail_protrusion - excess, -rail_protrusion),)
+
+    ok = True
+    result = _search_orders(rail_combo, anchors, start_range, max_splice_distance)
+    if result is None:
+        # Relax the distance to the smallest one some order can meet
+        ok = False
+        low, high = max_splice_distance, required_rail_length + excess
+        result = _search_orders(rail_combo, anchors, start_range, high)
+        while high - low > LENGTH_SCALE // 16:
+            middle = (low + high) // 2
+            candidate = _search_orders(rail_combo, anchors, start_range, middle)
+            if candidate is None:
+                low = middle
+            else:
+                high, result = middle, candidate
+
+    order, intervals = result
+    start = min(
+        (min(max(-rail_protrusion, low), high) for low, high in intervals),
+        key=lambda x: abs(x + rail_protrusion),
+    )
+
+    splices = []
+    position = start
+    for length in order[:-1]:
+        position += length
+        splices.append(position)
+
+    plan = {
+        "pieces": order,
+        "start": start,
+        "splices": splices,
+        "max_distance": max((_nearest_distance(anchors, x) for x in splices), default=0),
+        "ok": ok,
+    }
+    return plan
+
+
+def _search_orders(rail_combo, anchors, start_range, distance):
+    """Find an order of the pieces and the start positions keeping every splice near an anchor."""
+    lengths = sorted(set(rail_combo), reverse=True)
+    failed = set()
+
+    def place(counts, used, intervals):
+        for index, length in enumerate(lengths):
+            if counts[index] == 0:
+                continue
+            remaining = counts[:index] + (counts[index] - 1,) + counts[index + 1:]
+            if not any(remaining):
+                return [length], intervals  # The last piece has no splice after it
+
+            narrowed = _intersect(intervals, _allowed_starts(anchors, used + length, distance, intervals))
+            if not narrowed:
+                continue
+
+            # The used length follows from the remaining pieces, so it is not part of the key
+            key = (remaining, tuple(narrowed))
+            if key in failed:
+                continue
+            result = place(remaining, used + length, narrowed)
+            if result is not None:
+                order, final_intervals = result
+                return [length] + order, final_intervals
+            failed.add(key)
+        return None
+
+    counts = Counter(rail_combo)
+    return place(tuple(counts[length] for length in lengths), 0, start_range)
+
+
+def _allowed_starts(anchors, offset, distance, intervals):
+    """Start positions that put a splice ``offset`` along the rail within ``distance`` of an anchor."""
+    low = intervals[0][0] + offset - distance
+    high = intervals[-1][1] + offset + distance
+    allowed = []
+    for x in anchors[bisect_left(anchors, low):bisect_right(anchors, high)]:
+        start, end = x - distance - offset, x + distance - offset
+        if allowed and start <= allowed[-1][1]:
+            allowed[-1] = (allowed[-1][0], end)
+        else:
+            allowed.append((start, end))
+    return allowed
+
+
+def _intersect(first, second):
+    """Intersect two sorted lists of disjoint closed intervals."""
+    result = []
+    i = j = 0
+    while i < len(first) and j < len(second):
+        low = max(first[i][0], second[j][0])
+        high = min(first[i][1], second[j][1])
+        if low <= high:
+            result.append((low, high))
+        if first[i][1] < second[j][1]:
+            i += 1
+        else:
+            j += 1
+    return result
+
+
+def _nearest_distance(anchors, x):
+    """Distance from ``x`` to the closest anchor."""
+    index = bisect_left(anchors, x)
+    return min(abs(anchors[i] - x) for i in (index - 1, index) if 0 <= i < len(anchors))
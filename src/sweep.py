@@ -0,0 +1,121 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from results import ScenarioResult
+from rowset import ORIENTATIONS, RowSet
+from utils import get_equipment_data, get_psf_data, get_purchase_data, get_rail_selections, get_row_data
+
+
+def sweep_scenarios(
+    base_inputs,
+    panel_models,
+    rail_catalog,
+    panel_spacings,
+    rail_spans,
+    target_modules=None,
+    roof_width=None,
+    rank_by="rail_cost",
+    max_workers=None,
+):
+    """Evaluate every panel model, orientation, panel spacing and anchor span and rank the results.
+
+    ``base_inputs`` holds the racking inputs shared by every scenario and
+    ``panel_models`` the catalog entries to compare, with engine lengths as
+    from ``units.convert_panel_model``. Rows are laid out to
+    reach ``target_modules``, each row no wider than ``roof_width``. With only
+    a roof width a single full row is laid out; with only a module count, a
+    single row of that many modules.
+
+    Scenarios with more modules rank first, then by ``rank_by`` (one of
+    ``"rail_cost"``, ``"total_waste"`` or ``"max_psf"``), then by fewer anchors
+    and less waste.
+    """
+    if target_modules is None and roof_width is None:
+        raise ValueError("A target module count or a roof width is needed.")
+    if rank_by not in ("rail_cost", "total_waste", "max_psf"):
+        raise ValueError(f'Cannot rank scenarios by "{rank_by}".')
+
+    # Rails and deadloads don't depend on the anchor span, so each task shares them across spans
+    tasks = [
+        (base_inputs, panel_model, orientation, panel_spacing, tuple(rail_spans), rail_catalog, target_modules, roof_width)
+        for panel_model in panel_models
+        for orientation in ORIENTATIONS
+        for panel_spacing in panel_spacings
+    ]
+    with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+        chunksize = max(1, len(tasks) // (4 * (max_workers or os.cpu_count())))
+        results = [
+            scenario
+            for scenarios in executor.map(_evaluate_task, tasks, chunksize=chunksize)
+            for scenario in scenarios
+        ]
+
+    results.sort(
+        key=lambda scenario: (
+            -scenario.num_modules,
+            getattr(scenario, rank_by),
+            scenario.num_mounts,
+            scenario.total_waste,
+        )
+    )
+    return results
+
+
+def layout_rows(num_modules, panel_length, panel_spacing, roof_width=None):
+    """Lay out rows of equal length, each no wider than the roof, to reach the module count."""
+    if roof_width is None:
+        return [num_modules]
+
+    max_per_row = int((roof_width + panel_spacing) // (panel_length + panel_spacing))
+    if max_per_row < 1:
+        return []
+    if num_modules is None:
+        return [max_per_row]
+
+    num_full_rows, last_row = divmod(num_modules, max_per_row)
+    return [max_per_row] * num_full_rows + ([last_row] if last_row else [])
+
+
+def _evaluate_task(task):
+    """Evaluate one panel model, orientation and spacing across every anchor span."""
+    base_inputs, panel_model, orientation, panel_spacing, rail_spans, rail_catalog, target_modules, roof_width = task
+
+    user_inputs = dict(
+        base_inputs,
+        panel_width=panel_model["width"],
+        panel_height=panel_model["height"],
+        panel_weight=panel_model["weight"],
+        panel_spacing=panel_spacing,
+    )
+    panel_length = panel_model["height"] if orientation == "Landscape" else panel_model["width"]
+    row_counts = layout_rows(target_modules, panel_length, panel_spacing, roof_width)
+    row_data = RowSet(row_counts, [ORIENTATIONS.index(orientation)] * len(row_counts))
+    if not row_data:
+        return []
+
+    rail_lengths = [rail["length"] for rail in rail_catalog]
+    rail_selections = get_rail_selections(row_data, rail_catalog, user_inputs)
+    rail_data = get_row_data(row_data, rail_lengths, user_inputs, rail_selections)
+    psf_data = get_psf_data(row_data, user_inputs)
+
+    scenarios = []
+    for rail_span in rail_spans:
+        span_inputs = dict(user_inputs, **{"max._rail_span_btwn_anchors": rail_span})
+        equipment_data = get_equipment_data(row_data, rail_lengths, span_inputs, rail_selections)
+        purchase_data = get_purchase_data(equipment_data.num_rails, rail_catalog)
+        scenarios.append(
+            ScenarioResult(
+                panel_model=panel_model["name"],
+                orientation=orientation,
+                panel_spacing=panel_spacing,
+                rail_span=rail_span,
+                num_rows=len(row_data),
+                num_modules=equipment_data.num_modules,
+                num_mounts=equipment_data.num_mounts,
+                num_splices=equipment_data.num_splices,
+                rail_cost=purchase_data.rail_cost,
+                total_waste=rail_data.total_waste,
+                max_psf=max(psf_data),
+            )
+        )
+    return scenarios
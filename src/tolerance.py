@@ -0,0 +1,89 @@
+from array import array
+from bisect import bisect_left
+from math import sqrt
+from random import Random
+
+from rowset import LANDSCAPE, as_rowset
+from units import LENGTH_SCALE
+from utils import get_rail_length, optimal_rail_selection
+
+LENGTH_STEP = LENGTH_SCALE // 16  # Resolution at which re-selected rails are looked up
+
+
+def analyze_tolerances(
+    row_data,
+    rail_selections,
+    rail_lengths,
+    user_inputs,
+    width_deviation,
+    height_deviation,
+    spacing_deviation,
+    num_samples=20000,
+    seed=None,
+):
+    """Estimate how often each row's selected rails turn out too short on site.
+
+    Every module's width and height and every gap between modules vary
+    independently around their inputs with the given standard deviations
+    (engine lengths), so a row's rail length varies with the square root of
+    its module count. ``num_samples`` rail lengths are drawn for each
+    distinct row and checked against the total length of its selected
+    rails, with the same random draws for every row.
+
+    Returns ``shortfall_probability`` and ``expected_extra_waste`` per row.
+    The extra waste is the mean change in waste over both rails against the
+    planned selection; when the rails are too short, the rails are
+    re-selected with ``optimal_rail_selection`` for the length found on
+    site.
+    """
+    # Every row is checked against the same standard normal samples, sorted so
+    # that each row's rail lengths come in order
+    rng = Random(seed)
+    samples = sorted(rng.gauss(0, 1) for _ in range(num_samples))
+    sample_sum = sum(samples)
+    row_set = as_rowset(row_data)
+    reselected = {}  # Total length of the rails re-selected for a rail length, by LENGTH_STEP
+
+    def rail_total_at(step):
+        if step not in reselected:
+            reselected[step] = sum(optimal_rail_selection(step * LENGTH_STEP, rail_lengths)[3])
+        return reselected[step]
+
+    results = {}  # By (num_panels, orientation, planned rail total)
+    shortfall_probability = array("d")
+    expected_extra_waste = array("d")
+    for (num_panels, orientation), selection in zip(zip(row_set.num_panels, row_set.orientations), rail_selections):
+        rail_total = sum(selection[3])
+        key = (num_panels, orientation, rail_total)
+        if key not in results:
+            panel_deviation = height_deviation if orientation == LANDSCAPE else width_deviation
+            deviation = sqrt(num_panels * panel_deviation**2 + (num_panels - 1) * spacing_deviation**2)
+            nominal = get_rail_length(num_panels, orientation, user_inputs)
+            # Samples that fit keep the planned rails; the rest are re-selected
+            # once for each LENGTH_STEP their rail lengths fall in. The rail
+            # lengths are summed unrounded, which moves the mean by under a unit.
+            num_fit = _num_fitting(samples, nominal, deviation, rail_total)
+            total_waste = rail_total * num_fit
+            first = num_fit
+            while first < num_samples:
+                step = -(-round(nominal + deviation * samples[first]) // LENGTH_STEP)
+                last = max(_num_fitting(samples, nominal, deviation, step * LENGTH_STEP), first + 1)
+                total_waste += rail_total_at(step) * (last - first)
+                first = last
+            total_waste -= nominal * num_samples + deviation * sample_sum
+
+            planned_waste = 2 * (rail_total - nominal)
+            results[key] = ((num_samples - num_fit) / num_samples, 2 * total_waste / num_samples - planned_waste)
+
+        probability, extra_waste = results[key]
+        shortfall_probability.append(probability)
+        expected_extra_waste.append(extra_waste)
+
+    return {"shortfall_probability": shortfall_probability, "expected_extra_waste": expected_extra_waste}
+
+
+def _num_fitting(samples, nominal, deviation, length):
+    """Number of sorted samples whose rounded rail length is at most ``length``."""
+    if deviation == 0:
+        return len(samples) if round(nominal) <= length else 0
+    return bisect_left(samples, (length + 0.5 - nominal) / deviation)
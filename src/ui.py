@@ -1,3 +1,5 @@
+from base64 import b64encode
+from tkinter import Canvas, PhotoImage
 from typing import Dict
 
 from customtkinter import (
@@ -9,10 +11,13 @@ from customtkinter import (
     CTkOptionMenu,
     CTkScrollableFrame,
     CTkTabview,
+    CTkTextbox,
+    CTkToplevel,
 )
 
 from data_manager import DataManager
 from enums import *
+from widgets import WidgetPool
 
 
 class TabView(CTkTabview):
@@ -92,7 +97,7 @@ class InputFields:
                 input_widget = CTkEntry(self.parent)
             units_label = CTkLabel(self.parent, text=units) if units else None
             self.inputs[key] = InputField(
-                label, input_widget, default_value, field_type, units_label, valid_range
+                label, input_widget, default_value, field_type, units_label, valid_range, units
             )
 
     def create_input_widgets(self, label, starting_row=0):
@@ -128,6 +133,10 @@ class InputFields:
         """Get the variable type of a specific input field."""
         return self.inputs[field_name].get_variable_type()
 
+    def get_input_units(self, field_name: str):
+        """Get the units of a specific input field."""
+        return self.inputs[field_name].get_units()
+
     def restore_default_values(self):
         for input_field in self.inputs.values():
             input_field.restore_default_value()
@@ -142,6 +151,7 @@ class InputField:
         variable_type,
         units_label=None,
         valid_range=None,
+        units=None,
     ):
         self.label = label
         self.input_widget = input_widget
@@ -149,6 +159,7 @@ class InputField:
         self.variable_type = variable_type
         self.units_label = units_label
         self.valid_range = valid_range
+        self.units = units
         self.restore_default_value()
         self.label.configure(wraplength=110)
         self.input_widget.configure(width=150)
@@ -196,6 +207,9 @@ class InputField:
     def get_variable_type(self):
         return self.variable_type
 
+    def get_units(self):
+        return self.units
+
 
 # Modify PanelFields to pass new field data structure to InputFields
 class PanelInputFields(InputFields):
@@ -265,6 +279,7 @@ class RackingInputFields(InputFields):
         "p_rail_inset": (float, 16, "in.", (0, 18)),
         "l_rail_inset": (float, 10, "in.", (0, 12)),
         "truss_structure": (bool, False, None, None),
+        "rail_selection": (RailSelection, str(RailSelection.WASTE), None, None),
     }
 
     def __init__(self, parent):
@@ -278,6 +293,7 @@ class RowFields:
     def __init__(self, parent):
         self.parent = parent
         self.rows = []
+        self.pool = WidgetPool()  # Deleted rows, by row number, for when rows are added back
 
     def init_row_controls(self):
         """Initialize the 'Add Row' and 'Delete Row' controls."""
@@ -298,7 +314,9 @@ class RowFields:
 
     def add_row(self):
         """Add a new row to the row builder."""
-        row = RowField(self.rows_frame, len(self.rows))
+        row_num = len(self.rows)
+        row = self.pool.acquire(row_num, lambda: RowField(self.rows_frame, row_num))
+        row.set("", "Portrait")
         row.grid()
         self.rows.append(row)
 
@@ -306,7 +324,7 @@ class RowFields:
         """Remove the last row from the row builder."""
         if len(self.rows) > 1:
             row = self.rows.pop()
-            row.grid_forget()
+            self.pool.release(row.row_num, row)
 
     def get_row_data(self):
         """Get the data from all rows."""
@@ -315,6 +333,15 @@ class RowFields:
             row_data.append(row.get())
         return row_data
 
+    def set_row_data(self, row_data):
+        """Replace the rows with the given (num_panels, orientation) pairs, e.g. from a generated layout."""
+        while len(self.rows) > max(1, len(row_data)):
+            self.delete_row()
+        while len(self.rows) < len(row_data):
+            self.add_row()
+        for row, (num_panels, orientation) in zip(self.rows, row_data):
+            row.set(num_panels, orientation)
+
 
 class RowField:
     def __init__(self, parent, row_num):
@@ -333,5 +360,206 @@ class RowField:
         self.entry.grid_forget()
         self.orientation.grid_forget()
 
+    def destroy(self):
+        self.label.destroy()
+        self.entry.destroy()
+        self.orientation.destroy()
+
     def get(self):
         return (self.entry.get(), self.orientation.get())
+
+    def set(self, num_panels, orientation):
+        self.entry.delete(0, "end")
+        self.entry.insert(0, num_panels)
+        self.orientation.set(orientation)
+
+
+class LayoutPreview(CTkFrame):
+    """A pannable, zoomable view of a ``LayoutRenderer``'s tiles."""
+
+    WIDTH = 680
+    HEIGHT = 580
+
+    def __init__(self, master, renderer):
+        super().__init__(master, fg_color="transparent")
+        self.renderer = renderer
+        self.zoom = renderer.fit_zoom(self.WIDTH, self.HEIGHT)
+        self.left = 0
+        self.top = 0
+        self.drag_start = None
+        self.images = {}  # Tk images of the tiles drawn at the current zoom
+
+        self.canvas = Canvas(self, width=self.WIDTH, height=self.HEIGHT, background="white", highlightthickness=0)
+        self.canvas.grid(row=0, column=0, columnspan=3)
+        self.canvas.bind("<ButtonPress-1>", self.start_drag)
+        self.canvas.bind("<B1-Motion>", self.drag)
+
+        CTkButton(self, text="-", width=40, command=lambda: self.set_zoom(self.zoom - 1)).grid(
+            row=1, column=0, pady=(4, 0), sticky="e"
+        )
+        CTkButton(self, text="Fit", width=60, command=self.fit).grid(row=1, column=1, padx=8, pady=(4, 0))
+        CTkButton(self, text="+", width=40, command=lambda: self.set_zoom(self.zoom + 1)).grid(
+            row=1, column=2, pady=(4, 0), sticky="w"
+        )
+        self.draw()
+
+    def set_renderer(self, renderer):
+        """Show another layout, fitted to the view."""
+        self.renderer = renderer
+        self.zoom = renderer.fit_zoom(self.WIDTH, self.HEIGHT)
+        self.left = self.top = 0
+        self.images.clear()
+        self.draw()
+
+    def fit(self):
+        self.left = self.top = 0
+        self.set_zoom(self.renderer.fit_zoom(self.WIDTH, self.HEIGHT))
+
+    def set_zoom(self, zoom):
+        """Zoom about the center of the view."""
+        zoom = max(-12, min(6, zoom))
+        factor = 2.0 ** (zoom - self.zoom)
+        self.left = round((self.left + self.WIDTH / 2) * factor - self.WIDTH / 2)
+        self.top = round((self.top + self.HEIGHT / 2) * factor - self.HEIGHT / 2)
+        self.zoom = zoom
+        self.images.clear()
+        self.draw()
+
+    def start_drag(self, event):
+        self.drag_start = (event.x, event.y)
+
+    def drag(self, event):
+        self.left -= event.x - self.drag_start[0]
+        self.top -= event.y - self.drag_start[1]
+        self.drag_start = (event.x, event.y)
+        self.draw()
+
+    def draw(self):
+        """Show the tiles in view, turning each into a Tk image only once per zoom."""
+        width, height = self.renderer.size(self.zoom)
+        self.left = max(0, min(self.left, width - self.WIDTH))
+        self.top = max(0, min(self.top, height - self.HEIGHT))
+
+        self.canvas.delete("all")
+        for x, y, tile in self.renderer.tiles(self.zoom, self.left, self.top, self.WIDTH, self.HEIGHT):
+            key = (x + self.left, y + self.top)
+            if key not in self.images:
+                self.images[key] = PhotoImage(data=b64encode(tile.to_png()).decode())
+            self.canvas.create_image(x, y, image=self.images[key], anchor="nw")
+
+
+
+class RailResults(CTkFrame):
+    """The array deadload and a block per row of rails, kept between results.
+
+    Row blocks are reconfigured in place, and blocks for rows beyond the
+    latest results wait in a pool for the next time there are more rows.
+    """
+
+    def __init__(self, master):
+        super().__init__(master, fg_color="transparent", corner_radius=0)
+        self.grid_columnconfigure(1, weight=1)
+
+        # The whole array's deadload, with neighbouring rows' footprints merged
+        CTkLabel(self, text="Array Deadload", font=("TkDefaultFont", 12, "bold"), height=20).grid(
+            row=0, column=0, padx=8, sticky="w"
+        )
+        self.array_psf_label = CTkLabel(self, text="", font=("TkDefaultFont", 12, "bold"), height=20)
+        self.array_psf_label.grid(row=0, column=1, padx=8, sticky="e")
+
+        self.row_lengths_frame = CTkScrollableFrame(self, height=524, fg_color="transparent")
+        self.row_lengths_frame.grid(row=1, column=0, columnspan=2, sticky="nsew")
+        self.row_lengths_frame.grid_columnconfigure(0, weight=1)
+
+        self.rows = []
+        self.pool = WidgetPool()
+
+    def show(self, array_psf_text, row_values):
+        """Show the array deadload and each row's (rail length, rails, cutoffs, deadload, max anchor load) texts."""
+        self.array_psf_label.configure(text=array_psf_text)
+        while len(self.rows) > len(row_values):
+            self.pool.release("row", self.rows.pop())
+        while len(self.rows) < len(row_values):
+            row = self.pool.acquire("row", lambda: RailRow(self.row_lengths_frame))
+            row.grid(row=len(self.rows), column=0, sticky="ew")
+            self.rows.append(row)
+        for i, (row, values) in enumerate(zip(self.rows, row_values)):
+            row.show(i + 1, values, separator=i < len(row_values) - 1)
+
+
+class RailRow(CTkFrame):
+    """One row's rail length, rails, cutoffs, deadload and max anchor load."""
+
+    CAPTIONS = ("Rail Length:", "Rails:", "Cutoffs:", "Deadload:", "Max Anchor Load:")
+
+    def __init__(self, master):
+        super().__init__(master, fg_color="transparent", height=0, corner_radius=0)
+        self.grid_columnconfigure(2, weight=1)
+        self.number_label = CTkLabel(self, width=14, text="")
+        self.number_label.grid(row=0, column=0, rowspan=5, padx=(0, 8), sticky="w")
+        self.value_labels = []
+        for i, caption in enumerate(self.CAPTIONS):
+            CTkLabel(self, text=caption, anchor="w", font=("TkDefaultFont", 11), height=20).grid(
+                row=i, column=1, sticky="w"
+            )
+            value_label = CTkLabel(self, text="", anchor="e", font=("TkDefaultFont", 11), height=20)
+            value_label.grid(row=i, column=2, padx=4, sticky="e")
+            self.value_labels.append(value_label)
+        self.separator = CTkFrame(self, height=2, fg_color="gray50")
+
+    def show(self, number, values, separator):
+        self.number_label.configure(text=number)
+        for label, value in zip(self.value_labels, values):
+            if label.cget("text") != value:
+                label.configure(text=value)
+        if separator:
+            self.separator.grid(row=5, columnspan=3, padx=4, pady=4, sticky="ew")
+        else:
+            self.separator.grid_forget()
+
+
+class TelemetryWindow(CTkToplevel):
+    """A debug window with the app's live widget counts and each view's memory samples."""
+
+    REFRESH_INTERVAL = 1000  # Milliseconds between refreshes
+
+    def __init__(self, master, telemetry):
+        super().__init__(master)
+        self.title("Telemetry")
+        self.geometry("720x480")
+        self.telemetry = telemetry
+        self.grid_rowconfigure(0, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+
+        # One text box rewritten in place, so the window adds no widgets of its own as it refreshes
+        self.textbox = CTkTextbox(self, font=("Courier", 12), wrap="none")
+        self.textbox.grid(row=0, column=0, sticky="nsew")
+        self.refresh_job = None
+        self.refresh()
+
+    def refresh(self):
+        lines = [f"{'View':<12}{'Updates':>8}{'Widgets':>9}{'Growth':>8}{'Traced KB':>11}{'Growth KB':>11}"]
+        for sample in self.telemetry.samples.values():
+            lines.append(
+                f"{sample.view:<12}{sample.num_updates:>8}{sample.num_widgets:>9}{sample.widget_growth:>+8}"
+                f"{sample.traced_memory / 1024:>11.0f}{sample.memory_growth / 1024:>+11.1f}"
+            )
+
+        lines += ["", "Live widgets"]
+        lines += [f"  {name:<28}{count:>6}" for name, count in self.telemetry.widget_counts().most_common()]
+
+        for sample in self.telemetry.samples.values():
+            if sample.top_growth:
+                lines += ["", f"Largest growth since the first {sample.view} update"]
+                lines += [f"  {size / 1024:>+9.1f} KB  {site}" for site, size in sample.top_growth]
+
+        self.textbox.configure(state="normal")
+        self.textbox.delete("1.0", "end")
+        self.textbox.insert("1.0", "\n".join(lines))
+        self.textbox.configure(state="disabled")
+        self.refresh_job = self.after(self.REFRESH_INTERVAL, self.refresh)
+
+    def destroy(self):
+        if self.refresh_job:
+            self.after_cancel(self.refresh_job)
+        super().destroy()
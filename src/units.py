@@ -0,0 +1,27 @@
+LENGTH_SCALE = 1000  # Engine lengths are integer thousandths of an inch
+
+
+def to_length(inches):
+    """Convert inches to an engine length."""
+    return round(float(inches) * LENGTH_SCALE)
+
+
+def to_inches(length):
+    """Convert an engine length to inches."""
+    return length / LENGTH_SCALE
+
+
+def format_length(length, digits=2):
+    """Format an engine length as inches for display, e.g. '92.5"'."""
+    text = f"{length / LENGTH_SCALE:.{digits}f}".rstrip("0").rstrip(".")
+    return f'{text}"'
+
+
+def convert_rail_catalog(rail_catalog):
+    """Return a copy of the rail catalog with engine lengths."""
+    return [dict(rail, length=to_length(rail["length"])) for rail in rail_catalog]
+
+
+def convert_panel_model(panel_model):
+    """Return a copy of a panel model with engine lengths."""
+    return dict(panel_model, width=to_length(panel_model["width"]), height=to_length(panel_model["height"]))
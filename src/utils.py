@@ -1,7 +1,18 @@
 import os
 import sys
 from enum import Enum
-from typing import List, Tuple, Dict
+from functools import lru_cache
+from heapq import heappop, heappush
+from math import gcd, inf, isqrt
+from time import perf_counter
+from typing import List, Tuple
+
+from results import EquipmentResult, PurchaseResult, RailResult, RailSolution
+from rowset import LANDSCAPE, RowSet, as_rowset
+from units import LENGTH_SCALE, to_length
+
+TRUSS_BUFFER = to_length(78.7402)  # 2 meters added to each side of the footprint, 1 meter beyond each edge
+SOLVE_CHECK_INTERVAL = 1024  # Steps an anytime solver takes between looks at its deadline
 
 
 def get_icon_path():
@@ -44,15 +55,27 @@ def process_fields(fields):
                 f"The value for '{fields.inputs[field_name].label._text}' is outside the valid range of [{valid_range[0]}, {valid_range[1]}]."
             )
 
+        # Lengths enter the engine as fixed-point integers, converted once here
+        if fields.get_input_units(field_name) == "in.":
+            numeric_value = to_length(numeric_value)
+
         user_inputs[field_name] = numeric_value
 
     return user_inputs
 
 
-def get_equipment_data(row_data: List[Tuple[int, str]], rail_lengths, user_inputs) -> Dict[str, int]:
-    """Calculate and return the required solar equipment quantities."""
-    from enums import RackingPattern
-    
+def get_equipment_data(
+    row_data: List[Tuple[int, str]] | RowSet, rail_lengths, user_inputs, rail_selections=None
+) -> EquipmentResult:
+    """Calculate and return the required solar equipment quantities.
+
+    Like every engine calculator, lengths in and out are fixed-point
+    integers from ``units`` and ``row_data`` may be a ``RowSet`` or a list of
+    (num_panels, orientation) pairs. Identical rows are counted once and
+    multiplied. Rails are selected for minimum waste unless
+    ``rail_selections`` (one ``optimal_rail_selection``-style result per row)
+    is given.
+    """
     # Initialize equipment-related variables
     num_panels_total = 0
     num_mounts = 0
@@ -68,108 +91,127 @@ def get_equipment_data(row_data: List[Tuple[int, str]], rail_lengths, user_input
     rail_protrusion = user_inputs["rail_protrusion"]
     maximum_rail_span = user_inputs["max._rail_span_btwn_anchors"]
     rafter_spacing = user_inputs["min._anchor_spacing_interval"]
-    pattern = user_inputs["anchor_pattern"]
-    bracket_inset = user_inputs["bracket_inset"]
+    mount_spacing = (maximum_rail_span // rafter_spacing) * rafter_spacing
 
-    # Loop over row data and compute equipment quantities
-    for num_panels, orientation in row_data:
-        num_panels_total += num_panels
-        num_ends += 4
-        num_mids += 2 * (num_panels - 1)
+    # Loop over the distinct rows and compute equipment quantities
+    unique_rows, row_counts, _ = as_rowset(row_data).group()
+    for num_panels, orientation, row_count in zip(
+        unique_rows.num_panels, unique_rows.orientations, row_counts
+    ):
+        num_panels_total += row_count * num_panels
+        num_ends += row_count * 4
+        num_mids += row_count * 2 * (num_panels - 1)
 
         # Calculate row width based on panel orientation
-        if orientation == "Landscape":
+        if orientation == LANDSCAPE:
             row_width = num_panels * panel_height + (num_panels - 1) * panel_spacing
         else:
             row_width = num_panels * panel_width + (num_panels - 1) * panel_spacing
 
-        rail_length = row_width + 2 * rail_protrusion
-        mount_spacing = (maximum_rail_span // rafter_spacing) * rafter_spacing
+        num_mounts += row_count * sum(get_mount_counts(row_width, user_inputs))
 
-        if pattern == RackingPattern.CONTINUOUS:
-            num_mounts += 2 * ((row_width - 2 * bracket_inset) // mount_spacing + 2)
-        else:
-            num_mounts += (
-                (row_width - 2 * bracket_inset - mount_spacing / 2) // mount_spacing
-                + 3  # Top row
-                + ((row_width - 2 * bracket_inset) // mount_spacing + 2)  # Bottom row
-            )
+        if rail_selections is None:
+            rail_length = row_width + 2 * rail_protrusion
+            rail_counts, num_splices, _, _ = optimal_rail_selection(rail_length, rail_lengths)
+            for rail_length, count in rail_counts.items():
+                num_rails[rail_length] += row_count * count
+            num_splices_total += row_count * num_splices
 
-        rail_counts, num_splices, _, _ = optimal_rail_selection(rail_length, rail_lengths)
-
-        # Update rail counts and splices
+    # Update rail counts and splices from the given selections
+    for rail_counts, num_splices, _, _ in rail_selections or ():
         for rail_length, count in rail_counts.items():
             num_rails[rail_length] += count
         num_splices_total += num_splices
 
     # Return the calculated equipment quantities
-    equipment = {
-        "num_modules": num_panels_total,
-        "num_rails": num_rails,
-        "num_mounts": int(num_mounts),
-        "num_mids": num_mids,
-        "num_ends": num_ends,
-        "num_splices": num_splices_total,
-        "span_btwn_anchors": f'{mount_spacing:g}"',
-    }
+    equipment = EquipmentResult(
+        num_modules=num_panels_total,
+        num_rails=num_rails,
+        num_mounts=int(num_mounts),
+        num_mids=num_mids,
+        num_ends=num_ends,
+        num_splices=num_splices_total,
+        span_btwn_anchors=mount_spacing,
+    )
     return equipment
 
 
-def get_row_data(row_data: List[Tuple[int, str]], rail_lengths, user_inputs) -> Dict[str, List[float]]:
-    """Calculate the row lengths, rails, and wastes."""
-    row_lengths = []
-    all_rails = []
-    all_wastes = []
+def get_mount_counts(row_width, user_inputs):
+    """Count the mounts on the top and bottom rails of a row."""
+    from enums import RackingPattern
 
-    # Extract user inputs
-    panel_width = user_inputs["panel_width"]
-    panel_height = user_inputs["panel_height"]
-    panel_spacing = user_inputs["panel_spacing"]
-    rail_protrusion = user_inputs["rail_protrusion"]
+    maximum_rail_span = user_inputs["max._rail_span_btwn_anchors"]
+    rafter_spacing = user_inputs["min._anchor_spacing_interval"]
+    bracket_inset = user_inputs["bracket_inset"]
 
-    # Loop over row data to compute row lengths, rails, and wastes
-    for num_panels, orientation in row_data:
-        # Calculate row width based on panel orientation
-        if orientation == "Landscape":
-            row_width = num_panels * panel_height + (num_panels - 1) * panel_spacing
-        else:
-            row_width = num_panels * panel_width + (num_panels - 1) * panel_spacing
+    mount_spacing = (maximum_rail_span // rafter_spacing) * rafter_spacing
+    bottom_mounts = (row_width - 2 * bracket_inset) // mount_spacing + 2
+
+    if user_inputs["anchor_pattern"] == RackingPattern.CONTINUOUS:
+        top_mounts = bottom_mounts
+    else:
+        # The top rail is offset by half a span
+        top_mounts = (2 * (row_width - 2 * bracket_inset) - mount_spacing) // (2 * mount_spacing) + 3
+
+    return top_mounts, bottom_mounts
+
+
+def get_row_data(
+    row_data: List[Tuple[int, str]] | RowSet, rail_lengths, user_inputs, rail_selections=None
+) -> RailResult:
+    """Calculate the row lengths, rails, and wastes."""
+    unique_rows, _, inverse = as_rowset(row_data).group()
+
+    # Compute each distinct row's rail length, then spread it over the rows
+    unique_lengths = [
+        get_rail_length(num_panels, orientation, user_inputs)
+        for num_panels, orientation in zip(unique_rows.num_panels, unique_rows.orientations)
+    ]
+    row_lengths = tuple(unique_lengths[index] for index in inverse)
 
-        rail_length = row_width + 2 * rail_protrusion
-        rail_counts, _, waste, _ = optimal_rail_selection(rail_length, rail_lengths)
+    if rail_selections is None:
+        unique_selections = [optimal_rail_selection(length, rail_lengths) for length in unique_lengths]
+        rail_selections = [unique_selections[index] for index in inverse]
 
-        # Store calculated values for each row
-        row_lengths.append(round(rail_length, 2))
-        all_rails.append(rail_counts)
-        all_wastes.append(round(waste, 2))
+    # Store calculated values for each row
+    all_rails = tuple(rail_counts for rail_counts, _, _, _ in rail_selections)
+    all_wastes = tuple(waste for _, _, waste, _ in rail_selections)
 
     # Return the calculated row data
-    row_data_results = {
-        "row_lengths": row_lengths,
-        "all_rails": all_rails,
-        "all_wastes": all_wastes
-    }
+    row_data_results = RailResult(row_lengths=row_lengths, all_rails=all_rails, all_wastes=all_wastes)
     return row_data_results
 
 
-def optimal_rail_selection(required_rail_length, available_rails):
-    from itertools import combinations_with_replacement
+def get_main_rails(required_rail_length, available_rails, main_rail_length=None):
+    """Greedily fill a long run with one rail length, returning the rails and the length left over.
 
-    rail_combo = []  # To store the best combination found
+    The main rail is the longest rail that leaves at least half the shortest
+    rail to cover, unless ``main_rail_length`` is given.
+    """
+    rail_combo = []
     min_rail_length = min(available_rails)
     remaining_length = required_rail_length
 
     if required_rail_length > max(available_rails):
-        for rail_length in sorted(available_rails, reverse=True):
-            if required_rail_length > rail_length + min_rail_length / 2:
-                main_rail_length = rail_length
-                break
-        else:
-            main_rail_length = min_rail_length
+        if main_rail_length is None:
+            for rail_length in sorted(available_rails, reverse=True):
+                if 2 * required_rail_length > 2 * rail_length + min_rail_length:
+                    main_rail_length = rail_length
+                    break
+            else:
+                main_rail_length = min_rail_length
         while remaining_length >= main_rail_length + min_rail_length:
             rail_combo.append(main_rail_length)
             remaining_length -= main_rail_length
-        
+
+    return rail_combo, remaining_length
+
+
+def optimal_rail_selection(required_rail_length, available_rails):
+    from itertools import combinations_with_replacement
+
+    # To store the best combination found
+    rail_combo, remaining_length = get_main_rails(required_rail_length, available_rails)
 
     best_last_rail_lengths = []
     min_waste = float("inf")
@@ -193,8 +235,445 @@ def optimal_rail_selection(required_rail_length, available_rails):
     return rail_counts, num_splices, total_waste, rail_combo
 
 
+def anytime_rail_selection(required_rail_length, available_rails, deadline=None):
+    """Select the rails for a run, improving on a quick selection until a deadline.
+
+    The greedy main rails with the shortest cover of the rest are ready at
+    once. The combinations ``optimal_rail_selection`` tries are searched
+    next, and an exact search over every combination of rails proves the
+    least waste possible. ``deadline`` is a ``time.perf_counter()`` time;
+    without one the run is solved to optimality.
+
+    Returns a ``RailSolution`` with the best selection found and the lower
+    bound proven on its waste.
+    """
+    from itertools import combinations_with_replacement
+
+    rails = sorted(set(available_rails))
+    min_rail_length, max_rail_length = rails[0], rails[-1]
+
+    def out_of_time():
+        return deadline is not None and perf_counter() >= deadline
+
+    # Quick selection: longest rails until one rail covers the rest
+    main_rails, remaining_length = get_main_rails(required_rail_length, available_rails)
+    best_rails = list(main_rails)
+    uncovered = remaining_length
+    while uncovered > max_rail_length:
+        best_rails.append(max_rail_length)
+        uncovered -= max_rail_length
+    best_rails.append(next(length for length in rails if length >= uncovered))
+    best_waste = sum(best_rails) - required_rail_length
+
+    # Only multiples of the rails' common step can be covered
+    step = 0
+    for length in rails:
+        step = gcd(step, length)
+    lower_bound = -required_rail_length % step
+    table = None if out_of_time() else _rail_residue_table(tuple(rails), deadline)
+    exact_rails = None if table is None else _least_waste_rails(required_rail_length, rails, step, table, deadline)
+    if exact_rails is not None:
+        lower_bound = sum(exact_rails) - required_rail_length
+
+    # Remainder combinations, as optimal_rail_selection tries them, while any can still do better
+    search_waste = inf
+    num_tried = 0
+    timed_out = False
+    for i in range(1, len(available_rails) + 1):
+        if timed_out or search_waste == lower_bound or i * min_rail_length - remaining_length > best_waste:
+            break
+        for combo in combinations_with_replacement(available_rails, i):
+            num_tried += 1
+            if num_tried % SOLVE_CHECK_INTERVAL == 0 and out_of_time():
+                timed_out = True
+                break
+            waste = sum(combo) - remaining_length
+            if 0 <= waste < search_waste:
+                search_waste = waste
+                if waste <= best_waste:
+                    best_rails, best_waste = main_rails + list(combo), waste
+
+    # The exact search only wins if it saves waste; the combinations above use fewer rails
+    if exact_rails is not None and lower_bound < best_waste:
+        best_rails, best_waste = exact_rails, lower_bound
+
+    return RailSolution(
+        rail_counts={length: best_rails.count(length) * 2 for length in available_rails},
+        num_splices=0 if len(best_rails) < 2 else (len(best_rails) - 1) * 2,
+        total_waste=best_waste * 2,
+        rail_combo=tuple(best_rails),
+        lower_bound=lower_bound * 2,
+    )
+
+
+_residue_searches = {}  # Rail residue searches, finished or paused at a deadline, by rails
+
+
+def _rail_residue_table(rails, deadline=None):
+    """Find the shortest total of rails in every residue class modulo the longest rail.
+
+    Lengths are in units of the rails' common step, and ties are broken by
+    the number of rails. Any longer total in a class is reachable by adding
+    longest rails, so the table settles which totals can be made at all.
+    Returns None if the deadline passes first; the search then resumes
+    where it stopped on the next call with the same rails.
+    """
+    search = _residue_searches.get(rails)
+    if search is None:
+        search = _residue_searches[rails] = _ResidueSearch(rails)
+    return search.run(deadline)
+
+
+class _ResidueSearch:
+    """Dijkstra over the residues modulo the longest rail, with each rail an edge."""
+
+    __slots__ = ("sizes", "modulus", "totals", "last_rails", "heap", "table")
+
+    def __init__(self, rails):
+        step = 0
+        for length in rails:
+            step = gcd(step, length)
+        self.sizes = [length // step for length in rails]
+        self.modulus = self.sizes[-1]
+        self.totals = [(inf, inf)] * self.modulus  # (total, number of rails)
+        self.last_rails = [-1] * self.modulus  # Index of the last rail added to reach each total
+        self.totals[0] = (0, 0)
+        self.heap = [(0, 0, 0)]
+        self.table = None
+
+    def run(self, deadline=None):
+        """Search until every residue is settled or the deadline passes, returning the table or None."""
+        if self.table is not None:
+            return self.table
+        sizes, modulus, totals, last_rails, heap = (
+            self.sizes[:-1], self.modulus, self.totals, self.last_rails, self.heap
+        )
+        num_edges = 0
+        while heap:
+            total, num_rails, residue = heappop(heap)
+            if (total, num_rails) > totals[residue]:
+                continue
+            for i, size in enumerate(sizes):
+                num_edges += 1
+                if num_edges % SOLVE_CHECK_INTERVAL == 0 and deadline is not None and perf_counter() >= deadline:
+                    # Relaxing a residue's edges again is harmless, so it goes back to be finished later
+                    heappush(heap, (total, num_rails, residue))
+                    return None
+                reached = (total + size, num_rails + 1)
+                next_residue = reached[0] % modulus
+                if reached < totals[next_residue]:
+                    totals[next_residue] = reached
+                    last_rails[next_residue] = i
+                    heappush(heap, (*reached, next_residue))
+
+        self.table = totals, last_rails, max(totals)[0]
+        self.heap = None
+        return self.table
+
+
+def _least_waste_rails(required_rail_length, rails, step, table, deadline=None):
+    """Return the rails covering the length with the least waste, from a residue table.
+
+    Returns None if the deadline passes first.
+    """
+    totals, last_rails, largest_total = table
+    modulus = rails[-1] // step
+    need = -(-required_rail_length // step)
+
+    if need >= largest_total:
+        # Every residue can be made short of the need, so its own residue covers it exactly
+        best_residue = need % modulus
+        best = (need, totals[best_residue][1] + (need - totals[best_residue][0]) // modulus)
+    else:
+        best, best_residue = (inf, inf), 0
+        for residue, (total, num_rails) in enumerate(totals):
+            if residue % SOLVE_CHECK_INTERVAL == 0 and deadline is not None and perf_counter() >= deadline:
+                return None
+            num_longest = max(0, -(-(need - total) // modulus))
+            candidate = (total + num_longest * modulus, num_rails + num_longest)
+            if candidate < best:
+                best, best_residue = candidate, residue
+
+    # Rebuild the shortest total of the residue, then pad it with longest rails
+    rail_combo = [rails[-1]] * ((best[0] - totals[best_residue][0]) // modulus)
+    residue = best_residue
+    while residue != 0:
+        length = rails[last_rails[residue]]
+        rail_combo.append(length)
+        residue = (residue - length // step) % modulus
+    return sorted(rail_combo, reverse=True)
+
+
+def get_rail_length(num_panels, orientation, user_inputs):
+    """Calculate the rail length needed for a row, including the protrusion at each end.
+
+    ``orientation`` is a ``rowset`` orientation code.
+    """
+    if orientation == LANDSCAPE:
+        panel_length = user_inputs["panel_height"]
+    else:
+        panel_length = user_inputs["panel_width"]
+    row_width = num_panels * panel_length + (num_panels - 1) * user_inputs["panel_spacing"]
+    return row_width + 2 * user_inputs["rail_protrusion"]
+
+
+def get_rail_selections(row_data, rail_catalog, user_inputs, deadline=None):
+    """Select the rails for every row by the ``rail_selection`` input.
+
+    "Min. Waste" uses ``optimal_rail_selection`` and "Min. Cost" the
+    cheapest rails for the whole array. "Least Waste" uses
+    ``anytime_rail_selection``, which stops improving the rows' rails at
+    ``deadline``, a ``time.perf_counter()`` time, if one is given.
+    """
+    from enums import RailSelection
+
+    rail_lengths = [rail["length"] for rail in rail_catalog]
+    rail_selection = user_inputs.get("rail_selection")
+    if rail_selection == RailSelection.LEAST_WASTE:
+        return [solution.selection for solution in get_rail_solutions(row_data, rail_lengths, user_inputs, deadline)]
+
+    unique_rows, _, inverse = as_rowset(row_data).group()
+    unique_lengths = [
+        get_rail_length(num_panels, orientation, user_inputs)
+        for num_panels, orientation in zip(unique_rows.num_panels, unique_rows.orientations)
+    ]
+
+    # Purchase cost couples the rows through pack rounding, so every row is solved together
+    if rail_selection == RailSelection.COST:
+        return cost_optimal_rail_selections([unique_lengths[index] for index in inverse], rail_catalog)
+
+    unique_selections = [optimal_rail_selection(length, rail_lengths) for length in unique_lengths]
+    return [unique_selections[index] for index in inverse]
+
+
+def get_rail_solutions(row_data, rail_lengths, user_inputs, deadline=None):
+    """Select every row's rails with ``anytime_rail_selection``, returning a ``RailSolution`` per row.
+
+    Rows share one ``deadline``; a row reached after it keeps its quick
+    selection, and its ``gap`` tells how much waste might still be saved.
+    """
+    unique_rows, _, inverse = as_rowset(row_data).group()
+    unique_solutions = [
+        anytime_rail_selection(get_rail_length(num_panels, orientation, user_inputs), rail_lengths, deadline)
+        for num_panels, orientation in zip(unique_rows.num_panels, unique_rows.orientations)
+    ]
+    return [unique_solutions[index] for index in inverse]
+
+
+def clear_rail_caches():
+    """Drop the rail selections cached by the solvers, e.g. after the rail catalog changes."""
+    from inventory import get_rail_candidates
+
+    _rail_cost_table.cache_clear()
+    _cheapest_rail_combo.cache_clear()
+    _residue_searches.clear()
+    get_rail_candidates.cache_clear()
+
+
+_COST_CELLS = 1 << 16  # Most DP cells in a rail cost table before its grid is coarsened
+
+
+def cost_optimal_rail_selection(required_rail_length, rail_catalog, free_lengths=(), by_waste=False):
+    """Find the cheapest rail combination covering the required rail length.
+
+    Rails whose length is in ``free_lengths`` cost nothing, e.g. spare rails
+    in packs that are already being bought. With ``by_waste`` every rail is
+    priced by its length, which minimizes waste instead. Ties in cost are
+    broken by waste, then by the number of pieces.
+
+    The cheapest rails are exact on the catalog's own length step unless
+    the table for it would exceed ``_COST_CELLS``; very fine catalogs are
+    then solved on a coarser grid, which is approximate.
+    """
+    if by_waste and not free_lengths:
+        # The residue search is exact for waste at any run length and catalog step
+        rails = sorted({rail["length"] for rail in rail_catalog})
+        step = 0
+        for length in rails:
+            step = gcd(step, length)
+        rail_combo = _least_waste_rails(required_rail_length, rails, step, _rail_residue_table(tuple(rails)))
+    else:
+        rail_combo = list(
+            _cheapest_rail_combo(
+                required_rail_length,
+                tuple(
+                    (rail["length"], rail["length"] if by_waste else rail["price"])
+                    for rail in rail_catalog
+                ),
+                frozenset(free_lengths),
+            )
+        )
+
+    rail_counts = {rail["length"]: rail_combo.count(rail["length"]) * 2 for rail in rail_catalog}
+    num_splices = 0 if len(rail_combo) < 2 else (len(rail_combo) - 1) * 2
+    total_waste = (sum(rail_combo) - required_rail_length) * 2
+
+    return rail_counts, num_splices, total_waste, rail_combo
+
+
+@lru_cache(maxsize=64)
+def _rail_cost_table(rails, free_lengths):
+    """Build the min-cost table of exact rail totals for a priced rail catalog."""
+    # Integer prices (in cents), cheapest first and longest first on ties
+    candidates = sorted(
+        ((0 if length in free_lengths else round(price * 100), length) for length, price in rails),
+        key=lambda candidate: (candidate[0], -candidate[1]),
+    )
+
+    # Drop rails that a longer rail matches or beats on price
+    items = []
+    for cents, length in candidates:
+        if not items or length > items[-1][1]:
+            items.append((cents, length))
+
+    # Cells are the common step between rail lengths
+    step = 0
+    for _, length in items:
+        step = gcd(step, length)
+    prices = [cents for cents, _ in items]
+
+    def cheapest_per_length(sizes):
+        return min(range(len(items)), key=lambda i: (prices[i] / sizes[i], -sizes[i]))
+
+    # Among any n rails, n being the cheapest rail's size, some have a total that is a multiple of
+    # n, and cheapest rails cover that total for no more. So a cheapest cover has fewer than n other
+    # rails, and only the last (n - 1) * max_size of a run needs solving; the rest is cheapest rails.
+    sizes = [length // step for _, length in items]
+    num_cells = sizes[cheapest_per_length(sizes)] * max(sizes)
+    if num_cells > _COST_CELLS:
+        # Too fine to solve exactly, so the grid is coarsened. Rounding rail sizes down means a
+        # combination never covers less than the table says, but it may cost a little more.
+        step *= isqrt(-(-num_cells // _COST_CELLS) - 1) + 1
+        sizes = [length // step for _, length in items]
+    best = cheapest_per_length(sizes)
+    max_size = max(sizes)
+    window = (sizes[best] - 1) * max_size
+    limit = window + sizes[best] + max_size
+
+    costs = [inf] * (limit + 1)
+    pieces = [0] * (limit + 1)
+    choice = [-1] * (limit + 1)
+    costs[0] = 0
+    for total in range(1, limit + 1):
+        for i, size in enumerate(sizes):
+            if size <= total:
+                cost = costs[total - size] + prices[i]
+                if cost < costs[total] or (
+                    cost == costs[total] and pieces[total - size] + 1 < pieces[total]
+                ):
+                    costs[total] = cost
+                    pieces[total] = pieces[total - size] + 1
+                    choice[total] = i
+
+    return items, step, sizes, best, window, costs, pieces, choice
+
+
+@lru_cache(maxsize=4096)
+def _cheapest_rail_combo(required_rail_length, rails, free_lengths):
+    """Solve the unbounded min-cost covering problem for a single rail run."""
+    items, step, sizes, best, window, costs, pieces, choice = _rail_cost_table(rails, free_lengths)
+
+    # Fill the bulk of the run with the most cost-efficient rail
+    need = -(-required_rail_length // step)
+    fill = max(0, (need - window) // sizes[best])
+    remaining = need - fill * sizes[best]
+
+    # Any cheapest cover overshoots by less than its shortest piece
+    total = min(
+        range(remaining, remaining + max(sizes)),
+        key=lambda t: (costs[t], t - remaining, pieces[t]),
+    )
+
+    rail_combo = [items[best][1]] * fill
+    while total > 0:
+        rail_combo.append(items[choice[total]][1])
+        total -= sizes[choice[total]]
+
+    return tuple(sorted(rail_combo, reverse=True))
+
+
+def cost_optimal_rail_selections(required_lengths, rail_catalog):
+    """Select the rails for all rows at the lowest pack-rounded purchase cost.
+
+    Each row starts with its cheapest and its least wasteful combination.
+    Rows are then revisited one at a time, also trying the combination that
+    treats the spare rails in partially used packs as free, and keep whichever
+    candidate lowers the purchase cost of the whole array until none does.
+    """
+    pack_sizes = {rail["length"]: rail["pack_size"] for rail in rail_catalog}
+    candidates = [
+        [
+            cost_optimal_rail_selection(length, rail_catalog),
+            cost_optimal_rail_selection(length, rail_catalog, by_waste=True),
+        ]
+        for length in required_lengths
+    ]
+
+    def total_rails(selections):
+        num_rails = {rail["length"]: 0 for rail in rail_catalog}
+        for rail_counts, _, _, _ in selections:
+            for length, count in rail_counts.items():
+                num_rails[length] += count
+        return num_rails
+
+    # Start from whichever uniform choice is cheaper overall
+    selections, num_rails, rail_cost = min(
+        (
+            (selections, num_rails, get_purchase_data(num_rails, rail_catalog).rail_cost)
+            for selections in ([row[0] for row in candidates], [row[1] for row in candidates])
+            for num_rails in [total_rails(selections)]
+        ),
+        key=lambda start: start[2],
+    )
+
+    improved = True
+    while improved:
+        improved = False
+        for row_num, required_length in enumerate(required_lengths):
+            # Both rails of a row use the same combination, so spares are used in pairs
+            free_lengths = [
+                length
+                for length, count in num_rails.items()
+                if -count % pack_sizes[length] >= 2
+            ]
+            row_candidates = candidates[row_num]
+            if free_lengths:
+                row_candidates = row_candidates + [
+                    cost_optimal_rail_selection(required_length, rail_catalog, free_lengths)
+                ]
+
+            for candidate in row_candidates:
+                candidate_rails = {
+                    length: count - selections[row_num][0][length] + candidate[0][length]
+                    for length, count in num_rails.items()
+                }
+                candidate_cost = get_purchase_data(candidate_rails, rail_catalog).rail_cost
+
+                if candidate_cost < rail_cost:
+                    selections[row_num] = candidate
+                    num_rails = candidate_rails
+                    rail_cost = candidate_cost
+                    improved = True
+
+    return selections
+
+
+def get_purchase_data(num_rails, rail_catalog):
+    """Round the rail counts up to whole packs and price the purchase."""
+    num_packs = {}
+    rail_cost = 0.0
+
+    for rail in rail_catalog:
+        pack_size = rail["pack_size"]
+        num_packs[rail["length"]] = -(-num_rails.get(rail["length"], 0) // pack_size)
+        rail_cost += num_packs[rail["length"]] * pack_size * rail["price"]
+
+    purchase = PurchaseResult(num_packs=num_packs, rail_cost=round(rail_cost, 2))
+    return purchase
+
+
 def get_psf_data(row_data, user_inputs):
-    psf_data = []
+    unique_psf = []
 
     panel_width = user_inputs["panel_width"]
     panel_height = user_inputs["panel_height"]
@@ -205,8 +684,9 @@ def get_psf_data(row_data, user_inputs):
     landscape_rail_inset = user_inputs["l_rail_inset"]
     truss_structure = user_inputs["truss_structure"]
 
-    for num_panels, orientation in row_data:
-        if orientation == "Landscape":
+    unique_rows, _, inverse = as_rowset(row_data).group()
+    for num_panels, orientation in zip(unique_rows.num_panels, unique_rows.orientations):
+        if orientation == LANDSCAPE:
             row_width = num_panels * panel_height + (num_panels - 1) * panel_spacing
             footprint_height = panel_width - 2 * landscape_rail_inset
         else:
@@ -216,12 +696,13 @@ def get_psf_data(row_data, user_inputs):
         footprint_width = row_width - 2 * bracket_inset
 
         if truss_structure:
-            footprint_area = (footprint_width + 78.7402) * (footprint_height + 78.7402)
+            footprint_area = (footprint_width + TRUSS_BUFFER) * (footprint_height + TRUSS_BUFFER)
         else:
             footprint_area = footprint_width * footprint_height
 
-        psf = round(num_panels * panel_weight / footprint_area * 144, 2)
+        psf = round(num_panels * panel_weight / footprint_area * 144 * LENGTH_SCALE**2, 2)
 
-        psf_data.append(psf)
+        unique_psf.append(psf)
 
+    psf_data = [unique_psf[index] for index in inverse]
     return psf_data
@@ -0,0 +1,131 @@
+import tracemalloc
+from collections import Counter
+from dataclasses import dataclass
+from time import monotonic
+from typing import Tuple
+
+MAX_IDLE = 256  # Most hidden widgets a pool keeps per key before destroying the rest
+TRACE_FRAMES = 10  # Stack frames tracemalloc keeps per allocation
+TOP_GROWTH = 10  # Allocation sites listed per view
+
+
+class WidgetPool:
+    """Hidden widgets kept for reuse by views that are rebuilt often.
+
+    Widgets are released with ``grid_forget`` and handed out again by key;
+    any beyond ``max_idle`` per key are destroyed, so a view never holds
+    more widgets than it has shown at once plus the pool's limit.
+    """
+
+    def __init__(self, max_idle=MAX_IDLE):
+        self.max_idle = max_idle
+        self.idle = {}  # Hidden widgets by key
+
+    def acquire(self, key, create):
+        """Return a hidden widget for the key, or a new one from ``create()``."""
+        idle = self.idle.get(key)
+        return idle.pop() if idle else create()
+
+    def release(self, key, widget):
+        """Hide a widget for reuse, or destroy it if the pool is full."""
+        widget.grid_forget()
+        idle = self.idle.setdefault(key, [])
+        if len(idle) < self.max_idle:
+            idle.append(widget)
+        else:
+            widget.destroy()
+
+    def clear(self):
+        """Destroy every hidden widget."""
+        for idle in self.idle.values():
+            for widget in idle:
+                widget.destroy()
+        self.idle.clear()
+
+    def __len__(self):
+        return sum(len(idle) for idle in self.idle.values())
+
+
+def clear_frame(frame):
+    """Destroy every widget in a frame; forgetting them would keep them alive."""
+    for child in frame.winfo_children():
+        child.destroy()
+
+
+def count_widgets(widget):
+    """Count the widgets under a widget, itself included, by class name."""
+    counts = Counter()
+    stack = [widget]
+    while stack:
+        widget = stack.pop()
+        counts[type(widget).__name__] += 1
+        stack.extend(widget.winfo_children())
+    return counts
+
+
+@dataclass(frozen=True, slots=True)
+class ViewSample:
+    """Widget count and traced memory after a view was updated.
+
+    Growth is against the first sample of the view, as (allocation site,
+    bytes) pairs, largest first.
+    """
+
+    view: str
+    num_updates: int
+    num_widgets: int
+    widget_growth: int
+    traced_memory: int
+    memory_growth: int
+    top_growth: Tuple[Tuple[str, int], ...]
+    time: float
+
+
+class WidgetTelemetry:
+    """Live widget counts and ``tracemalloc`` snapshots of each view of the app.
+
+    Each ``record`` compares the view with its first sample, so a view
+    whose widgets or memory keep growing across updates stands out. Only
+    the first and latest snapshot of a view are kept.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACE_FRAMES)
+        self.baselines = {}  # (num_widgets, traced memory, snapshot) by view
+        self.samples = {}  # Latest ViewSample by view
+
+    def record(self, view, widget=None):
+        """Sample a view after an update, counting the widgets under ``widget`` (or the whole app)."""
+        num_widgets = sum(count_widgets(widget or self.root).values())
+        traced_memory, _ = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            (tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__))
+        )
+
+        if view not in self.baselines:
+            self.baselines[view] = (num_widgets, traced_memory, snapshot)
+        base_widgets, base_memory, base_snapshot = self.baselines[view]
+        top_growth = tuple(
+            (str(stat.traceback[0]), stat.size_diff)
+            for stat in snapshot.compare_to(base_snapshot, "lineno")[:TOP_GROWTH]
+            if stat.size_diff > 0
+        )
+
+        previous = self.samples.get(view)
+        self.samples[view] = ViewSample(
+            view=view,
+            num_updates=previous.num_updates + 1 if previous else 1,
+            num_widgets=num_widgets,
+            widget_growth=num_widgets - base_widgets,
+            traced_memory=traced_memory,
+            memory_growth=traced_memory - base_memory,
+            top_growth=top_growth,
+            time=monotonic(),
+        )
+        return self.samples[view]
+
+    def widget_counts(self):
+        """Count the app's live widgets by class name."""
+        return count_widgets(self.root)
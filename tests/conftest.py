@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The app's modules import each other as top-level modules from src
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
@@ -0,0 +1,83 @@
+from random import Random
+
+import pytest
+
+from anchors import get_anchor_positions
+from enums import RackingPattern
+from rowset import LANDSCAPE, as_rowset
+from units import LENGTH_SCALE, to_length
+from utils import get_mount_counts
+
+
+def make_inputs(**overrides):
+    inputs = {
+        "panel_width": to_length(44.6457),
+        "panel_height": to_length(67.7953),
+        "panel_spacing": to_length(0.625),
+        "max._rail_span_btwn_anchors": to_length(48),
+        "min._anchor_spacing_interval": to_length(16),
+        "bracket_inset": to_length(10),
+        "anchor_pattern": RackingPattern.CONTINUOUS,
+    }
+    inputs.update(overrides)
+    return inputs
+
+
+def row_widths(row_data, user_inputs):
+    widths = []
+    for num_panels, orientation in zip(as_rowset(row_data).num_panels, as_rowset(row_data).orientations):
+        panel_length = user_inputs["panel_height"] if orientation == LANDSCAPE else user_inputs["panel_width"]
+        widths.append(num_panels * panel_length + (num_panels - 1) * user_inputs["panel_spacing"])
+    return widths
+
+
+def assert_anchors_fit(row_data, user_inputs):
+    anchors = get_anchor_positions(row_data, user_inputs)
+    inset = user_inputs["bracket_inset"]
+    for row_num, row_width in enumerate(row_widths(row_data, user_inputs)):
+        start, end = anchors["offsets"][row_num], anchors["offsets"][row_num + 1]
+        for index in range(start, end):
+            assert inset <= anchors["x"][index] <= row_width - inset
+        for rail, count in enumerate(get_mount_counts(row_width, user_inputs)):
+            assert sum(anchors["rail"][index] == rail for index in range(start, end)) == count
+
+
+@pytest.mark.parametrize("pattern", list(RackingPattern))
+def test_default_rows_stay_between_insets(pattern):
+    user_inputs = make_inputs(anchor_pattern=pattern)
+    row_data = [(num_panels, orientation) for num_panels in range(1, 21) for orientation in ("Portrait", "Landscape")]
+    assert_anchors_fit(row_data, user_inputs)
+
+
+def test_last_anchor_is_last_rafter_before_far_inset():
+    user_inputs = make_inputs()
+    anchors = get_anchor_positions([(10, "Portrait")], user_inputs)
+    row_width, = row_widths([(10, "Portrait")], user_inputs)
+    last_x = max(anchors["x"])
+    assert last_x <= row_width - user_inputs["bracket_inset"]
+    assert last_x + user_inputs["min._anchor_spacing_interval"] > row_width - user_inputs["bracket_inset"]
+
+
+def test_staggered_single_panel_stays_on_rail():
+    user_inputs = make_inputs(anchor_pattern=RackingPattern.STAGGERED)
+    anchors = get_anchor_positions([(1, "Portrait")], user_inputs)
+    assert max(anchors["x"]) <= user_inputs["panel_width"] - user_inputs["bracket_inset"]
+
+
+def test_random_inputs_stay_between_insets():
+    rng = Random(0)
+    for _ in range(500):
+        rafter_spacing = int(rng.choice((12, 16, 19.2, 24)) * LENGTH_SCALE)
+        user_inputs = make_inputs(
+            panel_width=rng.randrange(30 * LENGTH_SCALE, 50 * LENGTH_SCALE),
+            panel_height=rng.randrange(55 * LENGTH_SCALE, 85 * LENGTH_SCALE),
+            panel_spacing=rng.randrange(0, LENGTH_SCALE + 1),
+            **{
+                "max._rail_span_btwn_anchors": rafter_spacing * rng.randint(1, 4) + rng.randrange(rafter_spacing),
+                "min._anchor_spacing_interval": rafter_spacing,
+            },
+            bracket_inset=rng.randrange(0, 12 * LENGTH_SCALE),
+            anchor_pattern=rng.choice(list(RackingPattern)),
+        )
+        row_data = [(rng.randint(1, 30), rng.choice(("Portrait", "Landscape"))) for _ in range(5)]
+        assert_anchors_fit(row_data, user_inputs)
@@ -0,0 +1,88 @@
+import os
+
+import pytest
+
+from archive import ProjectArchive
+from rowset import as_rowset
+from test_project import PLANE_INPUTS
+from test_rail_selection import RAIL_CATALOG, RAIL_LENGTHS
+from utils import get_equipment_data, get_psf_data, get_purchase_data, get_rail_selections, get_row_data
+
+ROW_DATA = [
+    [(10, "Portrait"), (5, "Landscape")],
+    [(7, "Landscape"), (12, "Portrait"), (3, "Portrait")],
+    [(4, "Portrait")],
+]
+
+
+def make_project(name, row_data):
+    rail_selections = get_rail_selections(row_data, RAIL_CATALOG, PLANE_INPUTS)
+    equipment = get_equipment_data(row_data, RAIL_LENGTHS, PLANE_INPUTS, rail_selections)
+    rails = get_row_data(row_data, RAIL_LENGTHS, PLANE_INPUTS, rail_selections)
+    purchase = get_purchase_data(equipment.num_rails, RAIL_CATALOG)
+    return name, PLANE_INPUTS, row_data, equipment, rails, purchase, list(get_psf_data(row_data, PLANE_INPUTS))
+
+
+PROJECTS = [make_project(f"Project {i}", row_data) for i, row_data in enumerate(ROW_DATA)]
+
+
+def assert_archived(archived, project):
+    name, user_inputs, row_data, equipment, rails, purchase, psf = project
+    assert archived.name == name
+    assert archived.user_inputs == user_inputs
+    assert archived.row_data == as_rowset(row_data)
+    assert archived.equipment == equipment
+    assert archived.rails == rails
+    assert archived.purchase == purchase
+    assert archived.psf == pytest.approx(psf)
+
+
+def test_projects_read_back_after_reopening(tmp_path):
+    path = tmp_path / "projects.rba"
+    with ProjectArchive(path, writable=True) as archive:
+        assert archive.append(PROJECTS[:2]) == 0
+        assert archive.append(PROJECTS[2:]) == 2
+        assert len(archive) == 3
+
+    with ProjectArchive(path) as archive:
+        assert len(archive) == 3
+        for archived, project in zip(archive, PROJECTS):
+            assert_archived(archived, project)
+        assert_archived(archive[1], PROJECTS[1])
+        assert archive.column("num_mounts").tolist() == [project[3].num_mounts for project in PROJECTS]
+        assert archive.column("rail_cost").tolist() == [project[5].rail_cost for project in PROJECTS]
+        with pytest.raises(ValueError):
+            archive.append(PROJECTS)
+
+
+def test_lost_index_is_rebuilt_from_the_records(tmp_path):
+    path = tmp_path / "projects.rba"
+    with ProjectArchive(path, writable=True) as archive:
+        archive.append(PROJECTS)
+        index_offset = archive.index_offset
+
+    # The index is cut off, as if the file were copied before it was written
+    os.truncate(path, index_offset + 4)
+    with ProjectArchive(path) as archive:
+        assert len(archive) == 3
+        assert_archived(archive[2], PROJECTS[2])
+
+
+def test_interrupted_append_keeps_the_complete_records(tmp_path):
+    path = tmp_path / "projects.rba"
+    with ProjectArchive(path, writable=True) as archive:
+        archive.append(PROJECTS[:1])
+        archive.append(PROJECTS[1:])
+        third_start = archive.offsets[2]
+
+    # The append stopped partway through its last record, before the header was updated
+    os.truncate(path, third_start + 16)
+    with ProjectArchive(path, writable=True) as archive:
+        assert len(archive) == 2
+        assert_archived(archive[1], PROJECTS[1])
+
+        # Appending carries on from the complete records
+        assert archive.append(PROJECTS[2:]) == 2
+    with ProjectArchive(path) as archive:
+        for archived, project in zip(archive, PROJECTS):
+            assert_archived(archived, project)
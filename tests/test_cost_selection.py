@@ -0,0 +1,79 @@
+from math import inf
+from random import Random
+
+import pytest
+
+from units import LENGTH_SCALE
+from utils import cost_optimal_rail_selection, get_purchase_data
+
+
+def cheapest_cover(required_rail_length, catalog):
+    """Brute force the (cost in cents, waste) of the cheapest rails covering the length, for whole-inch rails."""
+    sizes = [rail["length"] // LENGTH_SCALE for rail in catalog]
+    cents = [round(rail["price"] * 100) for rail in catalog]
+    need = -(-required_rail_length // LENGTH_SCALE)
+    costs = [0] + [inf] * (need + max(sizes))
+    for total in range(1, len(costs)):
+        costs[total] = min(
+            (costs[total - size] + price for size, price in zip(sizes, cents) if size <= total), default=inf
+        )
+    return min((costs[total], total * LENGTH_SCALE - required_rail_length) for total in range(need, len(costs)))
+
+
+def random_catalogs(num_cases, seed=0):
+    rng = Random(seed)
+    for _ in range(num_cases):
+        lengths = sorted({rng.randrange(36, 241) for _ in range(rng.randint(1, 4))})
+        catalog = [
+            {"length": length * LENGTH_SCALE, "price": round(length * rng.uniform(0.3, 0.6), 2), "pack_size": 1}
+            for length in lengths
+        ]
+        yield rng.randrange(LENGTH_SCALE, 3000 * LENGTH_SCALE), catalog
+
+
+def test_cheapest_rails_match_brute_force():
+    for required_rail_length, catalog in random_catalogs(150):
+        rail_counts, num_splices, total_waste, rail_combo = cost_optimal_rail_selection(required_rail_length, catalog)
+        prices = {rail["length"]: rail["price"] for rail in catalog}
+        cost = sum(round(prices[length] * 100) for length in rail_combo)
+        assert sum(rail_combo) >= required_rail_length
+        assert (cost, total_waste // 2) == cheapest_cover(required_rail_length, catalog)
+        assert num_splices == 2 * max(len(rail_combo) - 1, 0)
+        assert rail_counts == {length: 2 * rail_combo.count(length) for length in prices}
+
+
+# Long runs over rails of nearly the same price per inch, which need more than a few rails solved exactly
+@pytest.mark.parametrize(
+    "required_rail_length, lengths_and_prices",
+    [
+        (2533403, [(197, 96.93), (239, 118.3)]),
+        (2421513, [(174, 88.61), (180, 90.14)]),
+        (2625079, [(228, 113.37), (240, 121.37)]),
+    ],
+)
+def test_cheapest_rails_of_long_runs(required_rail_length, lengths_and_prices):
+    catalog = [{"length": length * LENGTH_SCALE, "price": price, "pack_size": 1} for length, price in lengths_and_prices]
+    prices = {rail["length"]: rail["price"] for rail in catalog}
+    _, _, total_waste, rail_combo = cost_optimal_rail_selection(required_rail_length, catalog)
+    cost = sum(round(prices[length] * 100) for length in rail_combo)
+    assert (cost, total_waste // 2) == cheapest_cover(required_rail_length, catalog)
+
+
+def test_least_waste_rails_match_brute_force():
+    for required_rail_length, catalog in random_catalogs(150, seed=1):
+        by_length = [dict(rail, price=rail["length"] / LENGTH_SCALE / 100) for rail in catalog]
+        _, _, total_waste, rail_combo = cost_optimal_rail_selection(required_rail_length, catalog, by_waste=True)
+        assert sum(rail_combo) >= required_rail_length
+        assert total_waste // 2 == cheapest_cover(required_rail_length, by_length)[1]
+
+
+def test_free_rails_cost_nothing():
+    catalog = [
+        {"length": 140 * LENGTH_SCALE, "price": 64.4, "pack_size": 4},
+        {"length": 185 * LENGTH_SCALE, "price": 81.4, "pack_size": 4},
+    ]
+    _, _, _, rail_combo = cost_optimal_rail_selection(
+        130 * LENGTH_SCALE, catalog, free_lengths=[185 * LENGTH_SCALE]
+    )
+    assert rail_combo == [185 * LENGTH_SCALE]
+    assert get_purchase_data({140 * LENGTH_SCALE: 0, 185 * LENGTH_SCALE: 2}, catalog).num_packs[185 * LENGTH_SCALE] == 1
@@ -0,0 +1,24 @@
+from inventory import _MAX_REMAINDER_RAILS, get_rail_candidates
+from results import RailCandidate
+from test_rail_selection import RAIL_LENGTHS, random_cases
+from utils import get_main_rails, optimal_rail_selection
+
+
+def test_candidates_start_with_the_optimal_selection():
+    for required_rail_length, rails in random_cases(100, seed=2):
+        candidates = get_rail_candidates(required_rail_length, tuple(rails))
+        assert all(isinstance(candidate, RailCandidate) for candidate in candidates)
+        assert candidates[0].rail_combo == tuple(sorted(optimal_rail_selection(required_rail_length, rails)[3]))
+        for candidate in candidates:
+            assert sum(candidate.rail_combo) >= required_rail_length
+            assert candidate.total_waste == 2 * (sum(candidate.rail_combo) - required_rail_length)
+
+
+def test_candidates_of_large_catalogs_are_bounded():
+    rails = tuple(range(60000, 210000, 17000))
+    for candidate in get_rail_candidates(2000000, rails)[1:]:
+        num_main_rails = max(
+            len(get_main_rails(2000000, rails, main_rail_length)[0]) for main_rail_length in (None, *rails)
+        )
+        assert len(candidate.rail_combo) <= num_main_rails + _MAX_REMAINDER_RAILS
+    assert len(get_rail_candidates(2000000, tuple(RAIL_LENGTHS))) == 8
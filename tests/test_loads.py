@@ -0,0 +1,67 @@
+from array import array
+
+import pytest
+
+from enums import RackingPattern
+from loads import _row_loads, get_anchor_loads
+from rowset import PORTRAIT
+from units import to_length
+
+
+def make_inputs(**overrides):
+    inputs = {
+        "panel_width": to_length(44.6457),
+        "panel_height": to_length(67.7953),
+        "panel_weight": 45.8561,
+        "panel_spacing": to_length(0.625),
+        "max._rail_span_btwn_anchors": to_length(48),
+        "min._anchor_spacing_interval": to_length(16),
+        "bracket_inset": to_length(10),
+        "p_rail_inset": to_length(16),
+        "l_rail_inset": to_length(10),
+        "anchor_pattern": RackingPattern.CONTINUOUS,
+        "truss_structure": False,
+    }
+    inputs.update(overrides)
+    return inputs
+
+
+def row_width(num_panels, user_inputs):
+    return num_panels * user_inputs["panel_width"] + (num_panels - 1) * user_inputs["panel_spacing"]
+
+
+def test_anchors_at_the_insets_carry_their_own_stretch():
+    user_inputs = make_inputs()
+    width = row_width(10, user_inputs)
+    inset = user_inputs["bracket_inset"]
+    xs = array("q", [inset, width // 2, width - inset] * 2)
+    rails = array("B", [0, 0, 0, 1, 1, 1])
+
+    loads, psfs = _row_loads(10, PORTRAIT, rails, xs, user_inputs)
+    assert sum(loads) == pytest.approx(10 * user_inputs["panel_weight"])
+    assert min(psfs) > 0
+    assert max(psfs) < 1.1 * min(psfs)
+
+    # Padding spreads the same loads over more roof
+    padded_loads, padded_psfs = _row_loads(10, PORTRAIT, rails, xs, make_inputs(truss_structure=True))
+    assert list(padded_loads) == pytest.approx(list(loads))
+    assert all(0 < padded <= psf for padded, psf in zip(padded_psfs, psfs))
+
+
+def test_anchors_outside_the_insets_keep_psf_consistent():
+    user_inputs = make_inputs()
+    width = row_width(10, user_inputs)
+    xs = array("q", [0, width // 2, width + to_length(6)])
+    loads, psfs = _row_loads(10, PORTRAIT, array("B", [1, 1, 1]), xs, user_inputs)
+    assert sum(loads) == pytest.approx(5 * user_inputs["panel_weight"])
+    assert min(psfs) > 0
+    assert max(psfs) < 1.1 * min(psfs)
+
+
+@pytest.mark.parametrize("pattern", list(RackingPattern))
+def test_row_psfs_are_even(pattern):
+    user_inputs = make_inputs(anchor_pattern=pattern)
+    for row in ((10, "Portrait"), (3, "Landscape"), (1, "Portrait")):
+        anchors = get_anchor_loads([row], user_inputs)
+        assert sum(anchors["load"]) == pytest.approx(row[0] * user_inputs["panel_weight"])
+        assert max(anchors["psf"]) < 1.5 * min(anchors["psf"])
@@ -0,0 +1,42 @@
+from itertools import combinations
+
+import pytest
+
+from enums import RailSelection
+from portfolio import _score_rail_set, optimize_rail_portfolio
+from rowset import LANDSCAPE, PORTRAIT
+from test_rail_selection import make_inputs
+from units import to_length
+from utils import get_rail_length
+
+CANDIDATE_LENGTHS = [to_length(length) for length in (70, 92.5, 120, 140, 168, 185, 204)]
+PRICES = {
+    length: round(length / 1000 * price_per_inch, 2)
+    for length, price_per_inch in zip(CANDIDATE_LENGTHS, (0.5, 0.48, 0.47, 0.46, 0.45, 0.44, 0.47))
+}
+PROJECTS = [
+    ([(10, "Portrait"), (5, "Landscape"), (3, "Portrait")], make_inputs()),
+    ([(7, "Landscape"), (12, "Portrait")], make_inputs(panel_spacing=to_length(1))),
+]
+
+
+def exhaustive_best(k, objective):
+    rows = {}
+    for row_data, user_inputs in PROJECTS:
+        for num_panels, orientation in row_data:
+            required_length = get_rail_length(num_panels, PORTRAIT if orientation == "Portrait" else LANDSCAPE, user_inputs)
+            rows[required_length] = rows.get(required_length, 0) + 1
+    prices = tuple(sorted(PRICES.items()))
+    return min(
+        (_score_rail_set(tuple(rows.items()), rail_set, objective, prices), rail_set)
+        for rail_set in combinations(CANDIDATE_LENGTHS, k)
+    )
+
+
+@pytest.mark.parametrize("objective", [RailSelection.WASTE, RailSelection.COST])
+@pytest.mark.parametrize("k", [1, 2, 3])
+def test_branch_and_bound_matches_exhaustive_search(objective, k):
+    portfolio = optimize_rail_portfolio(PROJECTS, CANDIDATE_LENGTHS, k, objective, PRICES, max_workers=2)
+    score, rail_set = exhaustive_best(k, objective)
+    assert portfolio["rail_lengths"] == rail_set
+    assert portfolio["total"] == round(score, 2)
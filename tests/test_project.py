@@ -0,0 +1,51 @@
+import project
+from enums import RackingPattern
+from project import Project, RoofPlane
+from test_rail_selection import RAIL_CATALOG, make_inputs
+from units import to_length
+
+PLANE_INPUTS = make_inputs(
+    **{
+        "max._rail_span_btwn_anchors": to_length(48),
+        "min._anchor_spacing_interval": to_length(16),
+        "bracket_inset": to_length(10),
+        "p_rail_inset": to_length(16),
+        "l_rail_inset": to_length(10),
+        "panel_weight": 50.0,
+        "truss_structure": False,
+        "anchor_pattern": RackingPattern.CONTINUOUS,
+    }
+)
+
+
+def make_planes():
+    return [
+        RoofPlane.create("North", PLANE_INPUTS, [(10, "Portrait"), (5, "Landscape")]),
+        RoofPlane.create("South", PLANE_INPUTS, [(7, "Landscape"), (12, "Portrait"), (3, "Portrait")]),
+        RoofPlane.create("East", PLANE_INPUTS, [(4, "Portrait")]),
+    ]
+
+
+def test_small_projects_are_solved_inline():
+    with Project(make_planes()) as inline:
+        result = inline.calculate(RAIL_CATALOG)
+        assert inline._executor is None
+    assert [plane.name for plane in result.planes] == ["North", "South", "East"]
+
+
+def test_worker_pool_is_reused_and_shut_down(monkeypatch):
+    with Project(make_planes()) as inline:
+        expected = inline.calculate(RAIL_CATALOG)
+
+    monkeypatch.setattr(project, "PARALLEL_ROWS", 1)
+    with Project(make_planes(), max_workers=2) as parallel:
+        assert parallel.calculate(RAIL_CATALOG) == expected
+        executor = parallel._executor
+        assert executor is not None
+
+        # A changed plane is solved again on the same workers
+        parallel.planes[0] = RoofPlane.create("North", PLANE_INPUTS, [(11, "Portrait")])
+        parallel.planes[1] = RoofPlane.create("South", PLANE_INPUTS, [(6, "Landscape")])
+        parallel.calculate(RAIL_CATALOG)
+        assert parallel._executor is executor
+    assert parallel._executor is None
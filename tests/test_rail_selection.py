@@ -0,0 +1,108 @@
+from random import Random
+from time import perf_counter
+
+from enums import RackingPattern, RailSelection
+from rowset import LANDSCAPE, PORTRAIT
+from units import LENGTH_SCALE, convert_rail_catalog, to_length
+from utils import (
+    anytime_rail_selection,
+    get_equipment_data,
+    get_rail_length,
+    get_rail_selections,
+    get_rail_solutions,
+    optimal_rail_selection,
+)
+
+RAIL_CATALOG = convert_rail_catalog(
+    [
+        {"length": 70.0, "price": 35.0, "pack_size": 1},
+        {"length": 92.5, "price": 44.4, "pack_size": 1},
+        {"length": 140.0, "price": 64.4, "pack_size": 1},
+        {"length": 185.0, "price": 81.4, "pack_size": 1},
+    ]
+)
+RAIL_LENGTHS = [rail["length"] for rail in RAIL_CATALOG]
+
+
+def make_inputs(**overrides):
+    inputs = {
+        "panel_width": to_length(44.6457),
+        "panel_height": to_length(67.7953),
+        "panel_spacing": to_length(0.625),
+        "rail_protrusion": to_length(4),
+        "rail_selection": RailSelection.WASTE,
+    }
+    inputs.update(overrides)
+    return inputs
+
+
+def least_waste(required_rail_length, rails):
+    """Brute force the least total of rails covering the length, for whole-inch rails."""
+    step = LENGTH_SCALE
+    need = -(-required_rail_length // step)
+    sizes = [length // step for length in rails]
+    reachable = [True] + [False] * (need + max(sizes))
+    for total in range(1, len(reachable)):
+        reachable[total] = any(size <= total and reachable[total - size] for size in sizes)
+    return next(total for total in range(need, len(reachable)) if reachable[total]) * step - required_rail_length
+
+
+def random_cases(num_cases, seed=0):
+    rng = Random(seed)
+    for _ in range(num_cases):
+        rails = sorted({rng.randrange(36, 241) * LENGTH_SCALE for _ in range(rng.randint(2, 4))})
+        yield rng.randrange(LENGTH_SCALE, 800 * LENGTH_SCALE), rails
+
+
+def test_default_selection_is_optimal_rail_selection():
+    user_inputs = make_inputs()
+    row_data = [(10, "Portrait"), (5, "Landscape"), (10, "Portrait")]
+    selections = get_rail_selections(row_data, RAIL_CATALOG, user_inputs)
+    assert selections == [
+        optimal_rail_selection(get_rail_length(10, PORTRAIT, user_inputs), RAIL_LENGTHS),
+        optimal_rail_selection(get_rail_length(5, LANDSCAPE, user_inputs), RAIL_LENGTHS),
+        optimal_rail_selection(get_rail_length(10, PORTRAIT, user_inputs), RAIL_LENGTHS),
+    ]
+
+
+def test_equipment_uses_optimal_rail_selection_by_default():
+    user_inputs = make_inputs(
+        **{
+            "max._rail_span_btwn_anchors": to_length(48),
+            "min._anchor_spacing_interval": to_length(16),
+            "bracket_inset": to_length(10),
+            "anchor_pattern": RackingPattern.CONTINUOUS,
+        }
+    )
+    row_data = [(10, "Portrait"), (5, "Landscape"), (10, "Portrait")]
+    selections = get_rail_selections(row_data, RAIL_CATALOG, user_inputs)
+    assert get_equipment_data(row_data, RAIL_LENGTHS, user_inputs) == get_equipment_data(
+        row_data, RAIL_LENGTHS, user_inputs, selections
+    )
+
+
+def test_anytime_without_deadline_matches_reference_or_saves_waste():
+    for required_rail_length, rails in random_cases(300):
+        reference = optimal_rail_selection(required_rail_length, rails)
+        solution = anytime_rail_selection(required_rail_length, rails)
+        assert solution.optimal
+        assert solution.total_waste == 2 * least_waste(required_rail_length, rails)
+        assert sum(solution.rail_combo) >= required_rail_length
+        assert solution.total_waste <= reference[2]
+        if solution.total_waste == reference[2]:
+            assert solution.selection == reference
+
+
+def test_anytime_after_deadline_reports_its_gap():
+    for required_rail_length, rails in random_cases(100, seed=1):
+        solution = anytime_rail_selection(required_rail_length, rails, deadline=perf_counter() - 1)
+        assert sum(solution.rail_combo) >= required_rail_length
+        assert 0 <= solution.lower_bound <= 2 * least_waste(required_rail_length, rails) <= solution.total_waste
+        assert solution.gap == solution.total_waste - solution.lower_bound
+
+
+def test_least_waste_selection_is_opt_in():
+    user_inputs = make_inputs(rail_selection=RailSelection.LEAST_WASTE)
+    row_data = [(10, "Portrait"), (5, "Landscape")]
+    solutions = get_rail_solutions(row_data, RAIL_LENGTHS, user_inputs)
+    assert get_rail_selections(row_data, RAIL_CATALOG, user_inputs) == [solution.selection for solution in solutions]
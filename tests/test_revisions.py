@@ -0,0 +1,85 @@
+from random import Random
+
+import pytest
+
+from enums import RailSelection
+from results import RowChange
+from revisions import CHUNK_SIZE, Revision, bom_delta, diff_rows
+from test_project import PLANE_INPUTS
+from test_rail_selection import RAIL_CATALOG, RAIL_LENGTHS
+from units import to_length
+from utils import get_equipment_data, get_rail_selections
+
+
+def random_rows(rng, num_rows):
+    return [(rng.randint(1, 20), rng.choice(("Portrait", "Landscape"))) for _ in range(num_rows)]
+
+
+def random_edits(seed, num_edits=30):
+    """Yield revisions from random splices, each with the list of rows it should hold."""
+    rng = Random(seed)
+    rows = random_rows(rng, 3 * CHUNK_SIZE + 5)
+    revision = Revision.create(PLANE_INPUTS, rows)
+    for _ in range(num_edits):
+        start = rng.randint(0, len(rows))
+        stop = rng.randint(start, min(len(rows), start + rng.choice((0, 1, 3, 2 * CHUNK_SIZE))))
+        new_rows = random_rows(rng, rng.choice((0, 1, 2, CHUNK_SIZE + 1)))
+        edited = revision.splice(start, stop, new_rows)
+        yield revision, edited, rows[:start] + new_rows + rows[stop:], (start, stop, len(new_rows))
+        revision, rows = edited, rows[:start] + new_rows + rows[stop:]
+
+
+def solve(revision):
+    rail_selections = get_rail_selections(revision.row_data, RAIL_CATALOG, revision.user_inputs)
+    return get_equipment_data(revision.row_data, RAIL_LENGTHS, revision.user_inputs, rail_selections)
+
+
+def assert_delta_matches_full_solve(old, new):
+    delta = bom_delta(old, new, RAIL_CATALOG)
+    before, after = solve(old), solve(new)
+    for field in ("num_modules", "num_mounts", "num_mids", "num_ends", "num_splices"):
+        assert getattr(delta, field) == getattr(after, field) - getattr(before, field)
+    assert delta.num_rails == {length: after.num_rails[length] - before.num_rails[length] for length in RAIL_LENGTHS}
+
+
+def test_splices_match_editing_a_list():
+    for old, new, rows, (start, stop, _) in random_edits(seed=0):
+        assert list(new.row_data) == rows
+        assert len(new) == len(rows)
+
+        # Chunks wholly before or after the splice are shared, not copied
+        offset = 0
+        for chunk in old.chunks:
+            if offset + len(chunk) <= start or offset >= stop > start:
+                assert any(chunk is new_chunk for new_chunk in new.chunks)
+            offset += len(chunk)
+    with pytest.raises(ValueError):
+        new.splice(len(new) + 1, len(new) + 1)
+
+
+def test_diff_rows_finds_the_spliced_rows():
+    for old, new, rows, (start, stop, num_new) in random_edits(seed=1):
+        changes = diff_rows(old, new)
+        assert len(changes) <= max(stop - start, num_new)
+        assert all(change.after == rows[change.row_num] for change in changes if change.after)
+        num_added = sum(change.before is None for change in changes)
+        num_removed = sum(change.after is None for change in changes)
+        assert num_added - num_removed == num_new - (stop - start)
+    assert diff_rows(new, new) == ()
+
+    revision = Revision.create(PLANE_INPUTS, [(10, "Portrait")] * (2 * CHUNK_SIZE))
+    edited = revision.splice(CHUNK_SIZE + 3, CHUNK_SIZE + 4, [(8, "Landscape")])
+    assert diff_rows(revision, edited) == (RowChange(CHUNK_SIZE + 3, (10, "Portrait"), (8, "Landscape")),)
+
+
+@pytest.mark.parametrize("rail_selection", [RailSelection.WASTE, RailSelection.COST])
+def test_bom_delta_matches_a_full_solve(rail_selection):
+    for old, new, _, _ in random_edits(seed=2, num_edits=10):
+        old = old.with_inputs(dict(old.user_inputs, rail_selection=rail_selection))
+        new = new.with_inputs(dict(new.user_inputs, rail_selection=rail_selection))
+        assert_delta_matches_full_solve(old, new)
+
+
+def test_bom_delta_of_new_inputs_matches_a_full_solve():
+    for old, new, _, _ in random_edits(seed=3, num_edits=5):
+        assert_delta_matches_full_solve(old, new.with_inputs(dict(new.user_inputs, panel_spacing=to_length(0.5))))
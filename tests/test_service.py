@@ -0,0 +1,61 @@
+from http.client import HTTPConnection
+from json import dumps, loads
+from threading import Thread
+
+import pytest
+
+from service import CalculationServer, calculate, parse_job
+from test_rail_selection import RAIL_CATALOG
+
+JOB = {
+    "inputs": {"panel_width": 44.6457, "panel_height": 67.7953, "panel_weight": 50},
+    "rows": [[10, "Portrait"], [5, "Landscape"]],
+}
+EXPECTED = loads(dumps(calculate(JOB, RAIL_CATALOG)))
+
+
+@pytest.fixture(scope="module")
+def server():
+    with CalculationServer(("127.0.0.1", 0), RAIL_CATALOG, max_workers=1) as server:
+        thread = Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        yield server
+        server.shutdown()
+        thread.join()
+
+
+def request(server, method, path, body=None, headers=None):
+    connection = HTTPConnection(*server.server_address, timeout=30)
+    try:
+        connection.request(method, path, body, headers or {})
+        response = connection.getresponse()
+        return response.status, loads(response.read()), response.getheader("Connection")
+    finally:
+        connection.close()
+
+
+def test_calculate_round_trips(server):
+    status, result, _ = request(server, "POST", "/calculate", dumps(JOB))
+    assert status == 200
+    assert result == EXPECTED
+
+
+def test_batch_round_trips(server):
+    bad_job = dict(JOB, rows=[[2.7, "Portrait"]])
+    status, result, _ = request(server, "POST", "/batch", dumps({"jobs": [JOB, bad_job, JOB]}))
+    assert status == 200
+    assert result["results"][0] == result["results"][2] == EXPECTED
+    assert "error" in result["results"][1]
+
+
+def test_bad_content_length_closes_the_connection(server):
+    status, result, connection = request(server, "POST", "/calculate", dumps(JOB), {"Content-Length": "abc"})
+    assert status == 400
+    assert connection == "close"
+
+
+def test_row_counts_must_be_integers():
+    for num_panels in (2.7, 3.0, "3", True):
+        with pytest.raises(ValueError):
+            parse_job(dict(JOB, rows=[[num_panels, "Portrait"]]))
+    assert len(parse_job(JOB)[1]) == 2
@@ -0,0 +1,54 @@
+from random import Random
+
+import pytest
+
+from rowset import LANDSCAPE, as_rowset
+from test_rail_selection import RAIL_CATALOG, RAIL_LENGTHS, make_inputs
+from tolerance import LENGTH_STEP, analyze_tolerances
+from units import to_length
+from utils import get_rail_length, get_rail_selections, optimal_rail_selection
+
+ROW_DATA = [(num_panels, orientation) for num_panels in range(1, 13) for orientation in ("Portrait", "Landscape")]
+
+
+def sampled_tolerances(row_data, rail_selections, user_inputs, deviations, num_samples, seed):
+    """Check every sample of every row one by one."""
+    rng = Random(seed)
+    samples = [rng.gauss(0, 1) for _ in range(num_samples)]
+    width_deviation, height_deviation, spacing_deviation = deviations
+    results = []
+    row_set = as_rowset(row_data)
+    for num_panels, orientation, selection in zip(row_set.num_panels, row_set.orientations, rail_selections):
+        rail_total = sum(selection[3])
+        panel_deviation = height_deviation if orientation == LANDSCAPE else width_deviation
+        deviation = (num_panels * panel_deviation**2 + (num_panels - 1) * spacing_deviation**2) ** 0.5
+        nominal = get_rail_length(num_panels, orientation, user_inputs)
+        num_short = 0
+        total_waste = 0
+        for sample in samples:
+            required = round(nominal + deviation * sample)
+            if required > rail_total:
+                num_short += 1
+                step = -(-required // LENGTH_STEP) * LENGTH_STEP
+                total_waste += 2 * (sum(optimal_rail_selection(step, RAIL_LENGTHS)[3]) - required)
+            else:
+                total_waste += 2 * (rail_total - required)
+        results.append((num_short / num_samples, total_waste / num_samples - 2 * (rail_total - nominal)))
+    return results
+
+
+@pytest.mark.parametrize(
+    "deviations", [(to_length(0.1), to_length(0.1), to_length(0.05)), (to_length(0.5), to_length(0.3), 0), (0, 0, 0)]
+)
+def test_tolerances_match_checking_every_sample(deviations):
+    user_inputs = make_inputs()
+    rail_selections = get_rail_selections(ROW_DATA, RAIL_CATALOG, user_inputs)
+    analysis = analyze_tolerances(
+        ROW_DATA, rail_selections, RAIL_LENGTHS, user_inputs, *deviations, num_samples=2000, seed=7
+    )
+    expected = sampled_tolerances(ROW_DATA, rail_selections, user_inputs, deviations, 2000, seed=7)
+    for probability, extra_waste, (expected_probability, expected_extra_waste) in zip(
+        analysis["shortfall_probability"], analysis["expected_extra_waste"], expected
+    ):
+        assert probability == expected_probability
+        assert extra_waste == pytest.approx(expected_extra_waste, abs=1)
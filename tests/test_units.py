@@ -0,0 +1,32 @@
+import pytest
+
+from service import LENGTH_INPUTS, parse_job
+from test_service import JOB
+from units import LENGTH_SCALE, format_length, to_inches, to_length
+from utils import TRUSS_BUFFER
+
+
+@pytest.mark.parametrize("inches", [0, 0.001, 0.39, 0.625, 44.6457, 67.7953, 92.5, 185, 78.7402])
+def test_lengths_round_trip_to_the_nearest_thousandth(inches):
+    length = to_length(inches)
+    assert isinstance(length, int)
+    assert abs(to_inches(length) - inches) <= 0.5 / LENGTH_SCALE
+    assert to_length(to_inches(length)) == length
+    assert format_length(length, digits=3) == f'{round(inches, 3):g}"'
+
+
+def test_lengths_round_to_the_nearest_unit():
+    assert to_length(0.0004) == 0
+    assert to_length(0.0006) == 1
+    assert to_length("92.5") == 92500
+    assert to_length(44.6457) == 44646
+    assert format_length(44646) == '44.65"'
+    assert format_length(92500) == '92.5"'
+    assert TRUSS_BUFFER == to_length(2 * 39.3701)
+
+
+def test_inputs_at_their_range_limits_are_accepted():
+    for key, (low, high) in LENGTH_INPUTS.items():
+        for value in (low, high):
+            user_inputs, _ = parse_job(dict(JOB, inputs=dict(JOB["inputs"], **{key: value})))
+            assert user_inputs[key] == to_length(value)